@@ -1 +1,3 @@
-# ML Models Comparator Backend Application
\ No newline at end of file
+# ML Models Comparator Backend Application
+
+__version__ = "1.0.0"
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Concurrency helpers"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """
+    Resolve an ``N_JOBS`` style setting to a concrete worker count
+
+    Follows the scikit-learn/joblib convention: positive values are used
+    as-is, ``-1`` means all CPUs, ``-2`` all CPUs but one, and so on.
+
+    Args:
+        n_jobs: Requested number of jobs
+
+    Returns:
+        Number of workers (always at least 1)
+    """
+    cpu_count = os.cpu_count() or 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return max(1, n_jobs)
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a bounded executor has no free worker or queue slot"""
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking pipeline work with a bounded admission queue
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    may wait for a worker. Further jobs are rejected with
+    :class:`PoolSaturatedError` instead of piling up behind the pool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="ml-pipeline"
+        )
+        # Only touched from the event loop thread, so no lock is needed
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of admitted jobs (running plus queued)"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """Number of currently admitted jobs"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of admitted jobs waiting for a worker"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def acquire(self):
+        """Reserve a slot for one job, failing fast when the pool is full"""
+        if self._in_flight >= self.capacity:
+            raise PoolSaturatedError(
+                f"Worker pool is saturated ({self._in_flight}/{self.capacity} jobs in flight)"
+            )
+        self._in_flight += 1
+
+    def release(self):
+        """Give back a slot reserved with :meth:`acquire`"""
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Stop the underlying thread pool"""
+        self._executor.shutdown(wait=wait)
@@ -1,7 +1,7 @@
 """Configuration management"""
 
 import os
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -21,11 +21,83 @@ class Settings(BaseSettings):
     
     # File Upload Configuration
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read per chunk when spooling uploads
+    UPLOAD_SPOOL_DIR: Optional[str] = None  # Defaults to the system temp directory
+    
+    # Ingestion Configuration
+    INGEST_MEMORY_BUDGET: int = 1024 * 1024 * 1024  # Max in-memory size of a loaded dataset
+    INGEST_SAMPLE_ROWS: int = 10000  # Rows sampled to plan column dtypes
+    INGEST_CATEGORY_MAX_RATIO: float = 0.5  # Max unique/non-null ratio for categorical strings
+    INGEST_DOWNCAST_FLOATS: bool = False  # Store floats as float32
+    PREPROCESS_SPARSE_THRESHOLD: float = 0.3  # Keep features sparse below this density
+    FEATURE_PRECISION: str = "float64"  # dtype of preprocessed features: "float32" halves them, "float64" keeps full precision
+    PROFILE_SAMPLE_ROWS: int = 100000  # Leading rows read by /profile (0 reads the whole file)
+    PROFILE_EXACT_DISTINCT_ROWS: int = 1000000  # Count distinct values exactly up to this many rows, then HyperLogLog
     
     # ML Configuration
     TEST_SIZE: float = 0.2
     RANDOM_STATE: int = 42
     N_JOBS: int = -1
+    PARALLEL_TRAINING: bool = True  # Train models in a process pool sized from N_JOBS
+    SCALABLE_MIN_ROWS: int = 10000  # Train scalable variants of SVM, boosting, KNN and forests from this many rows
+    SCALABLE_MIN_FEATURES: int = 1000  # ... or from this many features
+    
+    RACING_MIN_ROWS: int = 100  # Smallest training subsample used by racing mode
+    TUNING_BUDGET: Optional[float] = 600.0  # Seconds of summed trial training time per tuning search
+    COST_MODEL_PATH: Optional[str] = None  # JSON file the training cost model learns into (in memory only when unset)
+    COST_MODEL_MAX_OBSERVATIONS: int = 200  # Latest training times kept per estimator class
+    
+    # Clustering Configuration
+    CLUSTERING_K_VALUES: List[int] = [2, 3, 4, 5, 6, 7, 8]  # Cluster counts swept by K-Means and agglomerative
+    CLUSTERING_MINIBATCH_ROWS: int = 50000  # Use MiniBatchKMeans above this many rows
+    CLUSTERING_SAMPLE_ROWS: int = 5000  # Rows DBSCAN and agglomerative clustering are fitted on
+    CLUSTERING_SILHOUETTE_SAMPLE: int = 5000  # Rows sampled for the silhouette score
+    WORKER_START_METHOD: str = "forkserver"  # multiprocessing start method for training workers; "fork" only from single-threaded servers
+    PREWARM_WORKERS: bool = False  # Import every estimator module at startup, before serving
+
+    # Incremental Mode Configuration
+    INCREMENTAL_CHUNK_ROWS: int = 50000  # Rows read and trained on at a time
+    INCREMENTAL_HOLDOUT_ROWS: int = 10000  # Reservoir sample the models are scored on
+    INCREMENTAL_EPOCHS: int = 1  # Passes over the stream
+    
+    # Training Limits (unset means unlimited; overridable per request)
+    MODEL_TIMEOUT: Optional[float] = None  # Seconds per model
+    MODEL_MEMORY_LIMIT_MB: Optional[int] = None  # Memory per model worker
+    REQUEST_TIMEOUT: Optional[float] = None  # Seconds per comparison
+    REQUEST_MEMORY_LIMIT_MB: Optional[int] = None  # Memory across a comparison's workers
+    
+    # Request Concurrency Configuration
+    PIPELINE_WORKERS: int = 2  # Comparisons processed concurrently
+    PIPELINE_QUEUE_DEPTH: int = 4  # Comparisons allowed to wait for a worker
+    BUSY_RETRY_AFTER: int = 5  # Retry-After seconds sent with 503 responses
+    
+    # Job Configuration
+    MAX_STORED_JOBS: int = 100  # Finished jobs beyond this are evicted oldest first
+    BATCH_MAX_DATASETS: int = 100  # Datasets accepted by one batch comparison (zip members included)
+    
+    # Result Cache Configuration
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 32  # In-memory LRU size
+    RESULT_CACHE_DIR: Optional[str] = None  # Enables the on-disk tier when set
+    RESULT_CACHE_MAX_DISK_BYTES: int = 512 * 1024 * 1024  # 512MB
+    
+    # Model Registry Configuration
+    MODEL_REGISTRY_DIR: Optional[str] = None  # Save fitted models for /predict when set
+    MODEL_REGISTRY_MAX_ENTRIES: int = 20  # Comparisons kept on disk, newest first
+    MODEL_REGISTRY_MAX_LOADED: int = 8  # Comparisons kept loaded in memory (LRU)
+    
+    # Dataset Store Configuration
+    DATASET_STORE_DIR: Optional[str] = None  # Keep uploads and their preprocessed matrices for reuse when set
+    DATASET_STORE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024  # 10GB; least recently used datasets evicted beyond
+    DATASET_STORE_TTL: float = 24 * 3600  # Seconds a dataset is kept after its last use
+    
+    # Distributed Training Configuration
+    TASK_QUEUE_PATH: Optional[str] = None  # SQLite task queue shared with `python worker.py`; stored datasets train on those workers when set
+    TASK_LEASE_SECONDS: float = 30.0  # A claimed task without a heartbeat for this long is lost and retried
+    TASK_HEARTBEAT_INTERVAL: float = 5.0  # Seconds between a worker's lease renewals
+    TASK_MAX_ATTEMPTS: int = 3  # Claims of a lost task before it is reported as failed
+    TASK_POLL_INTERVAL: float = 0.5  # Seconds between queue polls by comparisons and idle workers
+    TASK_QUEUE_SHARED: bool = False  # Workers on other hosts open TASK_QUEUE_PATH over a network filesystem (no WAL)
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,61 @@
+"""Startup-time report: how long each startup phase and heavy import took"""
+
+import sys
+import time
+import importlib
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """
+    Wall-clock seconds of each startup phase, and of each module imported while pre-warming
+
+    Phases are recorded in order (e.g. ``import``, ``service_init``,
+    ``prewarm``, ``fork_server``); modules that were already loaded when pre-warming asked
+    for them cost nothing and are not listed.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = OrderedDict()
+        self.imports: Dict[str, float] = OrderedDict()
+        self.prewarmed = False
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def import_modules(self, modules: List[str]):
+        """Import modules one by one (blocking), timing those not loaded yet"""
+        for module in modules:
+            if module in sys.modules:
+                continue
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                logger.warning(f"Could not pre-import {module}: {str(e)}")
+                continue
+            self.imports[module] = time.perf_counter() - start
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items())
+        line = f"Startup took {self.total:.3f}s ({phases})"
+        if self.imports:
+            slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:5]
+            line += "; slowest pre-warmed imports: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in slowest)
+        return line
@@ -0,0 +1,285 @@
+"""Request telemetry: stage timings and Prometheus text exposition"""
+
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.utils.memory import PeakRSSMonitor, current_rss
+
+LabelValues = Tuple[str, ...]
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# 64 MiB .. 64 GiB in powers of two
+MEMORY_BUCKETS = tuple(float(2 ** exponent) for exponent in range(26, 37))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric(ABC):
+    """Base class for a named metric family with fixed label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of every label set"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class _ValueMetric(_Metric):
+    """One value per label set, optionally read from a callback instead"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        if self.function is not None:
+            return self.function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {_format_value(self.function())}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+class Counter(_ValueMetric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+class Gauge(_ValueMetric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metric families rendered in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+class StageTimer:
+    """
+    Record the wall time and peak RSS of each stage of one request
+
+    Stages are timed with ``with timer.stage(name):``. While a
+    :class:`PeakRSSMonitor` is attached, a stage's peak RSS is the highest
+    sample taken during it; otherwise RSS is read at the stage boundaries.
+    Finished stages are reported to ``telemetry`` (if any) as they end, and
+    stages that raise are counted as errors of that stage.
+    """
+
+    def __init__(self, telemetry: Optional["ServiceTelemetry"] = None):
+        self.telemetry = telemetry
+        self.monitor: Optional[PeakRSSMonitor] = None
+        # Stage name -> (seconds, peak RSS bytes or None), in execution order
+        self.stages: "OrderedDict[str, Tuple[float, Optional[int]]]" = OrderedDict()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_rss = self._start_memory()
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if self.telemetry is not None:
+                self.telemetry.errors.inc(stage=name)
+            raise
+        finally:
+            seconds = time.perf_counter() - start_time
+            peak = self._end_memory(start_rss)
+            self.record(name, seconds, peak)
+
+    def record(self, name: str, seconds: float, peak_bytes: Optional[int] = None):
+        """Add a stage measured elsewhere; repeated stages accumulate"""
+        previous_seconds, previous_peak = self.stages.get(name, (0.0, None))
+        if previous_peak is not None and (peak_bytes is None or previous_peak > peak_bytes):
+            peak_bytes = previous_peak
+        self.stages[name] = (previous_seconds + seconds, peak_bytes)
+        if self.telemetry is not None:
+            self.telemetry.observe_stage(name, seconds, peak_bytes)
+
+    def _start_memory(self) -> Optional[int]:
+        if self.monitor is not None:
+            self.monitor.reset_stage_peak()
+            return None
+        return current_rss()
+
+    def _end_memory(self, start_rss: Optional[int]) -> Optional[int]:
+        if self.monitor is not None:
+            return self.monitor.stage_peak_bytes
+        end_rss = current_rss()
+        if start_rss is None or end_rss is None:
+            return end_rss
+        return max(start_rss, end_rss)
+
+class ServiceTelemetry:
+    """
+    Metric families exported by the comparison service
+
+    ``in_flight`` and ``queue_depth`` are callbacks, e.g. reading the
+    pipeline executor's admission counters.
+    """
+
+    def __init__(
+        self,
+        in_flight: Optional[Callable[[], float]] = None,
+        queue_depth: Optional[Callable[[], float]] = None
+    ):
+        self.registry = MetricsRegistry()
+        self.stage_seconds = self.registry.histogram(
+            "mlc_stage_duration_seconds", "Wall time of each comparison pipeline stage", ["stage"]
+        )
+        self.stage_peak_rss = self.registry.histogram(
+            "mlc_stage_peak_rss_bytes", "Peak resident memory of the API process during each stage",
+            ["stage"], buckets=MEMORY_BUCKETS
+        )
+        self.model_seconds = self.registry.histogram(
+            "mlc_model_stage_duration_seconds", "Fit, predict and scoring time by configured model",
+            ["model", "stage"]
+        )
+        self.comparisons = self.registry.counter(
+            "mlc_comparisons_total", "Comparisons by outcome (completed, failed, cached)", ["status"]
+        )
+        self.model_results = self.registry.counter(
+            "mlc_model_results_total", "Model results by status", ["status"]
+        )
+        self.errors = self.registry.counter(
+            "mlc_errors_total", "Failures by the pipeline stage they occurred in", ["stage"]
+        )
+        self.active = self.registry.gauge(
+            "mlc_comparisons_in_progress", "Comparisons currently being processed"
+        )
+        if in_flight is not None:
+            self.registry.gauge(
+                "mlc_pipeline_in_flight", "Comparisons admitted to the worker pool (running plus queued)",
+                function=in_flight
+            )
+        if queue_depth is not None:
+            self.registry.gauge(
+                "mlc_pipeline_queue_depth", "Admitted comparisons waiting for a worker",
+                function=queue_depth
+            )
+
+    def timer(self) -> StageTimer:
+        return StageTimer(self)
+
+    def observe_stage(self, name: str, seconds: float, peak_bytes: Optional[int]):
+        self.stage_seconds.observe(seconds, stage=name)
+        if peak_bytes is not None:
+            self.stage_peak_rss.observe(peak_bytes, stage=name)
+
+    def render(self) -> str:
+        return self.registry.render()
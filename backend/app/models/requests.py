@@ -0,0 +1,63 @@
+"""Request models"""
+
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+class ComparisonMode(str, Enum):
+    """How candidate models are evaluated"""
+    STANDARD = "standard"
+    RACING = "racing"
+    CROSS_VALIDATION = "cv"
+    TUNING = "tune"
+    INCREMENTAL = "incremental"
+
+class ComparisonOptions(BaseModel):
+    """Per-request comparison options"""
+    # Allow option names such as model_timeout
+    model_config = ConfigDict(protected_namespaces=())
+    
+    mode: ComparisonMode = ComparisonMode.STANDARD
+    racing_min_fraction: float = Field(
+        default=0.1, gt=0, le=1,
+        description="Fraction of the training rows used by the first racing or tuning rung"
+    )
+    racing_eta: int = Field(
+        default=3, ge=2,
+        description="Growth factor of the data fraction between rungs; 1/eta of the models (or of each family's trials) survive each rung"
+    )
+    cv_folds: int = Field(
+        default=5, ge=2, le=20,
+        description="Number of cross-validation folds (stratified for classification)"
+    )
+    cv_repeats: int = Field(
+        default=1, ge=1, le=10,
+        description="Times the k-fold split is repeated with a different shuffle"
+    )
+    tune_candidates: int = Field(
+        default=16, ge=1, le=200,
+        description="Hyperparameter configurations sampled per model family in tuning mode"
+    )
+    tune_folds: int = Field(
+        default=3, ge=2, le=10,
+        description="Cross-validation folds the tuning trials are scored on"
+    )
+    tune_budget: Optional[float] = Field(
+        default=None, gt=0, description="Seconds of summed trial training time the search may use (overrides TUNING_BUDGET)"
+    )
+    latency_target: Optional[float] = Field(
+        default=None, gt=0,
+        description="Seconds the training stage should take; only models predicted to fit are trained (standard mode)"
+    )
+    model_timeout: Optional[float] = Field(
+        default=None, gt=0, description="Seconds each model may train (overrides MODEL_TIMEOUT)"
+    )
+    model_memory_limit_mb: Optional[int] = Field(
+        default=None, gt=0, description="Memory each model worker may use (overrides MODEL_MEMORY_LIMIT_MB)"
+    )
+    request_timeout: Optional[float] = Field(
+        default=None, gt=0, description="Seconds the whole comparison may take (overrides REQUEST_TIMEOUT)"
+    )
+    request_memory_limit_mb: Optional[int] = Field(
+        default=None, gt=0, description="Memory all model workers may use together (overrides REQUEST_MEMORY_LIMIT_MB)"
+    )
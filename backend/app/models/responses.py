@@ -1,14 +1,48 @@
 """Response models"""
 
+from datetime import datetime
+from enum import Enum
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
+class RungResult(BaseModel):
+    """Model results on one rung of a racing comparison"""
+    fraction: float
+    rows: int
+    metrics: Dict[str, float]
+    training_time: float
+
+class FoldResult(BaseModel):
+    """Model results on one cross-validation fold"""
+    repeat: int
+    fold: int
+    metrics: Dict[str, float]
+    fit_time: float
+    score_time: float
+
 class ModelResult(BaseModel):
     """Individual model results"""
     name: str
     metrics: Dict[str, float]
     training_time: float
     type: str
+    status: str = "completed"
+    fit_time: Optional[float] = None
+    score_time: Optional[float] = None  # Prediction plus metric computation
+    predict_time: Optional[float] = None
+    # Classification: precision, recall, f1_score and support per label
+    per_class: Optional[Dict[str, Dict[str, float]]] = None
+    rungs: Optional[List[RungResult]] = None
+    # Cross-validation: metrics holds the mean over folds
+    metrics_std: Optional[Dict[str, float]] = None
+    folds: Optional[List[FoldResult]] = None
+    # Tuning: the winning parameters (empty when the defaults won) and the
+    # primary-metric gain over the defaults on the same test set
+    best_params: Optional[Dict[str, Any]] = None
+    default_metrics: Optional[Dict[str, float]] = None
+    tuning_gain: Optional[float] = None
+    # Training time the scheduler's cost model predicted, to compare with training_time
+    predicted_time: Optional[float] = None
 
 class DatasetInfo(BaseModel):
     """Dataset information"""
@@ -16,6 +50,37 @@ class DatasetInfo(BaseModel):
     columns: int
     features: List[str]
     target: Optional[str] = None
+    memory_usage_mb: Optional[float] = None
+    file_format: Optional[str] = None
+    reader: Optional[str] = None
+
+class ColumnProfile(BaseModel):
+    """Statistics of one column"""
+    name: str
+    dtype: str
+    kind: str  # numeric, categorical, datetime or other (not used as a feature)
+    count: int  # Non-null values
+    null_count: int
+    distinct: int  # Distinct non-null values
+    distinct_approximate: bool = False  # HyperLogLog estimate
+    # Numeric columns only
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    skewness: Optional[float] = None
+    kurtosis: Optional[float] = None  # Excess kurtosis
+
+class DatasetProfile(BaseModel):
+    """Column profile of a dataset"""
+    rows: int
+    profiled_rows: int  # Fewer than rows when a sample was profiled
+    sampled: bool
+    columns: List[ColumnProfile]
+    profile_time: float
+    task_type: Optional[str] = None
+    target: Optional[str] = None
+    file_format: Optional[str] = None
 
 class PreprocessingInfo(BaseModel):
     """Preprocessing information"""
@@ -23,13 +88,183 @@ class PreprocessingInfo(BaseModel):
     categorical_features_encoded: int
     features_scaled: bool
 
+class RacingRung(BaseModel):
+    """One successive-halving rung"""
+    fraction: float
+    rows: int
+    models: List[str]
+    eliminated: List[str]
+
+class RacingSummary(BaseModel):
+    """Summary of a racing comparison"""
+    primary_metric: str
+    rungs: List[RacingRung]
+    training_time: float
+    estimated_full_training_time: float
+    compute_saved_seconds: float
+    compute_saved_ratio: float
+
+class CrossValidationSummary(BaseModel):
+    """Summary of a cross-validated comparison"""
+    strategy: str
+    n_folds: int
+    n_repeats: int
+    fold_preparation_time: float
+
+class TuningRung(BaseModel):
+    """One halving rung of a hyperparameter search"""
+    fraction: float
+    rows: int  # Training rows per fold
+    trials: int
+    pruned: int
+
+class TuningSummary(BaseModel):
+    """Summary of a tuned comparison"""
+    primary_metric: str
+    n_candidates: int  # Configurations sampled per model family, after fitting the budget
+    n_folds: int
+    eta: int
+    rungs: List[TuningRung]
+    trials: int
+    search_time: float  # Summed training time of all trials
+    budget_seconds: Optional[float] = None
+    budget_exhausted: bool = False
+
+class ModelVariant(BaseModel):
+    """A scalable estimator trained in place of the configured one"""
+    configured: str  # Configured estimator class
+    estimator: str  # What was trained instead
+    reason: str
+
+class ScheduleSummary(BaseModel):
+    """How the models of a standard comparison were scheduled"""
+    order: List[str]  # Start order, longest predicted first
+    workers: int
+    predicted_makespan: float  # Predicted wall time of the training stage
+    latency_target: Optional[float] = None
+    skipped: List[str] = []  # Predicted not to finish within the latency target
+    observations: int  # Measured training times the cost model had learned from
+    # Median factor by which predicted and actual training times differed
+    median_error_factor: Optional[float] = None
+    # Model name -> scalable variant trained in its place on a large dataset
+    variants: Dict[str, ModelVariant] = {}
+
+class ClusteringSummary(BaseModel):
+    """Summary of a clustering comparison"""
+    primary_metric: str
+    best_model: Optional[str] = None
+    k_values: List[int]
+    kmeans_variant: str
+    sample_rows: int
+
+class IncrementalSummary(BaseModel):
+    """Summary of an incremental (streamed) comparison"""
+    chunk_rows: int
+    chunks: int
+    epochs: int
+    training_rows: int
+    holdout_rows: int  # Reservoir sample the models are scored on
+    scan_time: float
+    training_time: float
+
+class StageTiming(BaseModel):
+    """Time spent in one pipeline stage"""
+    seconds: float
+    peak_rss_mb: Optional[float] = None  # Peak RSS of the API process during the stage
+
 class ComparisonResponse(BaseModel):
     """Model comparison response"""
+    comparison_id: Optional[str] = None  # Set when the fitted models were registered
     task_type: str
     models: List[ModelResult]
     dataset_info: DatasetInfo
     preprocessing_info: PreprocessingInfo
+    peak_rss_mb: Optional[float] = None
+    racing: Optional[RacingSummary] = None
+    cross_validation: Optional[CrossValidationSummary] = None
+    clustering: Optional[ClusteringSummary] = None
+    tuning: Optional[TuningSummary] = None
+    incremental: Optional[IncrementalSummary] = None
+    schedule: Optional[ScheduleSummary] = None
+    # Stage name -> timing, in pipeline order; fit, predict and scoring are summed over models
+    timings: Optional[Dict[str, StageTiming]] = None
+
+class BatchDatasetResult(BaseModel):
+    """Outcome of one dataset of a batch comparison"""
+    dataset: str
+    status: str  # "completed" or "failed"
+    result: Optional[ComparisonResponse] = None
+    error: Optional[str] = None
+
+class LeaderboardEntry(BaseModel):
+    """One model's standing across the datasets of a batch"""
+    model: str
+    task_type: str
+    primary_metric: str
+    datasets: int  # Datasets the model was scored on
+    wins: int  # Datasets on which it scored best (ties count for each)
+    mean_rank: float  # Average rank among the dataset's models, 1 being best
+    mean_score: float
+
+class BatchSummary(BaseModel):
+    """Final event of a batch comparison"""
+    datasets: int
+    completed: int
+    failed: int
+    workers: int  # Worker processes shared by every dataset
+    wall_time: float
+    training_time: float  # Summed over every model of every dataset
+    leaderboard: List[LeaderboardEntry]  # Grouped by task type, best mean rank first
+
+class PredictionResponse(BaseModel):
+    """Predictions of a registered model for a batch of rows"""
+    comparison_id: str
+    model: str
+    task_type: str
+    predictions: List[Any]
 
 class HealthResponse(BaseModel):
     """Health check response"""
-    status: str
\ No newline at end of file
+    status: str
+
+class JobStatus(str, Enum):
+    """Lifecycle state of an asynchronous comparison job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class StoredDatasetResponse(BaseModel):
+    """A dataset kept in the dataset store, preprocessed for the standard train/test split"""
+    dataset_id: str
+    filename: Optional[str] = None
+    file_format: str
+    size_bytes: int  # Raw upload
+    stored_bytes: int  # Upload plus preprocessed matrices on disk
+    task_type: str
+    dataset_info: DatasetInfo
+    preprocessing_info: PreprocessingInfo
+    created_at: datetime
+    expires_at: datetime  # Unless used again before then
+
+class JobResponse(BaseModel):
+    """Asynchronous comparison job state"""
+    job_id: str
+    status: JobStatus
+    filename: Optional[str] = None
+    models: List[ModelResult] = []
+    result: Optional[ComparisonResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class CacheStats(BaseModel):
+    """Result cache counters"""
+    hits: int
+    misses: int
+    memory_hits: int
+    disk_hits: int
+    hit_ratio: float
+    memory_entries: int
+    disk_bytes: int
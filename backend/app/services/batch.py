@@ -0,0 +1,430 @@
+"""Batch comparisons: many datasets sharing one pool of worker processes"""
+
+import time
+import asyncio
+import logging
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from scipy.stats import rankdata
+
+from app.core.telemetry import StageTimer
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.models.responses import (
+    BatchDatasetResult, BatchSummary, ComparisonResponse, LeaderboardEntry, ModelResult
+)
+from app.services.clustering import PRIMARY_METRIC as CLUSTERING_METRIC
+from app.services.job_store import JobEvent
+from app.services.ml_service import MLService, PreparedDataset
+from app.services.model_runner import IsolatedRunner, RunOutcome, Task, TaskQueue
+from app.services.racing import PRIMARY_METRICS
+from app.services.scheduler import DatasetShape, TrainingSchedule
+from app.utils.data_loader import DatasetSource, SpooledUpload
+from app.utils.memory import PeakRSSMonitor
+
+logger = logging.getLogger(__name__)
+
+# (dataset name, content) of one dataset in a batch
+BatchSource = Tuple[str, DatasetSource]
+
+class FairShareQueue(TaskQueue):
+    """
+    Training tasks of several datasets, handed out fairly
+
+    Each dataset has its own queue in its schedule order. The next task
+    comes from the dataset with the fewest tasks running, ties going to the
+    one served longest ago, so a dataset with many or slow models cannot
+    hold every worker while the others wait. The queue stays open for
+    datasets that are still being prepared until :meth:`close` is called.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self._groups: Dict[str, Deque[Task]] = {}
+        self._running: Dict[str, int] = {}
+        self._served: Dict[str, int] = {}
+        self._owners: Dict[str, str] = {}  # Task name -> group, while running
+        self._clock = itertools.count()
+
+    def add(self, group: str, tasks: Iterable[Task]):
+        """Queue a group's tasks behind any it already has waiting"""
+        if group not in self._groups:
+            self._groups[group] = deque()
+            self._running[group] = 0
+            self._served[group] = -1  # New groups go before ones already served
+        self._groups[group].extend(tasks)
+
+    def pop(self) -> Optional[Task]:
+        waiting = [group for group, tasks in self._groups.items() if tasks]
+        if not waiting:
+            return None
+        group = min(waiting, key=lambda group: (self._running[group], self._served[group]))
+        task = self._groups[group].popleft()
+        self._running[group] += 1
+        self._served[group] = next(self._clock)
+        self._owners[task[0]] = group
+        return task
+
+    def task_done(self, name: str):
+        """Free the share held by a task handed out by :meth:`pop`"""
+        group = self._owners.pop(name, None)
+        if group is not None:
+            self._running[group] -= 1
+
+    def drain(self) -> List[Task]:
+        tasks = [task for group in self._groups.values() for task in group]
+        for group in self._groups.values():
+            group.clear()
+        return tasks
+
+    @property
+    def exhausted(self) -> bool:
+        return self.closed and not any(self._groups.values())
+
+def build_leaderboard(responses: Iterable[ComparisonResponse]) -> List[LeaderboardEntry]:
+    """
+    Rank the models of each dataset by its primary metric and aggregate per model
+
+    Tied scores share the best rank. Models without the metric (failed or
+    stopped by a limit) are left out of their dataset's ranking.
+    """
+    ranks: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+    for response in responses:
+        metric = leaderboard_metric(response.task_type)
+        scored = [model for model in response.models if metric in model.metrics]
+        if not scored:
+            continue
+        scores = np.array([model.metrics[metric] for model in scored])
+        for model, rank, score in zip(scored, rankdata(-scores, method='min'), scores):
+            ranks.setdefault((response.task_type, model.name), []).append((float(rank), float(score)))
+
+    entries = [
+        LeaderboardEntry(
+            model=model_name,
+            task_type=task_type,
+            primary_metric=leaderboard_metric(task_type),
+            datasets=len(standings),
+            wins=sum(1 for rank, _ in standings if rank == 1),
+            mean_rank=round(float(np.mean([rank for rank, _ in standings])), 4),
+            mean_score=round(float(np.mean([score for _, score in standings])), 4)
+        )
+        for (task_type, model_name), standings in ranks.items()
+    ]
+    return sorted(entries, key=lambda entry: (entry.task_type, entry.mean_rank, -entry.mean_score))
+
+def leaderboard_metric(task_type: str) -> str:
+    """Metric models are ranked by for a task (higher is better)"""
+    return CLUSTERING_METRIC if task_type == 'clustering' else PRIMARY_METRICS[task_type]
+
+@dataclass
+class _BatchDataset:
+    """One prepared dataset whose models are training in the shared pool"""
+    name: str
+    prepared: PreparedDataset
+    timer: StageTimer
+    cache_key: Optional[str]
+    schedule: TrainingSchedule
+    prototypes: Dict[str, object]
+    shape: DatasetShape
+    kmeans_variant: Optional[str] = None  # Clustering only
+    comparison_id: Optional[str] = None
+    remaining: int = 0  # Models not finished yet
+    results: Dict[str, ModelResult] = field(default_factory=dict)
+    train_started: float = field(default_factory=time.monotonic)
+
+class BatchComparator:
+    """
+    Compare the configured models on many datasets in one request
+
+    Every (dataset, model) pair is a unit of work in one pool of
+    ``n_jobs`` worker processes, handed out by a FairShareQueue. Datasets
+    are prepared one at a time while earlier ones train, with at most one
+    more dataset in memory than there are workers. Each dataset's
+    ComparisonResponse is published as soon as its last model finishes.
+    """
+
+    def __init__(self, ml_service: MLService):
+        self.ml_service = ml_service
+        # Strong references so running batches are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(
+        self,
+        sources: List[BatchSource],
+        options: Optional[ComparisonOptions] = None
+    ) -> AsyncIterator[JobEvent]:
+        """
+        Start a batch and return its event stream
+
+        The stream yields a ``dataset`` event (BatchDatasetResult) per
+        dataset in completion order, then a single ``summary`` event
+        (BatchSummary) with the leaderboard. The batch owns the sources
+        from here on and removes spooled ones once they are loaded; closing
+        the stream early cancels the batch.
+
+        Raises:
+            ValueError: If the options ask for a mode other than standard,
+                or dataset names are not unique
+            PoolSaturatedError: If the worker pool and its queue are full
+        """
+        options = options or ComparisonOptions()
+        if options.mode != ComparisonMode.STANDARD:
+            raise ValueError("Batch comparisons support the standard mode only")
+        names = [name for name, _ in sources]
+        if len(set(names)) != len(names):
+            raise ValueError("Dataset names in a batch must be unique")
+
+        # One slot for the whole batch; its models share the process pool below
+        self.ml_service.executor.acquire()
+        events: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._run(sources, options, events))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Started batch of {len(sources)} datasets")
+        return self._stream(task, events)
+
+    async def _stream(self, task: asyncio.Task, events: asyncio.Queue) -> AsyncIterator[JobEvent]:
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            if not task.done():
+                logger.info("Batch stream closed early; cancelling the batch")
+                task.cancel()
+
+    async def _run(self, sources: List[BatchSource], options: ComparisonOptions, events: asyncio.Queue):
+        """Prepare and train every dataset, holding the slot reserved by submit"""
+        service = self.ml_service
+        trainer = service.model_trainer
+        started = time.monotonic()
+        limits = service.resolve_limits(options)
+        workers = trainer.n_jobs if trainer.parallel else 1
+        queue = FairShareQueue()
+        runner = IsolatedRunner(workers, limits, start_method=trainer.start_method)
+        in_memory = asyncio.Semaphore(workers + 1)
+        monitor = PeakRSSMonitor()
+        units: Dict[str, Tuple[_BatchDataset, str]] = {}  # Task name -> (dataset, model name)
+        finishing: Set[asyncio.Task] = set()
+        responses: List[ComparisonResponse] = []
+
+        async def publish(name: str, response: Optional[ComparisonResponse] = None, error: Optional[str] = None):
+            if response is not None:
+                responses.append(response)
+                result = BatchDatasetResult(dataset=name, status="completed", result=response)
+            else:
+                service.telemetry.comparisons.inc(status="failed")
+                result = BatchDatasetResult(dataset=name, status="failed", error=error)
+            await events.put(JobEvent("dataset", result))
+
+        async def prepare(name: str, source: DatasetSource):
+            timer = service.telemetry.timer()
+            timer.monitor = monitor
+            try:
+                cache_key, cached = await service.lookup_cached(source, options)
+                if cached is not None:
+                    service.telemetry.comparisons.inc(status="cached")
+                    in_memory.release()
+                    await publish(name, cached)
+                    return
+                prepared = await service.executor.run(service.prepare_dataset, source, options, timer)
+            except Exception as e:
+                logger.error(f"Error preparing {name}: {str(e)}")
+                in_memory.release()
+                await publish(name, error=f"Error processing dataset: {str(e)}")
+                return
+            finally:
+                if isinstance(source, SpooledUpload):
+                    source.cleanup()
+
+            if queue.closed:
+                in_memory.release()
+                await publish(name, error="Request time limit reached before training started")
+                return
+            try:
+                dataset = self._plan(name, prepared, options, timer, cache_key)
+            except Exception as e:
+                logger.error(f"Error planning {name}: {str(e)}")
+                in_memory.release()
+                await publish(name, error=f"Error planning dataset: {str(e)}")
+                return
+            tasks = []
+            for model_name in dataset.schedule.order:
+                key = f"{model_name} [{name}]"
+                units[key] = (dataset, model_name)
+                artifact_path = None
+                if dataset.comparison_id is not None:
+                    artifact_path = trainer.artifact_path(
+                        service.model_registry.entry_dir(dataset.comparison_id), model_name
+                    )
+                tasks.append(trainer.training_task(
+                    key, model_name, dataset.prototypes[model_name],
+                    (prepared.X_train, prepared.X_test, prepared.y_train, prepared.y_test),
+                    prepared.task_type, artifact_path
+                ))
+            dataset.remaining = len(tasks)
+            if tasks:
+                queue.add(name, tasks)
+            else:
+                spawn_finish(dataset)
+
+        async def feed():
+            try:
+                for name, source in sources:
+                    await in_memory.acquire()
+                    await prepare(name, source)
+            finally:
+                queue.close()
+
+        async def collect(outcome: RunOutcome):
+            queue.task_done(outcome.name)
+            dataset, model_name = units.pop(outcome.name)
+            outcome.name = model_name
+            result = trainer.outcome_to_result(outcome, dataset.prepared.task_type)
+            if result is not None:
+                trainer.learn(
+                    result, dataset.prototypes[model_name], dataset.shape, dataset.schedule.predicted[model_name]
+                )
+                dataset.results[model_name] = result
+            dataset.remaining -= 1
+            if dataset.remaining == 0:
+                spawn_finish(dataset)
+
+        def spawn_finish(dataset: _BatchDataset):
+            # Registration runs on the executor; the runner keeps polling meanwhile
+            task = asyncio.create_task(finish(dataset))
+            finishing.add(task)
+            task.add_done_callback(finishing.discard)
+
+        async def finish(dataset: _BatchDataset):
+            try:
+                response = await self._respond(dataset, monitor)
+            except Exception as e:
+                logger.error(f"Error finishing {dataset.name}: {str(e)}")
+                if dataset.comparison_id is not None:
+                    service.model_registry.discard(dataset.comparison_id)
+                await publish(dataset.name, error=f"Error processing dataset: {str(e)}")
+            else:
+                service.telemetry.comparisons.inc(status="completed")
+                await publish(dataset.name, response)
+            finally:
+                in_memory.release()
+
+        service.telemetry.active.inc()
+        try:
+            with monitor:
+                feeder = asyncio.create_task(feed())
+                try:
+                    await runner.run_all(queue, on_done=collect)
+                    await feeder
+                    while finishing:
+                        await asyncio.gather(*finishing)
+                finally:
+                    feeder.cancel()
+                    for task in list(finishing):
+                        task.cancel()
+
+            completed = len(responses)
+            await events.put(JobEvent("summary", BatchSummary(
+                datasets=len(sources),
+                completed=completed,
+                failed=len(sources) - completed,
+                workers=workers,
+                wall_time=round(time.monotonic() - started, 6),
+                training_time=round(sum(model.training_time for r in responses for model in r.models), 6),
+                leaderboard=build_leaderboard(responses)
+            )))
+            logger.info(f"Batch finished: {completed}/{len(sources)} datasets compared")
+        except Exception as e:
+            logger.error(f"Batch failed: {str(e)}")
+        finally:
+            service.executor.release()
+            service.telemetry.active.dec()
+            trainer.cost_model.save()
+            for _, source in sources:
+                if isinstance(source, SpooledUpload):
+                    source.cleanup()
+            events.put_nowait(None)
+
+    def _plan(
+        self,
+        name: str,
+        prepared: PreparedDataset,
+        options: ComparisonOptions,
+        timer: StageTimer,
+        cache_key: Optional[str]
+    ) -> _BatchDataset:
+        """Choose and order a prepared dataset's models, and open its registry entry"""
+        service = self.ml_service
+        trainer = service.model_trainer
+        candidates = kmeans_variant = None
+        latency_target = options.latency_target
+        if prepared.task_type == 'clustering':
+            candidates, kmeans_variant = service.clustering_engine.candidates(prepared.X_train.shape[0])
+            latency_target = None
+        schedule = trainer.schedule(
+            prepared.X_train, prepared.y_train, prepared.task_type,
+            candidates=candidates, latency_target=latency_target
+        )
+        if schedule.skipped:
+            logger.info(f"{name}: skipping {schedule.skipped}, predicted to exceed {latency_target}s")
+        dataset = _BatchDataset(
+            name=name,
+            prepared=prepared,
+            timer=timer,
+            cache_key=cache_key,
+            schedule=schedule,
+            prototypes=schedule.scheduled(),
+            shape=DatasetShape.of(prepared.X_train, prepared.y_train, prepared.task_type),
+            kmeans_variant=kmeans_variant
+        )
+        if service.model_registry is not None:
+            dataset.comparison_id = service.model_registry.create()
+        return dataset
+
+    async def _respond(self, dataset: _BatchDataset, monitor: PeakRSSMonitor) -> ComparisonResponse:
+        """Register a dataset's fitted models and build its response"""
+        service = self.ml_service
+        prepared, timer = dataset.prepared, dataset.timer
+        timer.record('train', time.monotonic() - dataset.train_started)
+        model_results = [
+            dataset.results[model_name] for model_name in dataset.prototypes if model_name in dataset.results
+        ]
+        service.record_model_stages(timer, model_results)
+
+        comparison_id = dataset.comparison_id
+        if comparison_id is not None:
+            with timer.stage('register'):
+                comparison_id = await service.executor.run(
+                    service.model_registry.register,
+                    comparison_id,
+                    prepared.task_type,
+                    prepared.target_column,
+                    prepared.preprocessor,
+                    prepared.target_classes,
+                    model_results
+                )
+
+        if prepared.task_type == 'clustering':
+            summaries = {'clustering': service.clustering_engine.summarize(
+                model_results, prepared.X_train.shape[0], dataset.kmeans_variant
+            )}
+        else:
+            summaries = {'schedule': dataset.schedule.summary(model_results)}
+        response = service.build_response(
+            comparison_id, prepared.task_type, model_results, prepared.dataset_info,
+            prepared.preprocessing_info, monitor, summaries, timer
+        )
+        service.cache_response(dataset.cache_key, response)
+        return response
+
+    async def shutdown(self):
+        """Cancel batches that are still running"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,194 @@
+"""Clustering comparison: k-sweep and sample-fitted algorithms"""
+
+import json
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClusterMixin, clone
+
+from app.models.responses import ClusteringSummary, ModelResult
+from app.services.estimators import is_instance, resolve
+from app.services.model_runner import TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.utils.data_preprocessor import FeatureMatrix
+
+logger = logging.getLogger(__name__)
+
+# Metric used to pick the best clustering (higher is better)
+PRIMARY_METRIC = 'silhouette_score'
+
+class SampledClusterer(BaseEstimator, ClusterMixin):
+    """
+    Fit a clustering estimator on a row sample and label the rest from it
+
+    Makes transductive algorithms with quadratic cost (DBSCAN, agglomerative
+    clustering) usable on large datasets: the estimator only sees
+    ``sample_rows`` rows. With ``assign='neighbor'`` every row gets the label
+    of its nearest sampled row; ``assign='centroid'`` uses the nearest
+    centroid of the sampled clusters, which is much cheaper and suits
+    compact clusters. With ``auto_eps``, DBSCAN's ``eps`` is set from the
+    distribution of ``min_samples``-nearest-neighbour distances in the sample.
+    Rows are labelled ``batch_rows`` at a time, so a sparse matrix is only
+    ever densified one batch at a time.
+    """
+
+    def __init__(self, estimator=None, sample_rows: int = 5000, assign: str = 'neighbor',
+                 auto_eps: bool = False, eps_quantile: float = 0.9, random_state: int = 42,
+                 batch_rows: int = 10000):
+        self.estimator = estimator
+        self.sample_rows = sample_rows
+        self.assign = assign
+        self.auto_eps = auto_eps
+        self.eps_quantile = eps_quantile
+        self.random_state = random_state
+        self.batch_rows = batch_rows
+
+    def fit(self, X, y=None):
+        n_rows = X.shape[0]
+        rng = np.random.default_rng(self.random_state)
+        sample = np.sort(rng.choice(n_rows, size=min(self.sample_rows, n_rows), replace=False))
+        X_sample = X[sample] if sparse.issparse(X) else np.asarray(X)[sample]
+        if sparse.issparse(X_sample):
+            X_sample = X_sample.toarray()
+
+        self.estimator_ = clone(self.estimator)
+        if self.auto_eps:
+            self.estimator_.set_params(eps=self._estimate_eps(X_sample))
+        sample_labels = self.estimator_.fit_predict(X_sample)
+
+        NearestNeighbors = resolve('sklearn.neighbors:NearestNeighbors')
+        if self.assign == 'centroid':
+            self.clusters_ = np.unique(sample_labels)
+            self.cluster_centers_ = np.vstack([
+                X_sample[sample_labels == label].mean(axis=0) for label in self.clusters_
+            ])
+            self.neighbors_ = NearestNeighbors(n_neighbors=1).fit(self.cluster_centers_)
+            self.sample_labels_ = self.clusters_
+        else:
+            self.neighbors_ = NearestNeighbors(n_neighbors=1).fit(X_sample)
+            self.sample_labels_ = sample_labels
+        self.labels_ = self.predict(X)
+        return self
+
+    def predict(self, X):
+        X = X.tocsr() if sparse.issparse(X) else np.asarray(X)
+        labels = np.empty(X.shape[0], dtype=self.sample_labels_.dtype)
+        for start in range(0, X.shape[0], self.batch_rows):
+            batch = X[start:start + self.batch_rows]
+            if sparse.issparse(batch):
+                batch = batch.toarray()
+            _, nearest = self.neighbors_.kneighbors(batch)
+            labels[start:start + len(nearest)] = self.sample_labels_[nearest[:, 0]]
+        return labels
+
+    def _estimate_eps(self, X_sample) -> float:
+        min_samples = self.estimator.get_params().get('min_samples', 5)
+        n_neighbors = min(min_samples, len(X_sample) - 1)
+        NearestNeighbors = resolve('sklearn.neighbors:NearestNeighbors')
+        distances, _ = NearestNeighbors(n_neighbors=n_neighbors + 1).fit(X_sample).kneighbors(X_sample)
+        eps = float(np.quantile(distances[:, -1], self.eps_quantile))
+        return eps if eps > 0 else 0.5
+
+class ClusteringEngine:
+    """
+    Compare clustering algorithms and cluster counts on one dataset
+
+    K-Means and agglomerative clustering are swept over ``k_values``;
+    K-Means switches to MiniBatchKMeans above ``minibatch_rows`` rows, and
+    DBSCAN and agglomerative clustering are fitted on ``sample_rows`` rows.
+    Every candidate trains in parallel through the ModelTrainer.
+    """
+
+    def __init__(
+        self,
+        trainer: ModelTrainer,
+        k_values: List[int],
+        minibatch_rows: int = 50000,
+        sample_rows: int = 5000,
+        random_state: int = 42
+    ):
+        self.trainer = trainer
+        self.k_values = sorted(set(k_values))
+        self.minibatch_rows = minibatch_rows
+        self.sample_rows = sample_rows
+        self.random_state = random_state
+
+    def fingerprint(self) -> str:
+        """Stable hash of the sweep settings, for result cache keys"""
+        encoded = json.dumps(
+            [self.k_values, self.minibatch_rows, self.sample_rows, self.random_state]
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def candidates(self, n_rows: int) -> Tuple[Dict[str, object], str]:
+        """Unfitted candidate estimators by name, and the K-Means variant used"""
+        configured = self.trainer.models_config.get('clustering', {})
+        k_values = [k for k in self.k_values if k < n_rows]
+        candidates = {}
+
+        for model_name, prototype in configured.items():
+            params = prototype.get_params()
+            if is_instance(prototype, 'sklearn.cluster:KMeans'):
+                if n_rows > self.minibatch_rows:
+                    prototype = resolve('sklearn.cluster:MiniBatchKMeans')(
+                        n_init=3, batch_size=4096, random_state=params.get('random_state')
+                    )
+                for k in k_values:
+                    candidates[f"{model_name} (k={k})"] = clone(prototype).set_params(n_clusters=k)
+            elif 'n_clusters' in params:
+                for k in k_values:
+                    candidates[f"{model_name} (k={k})"] = self._sampled(
+                        clone(prototype).set_params(n_clusters=k), n_rows, assign='centroid'
+                    )
+            else:
+                candidates[model_name] = self._sampled(
+                    prototype, n_rows, auto_eps=is_instance(prototype, 'sklearn.cluster:DBSCAN')
+                )
+
+        variant = 'MiniBatchKMeans' if n_rows > self.minibatch_rows else 'KMeans'
+        return candidates, variant
+
+    def _sampled(self, estimator, n_rows: int, assign: str = 'neighbor', auto_eps: bool = False):
+        """Wrap a transductive estimator so it is fitted on a sample"""
+        return SampledClusterer(
+            estimator,
+            sample_rows=min(self.sample_rows, n_rows),
+            assign=assign,
+            auto_eps=auto_eps,
+            random_state=self.random_state
+        )
+
+    async def compare(
+        self,
+        X: FeatureMatrix,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        artifact_dir: Optional[str] = None
+    ) -> Tuple[List[ModelResult], ClusteringSummary]:
+        """Train every candidate on X and pick the best by silhouette score"""
+        n_rows = X.shape[0]
+        candidates, variant = self.candidates(n_rows)
+        logger.info(f"Clustering sweep: {len(candidates)} candidates on {n_rows} rows ({variant})")
+
+        model_results = await self.trainer.train_all_models(
+            X, X, None, None, 'clustering',
+            on_result=on_result,
+            limits=limits,
+            candidates=candidates,
+            artifact_dir=artifact_dir
+        )
+        return model_results, self.summarize(model_results, n_rows, variant)
+
+    def summarize(self, model_results: List[ModelResult], n_rows: int, variant: str) -> ClusteringSummary:
+        """Summary of a sweep over the candidates for ``n_rows`` rows, with the best by silhouette score"""
+        scored = [result for result in model_results if PRIMARY_METRIC in result.metrics]
+        best = max(scored, key=lambda r: r.metrics[PRIMARY_METRIC]) if scored else None
+        return ClusteringSummary(
+            primary_metric=PRIMARY_METRIC,
+            best_model=best.name if best else None,
+            k_values=[k for k in self.k_values if k < n_rows],
+            kmeans_variant=variant,
+            sample_rows=min(self.sample_rows, n_rows)
+        )
@@ -0,0 +1,179 @@
+"""Cross-validated model evaluation with folds shared across models"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RepeatedKFold, RepeatedStratifiedKFold
+
+from app.models.responses import CrossValidationSummary, FoldResult, ModelResult, PreprocessingInfo
+from app.services.model_runner import TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.utils.data_preprocessor import DataPreprocessor, FeatureMatrix
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CVFold:
+    """One preprocessed cross-validation fold"""
+    repeat: int
+    fold: int
+    X_train: FeatureMatrix
+    X_test: FeatureMatrix
+    y_train: pd.Series
+    y_test: pd.Series
+    preprocessing_info: PreprocessingInfo
+
+@dataclass
+class CVPlan:
+    """Fold matrices computed once and shared by every model"""
+    strategy: str
+    n_folds: int
+    n_repeats: int
+    folds: List[CVFold]
+    preparation_time: float
+
+    def summary(self) -> CrossValidationSummary:
+        return CrossValidationSummary(
+            strategy=self.strategy,
+            n_folds=self.n_folds,
+            n_repeats=self.n_repeats,
+            fold_preparation_time=self.preparation_time
+        )
+
+class CrossValidator:
+    """
+    Evaluate every configured model with (repeated) k-fold cross-validation
+
+    Fold indices are drawn once and each fold's preprocessing pipeline is
+    fitted once on its training rows; all models then train on the same
+    fold matrices, with every (model, fold) pair running in parallel.
+    """
+
+    def __init__(self, trainer: ModelTrainer, preprocessor: DataPreprocessor, random_state: int = 42):
+        self.trainer = trainer
+        self.preprocessor = preprocessor
+        self.random_state = random_state
+
+    def prepare(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        task_type: str,
+        n_folds: int,
+        n_repeats: int
+    ) -> CVPlan:
+        """Split the raw features into folds and preprocess each fold (blocking)"""
+        if n_folds > len(X):
+            raise ValueError(f"Cannot split {len(X)} rows into {n_folds} folds")
+
+        start_time = time.time()
+        strategy = 'kfold'
+        splitter = RepeatedKFold(n_splits=n_folds, n_repeats=n_repeats, random_state=self.random_state)
+        if task_type == 'classification' and y.value_counts().min() >= n_folds:
+            strategy = 'stratified_kfold'
+            splitter = RepeatedStratifiedKFold(
+                n_splits=n_folds, n_repeats=n_repeats, random_state=self.random_state
+            )
+
+        folds = []
+        for index, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+            X_train, X_test, preprocessing_info, _ = self.preprocessor.fit_transform(
+                X.iloc[train_idx], X.iloc[test_idx], task_type
+            )
+            folds.append(CVFold(
+                repeat=index // n_folds,
+                fold=index % n_folds,
+                X_train=X_train,
+                X_test=X_test,
+                y_train=y.iloc[train_idx],
+                y_test=y.iloc[test_idx],
+                preprocessing_info=preprocessing_info
+            ))
+
+        logger.info(f"Prepared {len(folds)} {strategy} folds")
+        return CVPlan(
+            strategy=strategy,
+            n_folds=n_folds,
+            n_repeats=n_repeats,
+            folds=folds,
+            preparation_time=time.time() - start_time
+        )
+
+    async def evaluate(
+        self,
+        plan: CVPlan,
+        task_type: str,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None
+    ) -> List[ModelResult]:
+        """
+        Train every configured model on every fold
+
+        Returns results in models_config order; ``on_result`` is awaited
+        with a model's aggregated result once all of its folds are done.
+        Models that fail on any fold are logged and dropped.
+        """
+        splits = [(fold.X_train, fold.X_test, fold.y_train, fold.y_test) for fold in plan.folds]
+        finished: Dict[str, List[Optional[ModelResult]]] = {
+            model_name: [None] * len(splits) for model_name in self.trainer.models_config.get(task_type, {})
+        }
+
+        async def fold_done(index: int, result: ModelResult):
+            finished[result.name][index] = result
+            if on_result is not None and all(r is not None for r in finished[result.name]):
+                await on_result(self._aggregate(result.name, task_type, plan, finished[result.name]))
+
+        per_model = await self.trainer.train_on_splits(splits, task_type, on_result=fold_done, limits=limits)
+
+        model_results = []
+        for model_name, fold_results in per_model.items():
+            if any(result is None for result in fold_results):
+                logger.error(f"Dropping {model_name}: training failed on at least one fold")
+                continue
+            model_results.append(self._aggregate(model_name, task_type, plan, fold_results))
+        return model_results
+
+    def _aggregate(
+        self,
+        model_name: str,
+        task_type: str,
+        plan: CVPlan,
+        fold_results: List[ModelResult]
+    ) -> ModelResult:
+        """Combine per-fold results into mean/std metrics and per-fold timings"""
+        folds = [
+            FoldResult(
+                repeat=fold.repeat,
+                fold=fold.fold,
+                metrics=result.metrics,
+                fit_time=result.fit_time if result.fit_time is not None else result.training_time,
+                score_time=result.score_time or 0.0
+            )
+            for fold, result in zip(plan.folds, fold_results)
+            if result.status == "completed"
+        ]
+        limited = [result.status for result in fold_results if result.status != "completed"]
+
+        metrics, metrics_std = {}, {}
+        if not limited:
+            names = {name for result in fold_results for name in result.metrics}
+            for name in sorted(names):
+                values = [result.metrics[name] for result in fold_results if name in result.metrics]
+                metrics[name] = float(np.mean(values))
+                metrics_std[name] = float(np.std(values))
+
+        return ModelResult(
+            name=model_name,
+            metrics=metrics,
+            training_time=sum(result.training_time for result in fold_results),
+            type=task_type,
+            status=limited[0] if limited else "completed",
+            fit_time=sum(fold.fit_time for fold in folds),
+            score_time=sum(fold.score_time for fold in folds),
+            predict_time=sum(result.predict_time or 0.0 for result in fold_results),
+            metrics_std=metrics_std or None,
+            folds=folds
+        )
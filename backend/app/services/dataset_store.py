@@ -0,0 +1,301 @@
+"""On-disk store of uploaded datasets and their preprocessed matrices"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from app.models.responses import DatasetInfo, PreprocessingInfo, StoredDatasetResponse
+from app.utils.data_loader import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+PREPROCESSOR_FILE = "preprocessor.joblib"
+RAW_FILE = "raw"  # Followed by the upload's extension
+
+class DatasetNotFoundError(LookupError):
+    """Raised when a dataset is not in the store (unknown, expired or evicted)"""
+
+class DatasetInUseError(RuntimeError):
+    """Raised when deleting a dataset that a running comparison holds a lease on"""
+
+@dataclass
+class StoredUpload(SpooledUpload):
+    """
+    Raw file of a stored dataset, accepted anywhere a spooled upload is
+
+    Holds a lease that keeps the dataset from being evicted; cleanup()
+    releases the lease instead of deleting the file.
+    """
+    dataset_id: str = ""
+    store: Optional["DatasetStore"] = None
+
+    def cleanup(self):
+        if self.store is not None:
+            self.store.release(self.dataset_id)
+            self.store = None
+
+def _save_index(entry_dir: str, name: str, index: pd.Index) -> bool:
+    values = index.to_numpy()
+    if values.dtype == object:
+        return False  # Not mappable; reloaded with a RangeIndex
+    np.save(os.path.join(entry_dir, f"{name}.index.npy"), values)
+    return True
+
+def _save_matrix(entry_dir: str, name: str, X) -> Optional[Dict[str, Any]]:
+    """Write a feature matrix or target as .npy files; returns what is needed to map it back"""
+    if X is None:
+        return None
+    path = os.path.join(entry_dir, f"{name}.npy")
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        for part in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(entry_dir, f"{name}.{part}.npy"), getattr(X, part))
+        return {'kind': 'csr', 'shape': list(X.shape)}
+    if isinstance(X, pd.DataFrame):
+        np.save(path, np.ascontiguousarray(X.to_numpy()))
+        return {'kind': 'frame', 'columns': list(X.columns), 'index': _save_index(entry_dir, name, X.index)}
+    if isinstance(X, pd.Series):
+        values = X.to_numpy()
+        np.save(path, values if values.dtype != object else X.to_numpy(dtype=float))
+        return {'kind': 'series', 'index': _save_index(entry_dir, name, X.index)}
+    np.save(path, np.asarray(X))
+    return {'kind': 'array'}
+
+def _load_matrix(entry_dir: str, name: str, meta: Optional[Dict[str, Any]]):
+    """Map a matrix written by _save_matrix back from disk, read-only and without copying"""
+    if meta is None:
+        return None
+
+    def load(suffix: str = "") -> np.ndarray:
+        return np.load(os.path.join(entry_dir, f"{name}{suffix}.npy"), mmap_mode='r')
+
+    if meta['kind'] == 'csr':
+        return sparse.csr_matrix(
+            (load('.data'), load('.indices'), load('.indptr')), shape=tuple(meta['shape']), copy=False
+        )
+    values = load()
+    index = pd.Index(load('.index')) if meta.get('index') else None
+    if meta['kind'] == 'frame':
+        return pd.DataFrame(values, columns=meta['columns'], index=index, copy=False)
+    if meta['kind'] == 'series':
+        return pd.Series(values, index=index, copy=False)
+    return values
+
+def _directory_bytes(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+class DatasetStore:
+    """
+    Keep uploaded datasets on local disk, parsed and preprocessed once
+
+    Each dataset gets a directory holding the raw upload, the fitted
+    preprocessing pipeline and the preprocessed matrices of the standard
+    train/test split as ``.npy`` files, plus a manifest written last.
+    Matrices are loaded with ``mmap_mode='r'``: comparisons page them in
+    instead of parsing and preprocessing again, and forked training
+    workers share the same file-backed pages rather than each holding a
+    private copy. Datasets unused for ``ttl_seconds`` are deleted, and
+    the least recently used ones once the store exceeds ``max_bytes``;
+    both are checked whenever a dataset is stored or opened. Datasets
+    leased by a running comparison are never evicted.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int, ttl_seconds: float):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._leases: Counter = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def entry_dir(self, dataset_id: str) -> str:
+        if not dataset_id.isalnum():
+            raise DatasetNotFoundError(f"Invalid dataset id: {dataset_id}")
+        return os.path.join(self.root_dir, dataset_id)
+
+    def create(self, upload: SpooledUpload) -> StoredUpload:
+        """Move a spooled upload into a new, leased dataset directory (blocking)"""
+        dataset_id = uuid.uuid4().hex
+        entry_dir = self.entry_dir(dataset_id)
+        os.makedirs(entry_dir)
+        raw_path = os.path.join(entry_dir, RAW_FILE + os.path.splitext(upload.path)[1])
+        shutil.move(upload.path, raw_path)
+        return self._lease(dataset_id, raw_path, upload.size, upload.sha256)
+
+    def save_prepared(
+        self,
+        source: StoredUpload,
+        prepared,
+        filename: Optional[str] = None,
+        preprocessing: Optional[str] = None
+    ) -> StoredDatasetResponse:
+        """
+        Write a PreparedDataset's matrices and fitted pipeline, then the manifest (blocking)
+
+        ``preprocessing`` identifies the settings the matrices were prepared
+        with (see DataPreprocessor.fingerprint). Directories without a
+        manifest are incomplete and only removed once stale.
+        """
+        entry_dir = self.entry_dir(source.dataset_id)
+        # Clustering scores on the training rows; keep them one object when reloaded
+        same_split = prepared.X_test is prepared.X_train
+        matrices = {
+            'X_train': _save_matrix(entry_dir, 'X_train', prepared.X_train),
+            'X_test': None if same_split else _save_matrix(entry_dir, 'X_test', prepared.X_test),
+            'y_train': _save_matrix(entry_dir, 'y_train', prepared.y_train),
+            'y_test': _save_matrix(entry_dir, 'y_test', prepared.y_test),
+        }
+        joblib.dump(prepared.preprocessor, os.path.join(entry_dir, PREPROCESSOR_FILE))
+        target_classes = prepared.target_classes
+        manifest = {
+            "dataset_id": source.dataset_id,
+            "filename": filename,
+            "raw_file": os.path.basename(source.path),
+            "size": source.size,
+            "sha256": source.sha256,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "task_type": prepared.task_type,
+            "preprocessing": preprocessing,
+            "target": prepared.target_column,
+            "target_classes": target_classes.tolist() if target_classes is not None else None,
+            "dataset_info": prepared.dataset_info.model_dump(),
+            "preprocessing_info": prepared.preprocessing_info.model_dump(),
+            "matrices": matrices,
+            "same_split": same_split,
+        }
+        manifest["stored_bytes"] = _directory_bytes(entry_dir)
+        path = os.path.join(entry_dir, MANIFEST_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+        self._evict()
+        return self._describe(manifest, time.time())
+
+    def open(self, dataset_id: str) -> StoredUpload:
+        """Lease a stored dataset's raw file and mark the dataset as used (blocking)"""
+        self._evict()
+        manifest = self._manifest(dataset_id)
+        os.utime(os.path.join(self.entry_dir(dataset_id), MANIFEST_FILE))
+        raw_path = os.path.join(self.entry_dir(dataset_id), manifest["raw_file"])
+        return self._lease(dataset_id, raw_path, manifest["size"], manifest["sha256"])
+
+    def release(self, dataset_id: str):
+        with self._lock:
+            self._leases[dataset_id] -= 1
+            if self._leases[dataset_id] <= 0:
+                del self._leases[dataset_id]
+
+    def describe(self, dataset_id: str) -> StoredDatasetResponse:
+        manifest = self._manifest(dataset_id)
+        return self._describe(manifest, os.path.getmtime(os.path.join(self.entry_dir(dataset_id), MANIFEST_FILE)))
+
+    def prepared_with(self, dataset_id: str) -> Tuple[str, Optional[str]]:
+        """Task type of a stored dataset, and the preprocessing settings its matrices were prepared with"""
+        manifest = self._manifest(dataset_id)
+        return manifest["task_type"], manifest.get("preprocessing")
+
+    def load_prepared(self, dataset_id: str) -> Dict[str, Any]:
+        """PreparedDataset fields of a stored dataset, with memory-mapped matrices (blocking)"""
+        manifest = self._manifest(dataset_id)
+        entry_dir = self.entry_dir(dataset_id)
+        matrices = {name: _load_matrix(entry_dir, name, meta) for name, meta in manifest["matrices"].items()}
+        if manifest["same_split"]:
+            matrices['X_test'] = matrices['X_train']
+        target_classes = manifest["target_classes"]
+        return dict(
+            task_type=manifest["task_type"],
+            target_column=manifest["target"],
+            dataset_info=DatasetInfo(**manifest["dataset_info"]),
+            preprocessing_info=PreprocessingInfo(**manifest["preprocessing_info"]),
+            preprocessor=joblib.load(os.path.join(entry_dir, PREPROCESSOR_FILE), mmap_mode='r'),
+            target_classes=np.asarray(target_classes, dtype=object) if target_classes is not None else None,
+            **matrices
+        )
+
+    def delete(self, dataset_id: str):
+        """
+        Remove a dataset that no comparison is using
+
+        Raises:
+            DatasetNotFoundError: If the dataset is not stored
+            DatasetInUseError: If a running comparison holds a lease on it
+        """
+        self._manifest(dataset_id)
+        with self._lock:
+            if self._leases[dataset_id] > 0:
+                raise DatasetInUseError(f"Dataset {dataset_id} is in use by a running comparison")
+            self.discard(dataset_id)
+
+    def discard(self, dataset_id: str):
+        """Remove a dataset directory, complete or not"""
+        shutil.rmtree(self.entry_dir(dataset_id), ignore_errors=True)
+
+    def _lease(self, dataset_id: str, raw_path: str, size: int, sha256: str) -> StoredUpload:
+        with self._lock:
+            self._leases[dataset_id] += 1
+        return StoredUpload(raw_path, size, sha256, dataset_id=dataset_id, store=self)
+
+    def _manifest(self, dataset_id: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.entry_dir(dataset_id), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise DatasetNotFoundError(f"Dataset {dataset_id} is not stored (unknown, expired or evicted)")
+
+    def _describe(self, manifest: Dict[str, Any], last_used: float) -> StoredDatasetResponse:
+        return StoredDatasetResponse(
+            dataset_id=manifest["dataset_id"],
+            filename=manifest["filename"],
+            file_format=manifest["dataset_info"]["file_format"],
+            size_bytes=manifest["size"],
+            stored_bytes=manifest["stored_bytes"],
+            task_type=manifest["task_type"],
+            dataset_info=DatasetInfo(**manifest["dataset_info"]),
+            preprocessing_info=PreprocessingInfo(**manifest["preprocessing_info"]),
+            created_at=datetime.fromisoformat(manifest["created_at"]),
+            expires_at=datetime.fromtimestamp(last_used + self.ttl_seconds, tz=timezone.utc)
+        )
+
+    def _evict(self):
+        """Delete unleased datasets past their TTL, then the least recently used beyond max_bytes"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.root_dir):
+            entry_dir = os.path.join(self.root_dir, name)
+            try:
+                with open(os.path.join(entry_dir, MANIFEST_FILE)) as f:
+                    size = json.load(f)["stored_bytes"]
+                last_used = os.path.getmtime(os.path.join(entry_dir, MANIFEST_FILE))
+            except (OSError, ValueError, KeyError):
+                # Still being written, or left behind by a crash
+                try:
+                    last_used, size = os.path.getmtime(entry_dir), None
+                except OSError:
+                    continue
+            entries.append((last_used, name, size))
+
+        with self._lock:
+            leased = set(self._leases)
+        total = sum(size for _, _, size in entries if size is not None)
+        for last_used, name, size in sorted(entries):
+            if name in leased:
+                continue
+            expired = now - last_used > self.ttl_seconds
+            if expired or (size is not None and total > self.max_bytes):
+                shutil.rmtree(os.path.join(self.root_dir, name), ignore_errors=True)
+                total -= size or 0
+                logger.info(f"Evicted stored dataset {name} ({'expired' if expired else 'store full'})")
@@ -0,0 +1,235 @@
+"""Model training on worker processes that take their tasks from a TaskBroker"""
+
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sklearn.base import clone
+
+from app.models.responses import ModelResult
+from app.services.dataset_store import DatasetStore
+from app.services.model_runner import RunOutcome, STATUS_FAILED, STATUS_TIMED_OUT, TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.services.scheduler import DatasetShape, TrainingSchedule
+from app.services.task_broker import TASK_COMPLETED, TASK_FAILED, TASK_QUEUED, TaskBroker, TaskRecord, TrainingTask
+
+logger = logging.getLogger(__name__)
+
+# Awaited with the prototypes no worker is left to train; trains them in this process
+LocalTraining = Callable[[Dict[str, object]], Awaitable[List[ModelResult]]]
+
+class DistributedTrainer:
+    """
+    Train a stored dataset's models on remote workers and collect the results
+
+    Each model becomes one TrainingTask (dataset id, model name and the
+    scheduled prototype), submitted longest predicted first. The broker
+    is polled every ``poll_interval`` seconds; results are reported as
+    they arrive and teach the local cost model, exactly as with local
+    workers. Time limits are enforced here: tasks still waiting or running
+    when they expire are reported ``timed_out`` and withdrawn, so their
+    results are rejected. Memory limits are not enforced on remote workers.
+
+    When no worker is alive (none polled the broker within its lease
+    period), the models are handed to ``local_training`` instead: all of
+    them before anything is queued, or those still waiting in the queue
+    once the workers have gone.
+    """
+
+    def __init__(self, broker: TaskBroker, trainer: ModelTrainer, poll_interval: float = 0.5):
+        self.broker = broker
+        self.trainer = trainer
+        self.poll_interval = poll_interval
+
+    async def train_all_models(
+        self,
+        dataset_id: str,
+        shape: DatasetShape,
+        task_type: str,
+        schedule: TrainingSchedule,
+        local_training: LocalTraining,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        artifact_dir: Optional[str] = None
+    ) -> List[ModelResult]:
+        """
+        Train the scheduled models on the stored dataset; results keep config order
+
+        Models that fail are logged and dropped, like local training.
+        """
+        limits = limits or TrainingLimits()
+        prototypes = schedule.scheduled()
+        if not await self._call(self.broker.live_workers):
+            logger.warning(f"No training workers are alive; training dataset {dataset_id} locally")
+            return await local_training(prototypes)
+        group_id = uuid.uuid4().hex
+        tasks = {
+            task_id: TrainingTask(
+                task_id=task_id,
+                group_id=group_id,
+                dataset_id=dataset_id,
+                model_name=model_name,
+                task_type=task_type,
+                prototype=prototypes[model_name],
+                artifact_path=self.trainer.artifact_path(artifact_dir, model_name)
+            )
+            for task_id, model_name in ((uuid.uuid4().hex, model_name) for model_name in schedule.order)
+        }
+        results: Dict[str, ModelResult] = {}
+        reported = set()
+        logger.info(f"Queued {len(tasks)} models of dataset {dataset_id} as group {group_id}")
+
+        await self._call(self.broker.submit, list(tasks.values()))
+        try:
+            while len(reported) < len(tasks):
+                await asyncio.sleep(self.poll_interval)
+                withdrawn, waiting = [], []
+                for record in await self._call(self.broker.status, group_id):
+                    if record.task_id in reported or record.task_id not in tasks:
+                        continue
+                    outcome = self._outcome(record, limits)
+                    if outcome is None:
+                        if record.status == TASK_QUEUED:
+                            waiting.append(record.task_id)
+                        continue
+                    reported.add(record.task_id)
+                    if outcome.status == STATUS_TIMED_OUT:
+                        withdrawn.append(record.task_id)
+                    result = self.trainer.outcome_to_result(outcome, task_type)
+                    if result is None:
+                        continue
+                    self.trainer.learn(result, prototypes[outcome.name], shape, schedule.predicted[outcome.name])
+                    results[outcome.name] = result
+                    if on_result is not None:
+                        await on_result(result)
+                if withdrawn:
+                    await self._call(self.broker.discard, group_id, withdrawn)
+                if waiting and not await self._call(self.broker.live_workers):
+                    # The workers are gone; train what they never started here
+                    await self._call(self.broker.discard, group_id, waiting)
+                    reported.update(waiting)
+                    orphaned = {tasks[task_id].model_name for task_id in waiting}
+                    logger.warning(f"No training workers are alive; training {sorted(orphaned)} locally")
+                    local = {name: prototype for name, prototype in prototypes.items() if name in orphaned}
+                    for result in await local_training(local):
+                        results[result.name] = result
+        finally:
+            # Drops finished tasks, and any left over when the comparison is cancelled
+            await self._call(self.broker.discard, group_id)
+
+        self.trainer.cost_model.save()
+        return [results[model_name] for model_name in prototypes if model_name in results]
+
+    def _outcome(self, record: TaskRecord, limits: TrainingLimits) -> Optional[RunOutcome]:
+        """The outcome of a task once it is known, or None while it keeps going"""
+        elapsed = time.time() - record.started_at if record.started_at is not None else 0.0
+        if record.status == TASK_COMPLETED:
+            return RunOutcome(record.model_name, "completed", result=record.result, elapsed=elapsed)
+        if record.status == TASK_FAILED:
+            return RunOutcome(record.model_name, STATUS_FAILED, error=record.error, elapsed=elapsed)
+        if limits.expired():
+            return RunOutcome(record.model_name, STATUS_TIMED_OUT, error="Request time limit reached", elapsed=elapsed)
+        if limits.model_timeout is not None and record.started_at is not None and elapsed > limits.model_timeout:
+            return RunOutcome(
+                record.model_name, STATUS_TIMED_OUT,
+                error=f"Exceeded model time limit of {limits.model_timeout}s", elapsed=elapsed
+            )
+        return None
+
+    async def _call(self, fn, *args):
+        """Broker calls block on I/O; keep them off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+class TrainingWorker:
+    """
+    Claim training tasks from a TaskBroker and run them, one at a time
+
+    The stored dataset named by each task is mapped from ``dataset_store``
+    (which must be the same directory the API stores datasets in), and the
+    most recent one is kept mapped for the next task. While a task trains,
+    a background thread renews its lease every ``heartbeat_interval``
+    seconds; if the worker dies, the lease runs out and the broker hands
+    the task to another worker.
+    """
+
+    def __init__(
+        self,
+        broker: TaskBroker,
+        dataset_store: DatasetStore,
+        trainer: Optional[ModelTrainer] = None,
+        worker_id: Optional[str] = None,
+        heartbeat_interval: float = 5.0,
+        poll_interval: float = 0.5
+    ):
+        self.broker = broker
+        self.dataset_store = dataset_store
+        self.trainer = trainer or ModelTrainer(parallel=False)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self._dataset: Optional[Tuple[str, Dict[str, Any]]] = None
+
+    def run(self, stop: Optional[threading.Event] = None, max_tasks: Optional[int] = None) -> int:
+        """Process tasks until ``stop`` is set or ``max_tasks`` are done; returns the number processed"""
+        stop = stop or threading.Event()
+        processed = 0
+        logger.info(f"Worker {self.worker_id} waiting for tasks")
+        while not stop.is_set() and (max_tasks is None or processed < max_tasks):
+            if self.run_once():
+                processed += 1
+            else:
+                stop.wait(self.poll_interval)
+        return processed
+
+    def run_once(self) -> bool:
+        """Claim and run one task; False if none was waiting"""
+        task = self.broker.claim(self.worker_id)
+        if task is None:
+            return False
+
+        logger.info(f"Training {task.model_name} on dataset {task.dataset_id} (attempt {task.attempts})")
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(task, done), name=f"heartbeat-{task.task_id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = self._train(task)
+        except Exception as e:
+            logger.error(f"Error training {task.model_name}: {str(e)}")
+            self.broker.fail(task.task_id, self.worker_id, f"{type(e).__name__}: {e}")
+        else:
+            if not self.broker.complete(task.task_id, self.worker_id, result):
+                logger.warning(f"Result of {task.model_name} discarded: the task was withdrawn or reassigned")
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def _train(self, task: TrainingTask) -> ModelResult:
+        prepared = self._load(task.dataset_id)
+        return self.trainer.train_single_model(
+            clone(task.prototype), task.model_name,
+            prepared['X_train'], prepared['X_test'], prepared['y_train'], prepared['y_test'],
+            task.task_type, task.artifact_path
+        )
+
+    def _load(self, dataset_id: str) -> Dict[str, Any]:
+        if self._dataset is None or self._dataset[0] != dataset_id:
+            self._dataset = (dataset_id, self.dataset_store.load_prepared(dataset_id))
+        return self._dataset[1]
+
+    def _heartbeat(self, task: TrainingTask, done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                if not self.broker.heartbeat(task.task_id, self.worker_id):
+                    logger.warning(f"Lost the lease on {task.model_name}; its result will be discarded")
+                    return
+            except Exception as e:
+                # The lease survives a few missed beats; keep trying
+                logger.warning(f"Heartbeat for {task.model_name} failed: {str(e)}")
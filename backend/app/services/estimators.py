@@ -0,0 +1,129 @@
+"""Estimator catalog resolved lazily from import paths"""
+
+import sys
+import importlib
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+@lru_cache(maxsize=None)
+def resolve(path: str) -> type:
+    """Import the class at ``module:ClassName``"""
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+def is_instance(obj, paths: Union[str, Tuple[str, ...]]) -> bool:
+    """isinstance() against classes given by import path, without importing them"""
+    for path in (paths,) if isinstance(paths, str) else paths:
+        module, _, name = path.partition(':')
+        # Nothing can be an instance of a class whose module was never imported
+        loaded = sys.modules.get(module)
+        if loaded is not None and isinstance(obj, getattr(loaded, name)):
+            return True
+    return False
+
+@dataclass(frozen=True)
+class EstimatorSpec:
+    """Where an estimator class lives and how to construct it"""
+    path: str  # module:ClassName
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def module(self) -> str:
+        return self.path.partition(':')[0]
+
+    def build(self, **overrides):
+        """A fresh, unfitted estimator"""
+        return resolve(self.path)(**{**self.params, **overrides})
+
+# Every model compared by default, by task
+ESTIMATOR_SPECS: Dict[str, Dict[str, EstimatorSpec]] = {
+    'classification': {
+        'Logistic Regression': EstimatorSpec(
+            'sklearn.linear_model:LogisticRegression', {'random_state': 42, 'max_iter': 1000}
+        ),
+        'Decision Tree': EstimatorSpec('sklearn.tree:DecisionTreeClassifier', {'random_state': 42}),
+        'Random Forest': EstimatorSpec(
+            'sklearn.ensemble:RandomForestClassifier', {'random_state': 42, 'n_estimators': 100}
+        ),
+        'SVM': EstimatorSpec('sklearn.svm:SVC', {'random_state': 42, 'probability': True}),
+        'K-Nearest Neighbors': EstimatorSpec('sklearn.neighbors:KNeighborsClassifier'),
+        'Naive Bayes': EstimatorSpec('sklearn.naive_bayes:GaussianNB'),
+        'Gradient Boosting': EstimatorSpec('sklearn.ensemble:GradientBoostingClassifier', {'random_state': 42}),
+        'Neural Network': EstimatorSpec(
+            'sklearn.neural_network:MLPClassifier', {'random_state': 42, 'max_iter': 500}
+        ),
+    },
+    'regression': {
+        'Linear Regression': EstimatorSpec('sklearn.linear_model:LinearRegression'),
+        'Decision Tree': EstimatorSpec('sklearn.tree:DecisionTreeRegressor', {'random_state': 42}),
+        'Random Forest': EstimatorSpec(
+            'sklearn.ensemble:RandomForestRegressor', {'random_state': 42, 'n_estimators': 100}
+        ),
+        'SVM': EstimatorSpec('sklearn.svm:SVR'),
+        'K-Nearest Neighbors': EstimatorSpec('sklearn.neighbors:KNeighborsRegressor'),
+        'Gradient Boosting': EstimatorSpec('sklearn.ensemble:GradientBoostingRegressor', {'random_state': 42}),
+        'Neural Network': EstimatorSpec(
+            'sklearn.neural_network:MLPRegressor', {'random_state': 42, 'max_iter': 500}
+        ),
+    },
+    'clustering': {
+        'K-Means': EstimatorSpec('sklearn.cluster:KMeans', {'random_state': 42, 'n_clusters': 3, 'n_init': 'auto'}),
+        'Agglomerative Clustering': EstimatorSpec('sklearn.cluster:AgglomerativeClustering', {'n_clusters': 3}),
+        'DBSCAN': EstimatorSpec('sklearn.cluster:DBSCAN'),
+    },
+}
+
+class EstimatorCatalog(MutableMapping):
+    """
+    Task -> {model name: unfitted estimator}, built on first access
+
+    Behaves like the plain dict it replaces, but a task's estimators (and
+    the scikit-learn modules they live in) are only imported and
+    constructed when that task is first looked up. Assigning a task
+    replaces its estimators with the given instances.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, Dict[str, EstimatorSpec]]] = None):
+        self.specs = specs if specs is not None else ESTIMATOR_SPECS
+        self._built: Dict[str, Dict[str, Any]] = {}
+        self._overridden = set()
+
+    def __getitem__(self, task_type: str) -> Dict[str, Any]:
+        if task_type not in self._built:
+            specs = self.specs[task_type]
+            self._built[task_type] = {name: spec.build() for name, spec in specs.items()}
+        return self._built[task_type]
+
+    def __setitem__(self, task_type: str, models: Dict[str, Any]):
+        self._built[task_type] = models
+        self._overridden.add(task_type)
+
+    def __delitem__(self, task_type: str):
+        if task_type not in self._overridden:
+            raise KeyError(task_type)
+        del self._built[task_type]
+        self._overridden.discard(task_type)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.specs) + [task for task in self._overridden if task not in self.specs])
+
+    def __len__(self) -> int:
+        return len(set(self.specs) | self._overridden)
+
+    def describe(self) -> Dict[str, Dict[str, List]]:
+        """Every task's estimators as [class, parameters], without building unused tasks"""
+        described = {}
+        for task_type in self:
+            if task_type in self._overridden:
+                described[task_type] = {
+                    name: [type(model).__name__, model.get_params()] for name, model in self._built[task_type].items()
+                }
+            else:
+                described[task_type] = {name: [spec.path, spec.params] for name, spec in self.specs[task_type].items()}
+        return described
+
+    def modules(self) -> List[str]:
+        """Modules the configured estimators live in, for pre-warming imports"""
+        return sorted({spec.module for specs in self.specs.values() for spec in specs.values()})
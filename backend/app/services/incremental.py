@@ -0,0 +1,425 @@
+"""Out-of-core training: stream the dataset and fit with partial_fit"""
+
+import time
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.core.telemetry import StageTimer
+from app.models.responses import DatasetInfo, IncrementalSummary, ModelResult, PreprocessingInfo
+from app.services.estimators import EstimatorSpec
+from app.services.model_runner import STATUS_TIMED_OUT, TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.utils.data_loader import DatasetLoader, DatasetSource, detect_format
+from app.utils.incremental_preprocessor import IncrementalPreprocessor
+from app.utils.task_detector import TaskDetector
+
+logger = logging.getLogger(__name__)
+
+# Estimators that support partial_fit, by task
+INCREMENTAL_MODELS: Dict[str, Dict[str, EstimatorSpec]] = {
+    'classification': {
+        'Logistic Regression (SGD)': EstimatorSpec(
+            'sklearn.linear_model:SGDClassifier', {'loss': 'log_loss', 'random_state': 42}
+        ),
+        'Linear SVM (SGD)': EstimatorSpec('sklearn.linear_model:SGDClassifier', {'loss': 'hinge', 'random_state': 42}),
+        'Naive Bayes': EstimatorSpec('sklearn.naive_bayes:GaussianNB'),
+        'Neural Network': EstimatorSpec(
+            'sklearn.neural_network:MLPClassifier', {'hidden_layer_sizes': (100,), 'random_state': 42}
+        ),
+    },
+    'regression': {
+        'Linear Regression (SGD)': EstimatorSpec('sklearn.linear_model:SGDRegressor', {'random_state': 42}),
+        'Neural Network': EstimatorSpec(
+            'sklearn.neural_network:MLPRegressor', {'hidden_layer_sizes': (100,), 'random_state': 42}
+        ),
+    },
+    'clustering': {
+        'K-Means': EstimatorSpec('sklearn.cluster:MiniBatchKMeans', {'n_clusters': 3, 'n_init': 3, 'random_state': 42}),
+    },
+}
+
+@dataclass
+class StreamScan:
+    """What the first pass over the stream learned"""
+    task_type: str
+    target_column: Optional[str]
+    columns: List[str]
+    rows: int
+    classes: Optional[np.ndarray]
+    holdout: pd.DataFrame
+    holdout_ids: np.ndarray  # Stream positions of the held-out rows, sorted
+    preprocessor: IncrementalPreprocessor
+    chunks: int
+    scan_time: float
+
+@dataclass
+class IncrementalRun:
+    """Results of a streamed comparison, in the pieces ComparisonResponse needs"""
+    task_type: str
+    models: List[ModelResult]
+    dataset_info: DatasetInfo
+    preprocessing_info: PreprocessingInfo
+    summary: IncrementalSummary
+
+@dataclass
+class _Reservoir:
+    """
+    Uniform sample of ``size`` rows from a stream (Algorithm R, per chunk)
+
+    Accepted rows are buffered with the slot they took and compacted to
+    the current occupant of each slot now and then, so memory stays
+    proportional to the sample size.
+    """
+    size: int
+    rng: np.random.Generator
+    seen: int = 0
+    _frames: List[pd.DataFrame] = field(default_factory=list)
+    _slots: List[np.ndarray] = field(default_factory=list)
+    _ids: List[np.ndarray] = field(default_factory=list)
+    _buffered: int = 0
+
+    def add(self, chunk: pd.DataFrame):
+        ids = np.arange(self.seen, self.seen + len(chunk))
+        slots = np.where(ids < self.size, ids, self.rng.integers(0, ids + 1))
+        accepted = slots < self.size
+        if accepted.any():
+            self._frames.append(chunk.iloc[np.flatnonzero(accepted)])
+            self._slots.append(slots[accepted])
+            self._ids.append(ids[accepted])
+            self._buffered += int(accepted.sum())
+        self.seen += len(chunk)
+        if self._buffered > 2 * self.size:
+            self._compact()
+
+    def _compact(self):
+        frame = pd.concat(self._frames, ignore_index=True)
+        slots = np.concatenate(self._slots)
+        ids = np.concatenate(self._ids)
+        # The latest row to take a slot occupies it
+        latest = pd.Series(np.arange(len(slots))).groupby(slots).last().to_numpy()
+        self._frames, self._slots, self._ids = [frame.iloc[latest]], [slots[latest]], [ids[latest]]
+        self._buffered = len(latest)
+
+    def sample(self, max_fraction: float) -> Tuple[pd.DataFrame, np.ndarray]:
+        """The sampled rows and their stream positions, at most ``max_fraction`` of the stream"""
+        if not self._frames:
+            return pd.DataFrame(), np.array([], dtype=int)
+        self._compact()
+        frame, ids = self._frames[0], self._ids[0]
+        limit = int(self.seen * max_fraction)
+        if len(ids) > limit:
+            # A uniform subsample of a uniform sample is still uniform
+            keep = np.sort(self.rng.choice(len(ids), size=limit, replace=False))
+            frame, ids = frame.iloc[keep], ids[keep]
+        order = np.argsort(ids)
+        return frame.iloc[order].reset_index(drop=True), ids[order]
+
+class IncrementalTrainer:
+    """
+    Train partial_fit estimators on data streamed in chunks
+
+    The first pass detects the task on the first chunk, fits the
+    :class:`IncrementalPreprocessor` statistics and draws a reservoir
+    sample of ``holdout_rows`` rows (at most ``holdout_fraction`` of the
+    data) whose contribution is then removed from the statistics. Each of
+    ``epochs`` further passes transforms every chunk once and feeds it to
+    all models; the reservoir is the evaluation set. Only one chunk and
+    the reservoir are in memory at a time.
+    """
+
+    def __init__(
+        self,
+        trainer: ModelTrainer,
+        data_loader: DatasetLoader,
+        task_detector: TaskDetector,
+        chunk_rows: int = 50_000,
+        holdout_rows: int = 10_000,
+        holdout_fraction: float = 0.2,
+        epochs: int = 1,
+        k_values: Optional[List[int]] = None,
+        random_state: int = 42
+    ):
+        self.trainer = trainer
+        self.data_loader = data_loader
+        self.task_detector = task_detector
+        self.chunk_rows = chunk_rows
+        self.holdout_rows = holdout_rows
+        self.holdout_fraction = holdout_fraction
+        self.epochs = epochs
+        self.k_values = sorted(set(k_values or [3]))
+        self.random_state = random_state
+
+    def fingerprint(self) -> str:
+        """Stable hash of the streaming settings and estimators, for result cache keys"""
+        config = {
+            task_type: {name: [spec.path, spec.params] for name, spec in specs.items()}
+            for task_type, specs in INCREMENTAL_MODELS.items()
+        }
+        encoded = json.dumps(
+            [config, self.chunk_rows, self.holdout_rows, self.holdout_fraction,
+             self.epochs, self.k_values, self.random_state],
+            sort_keys=True, default=repr
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def candidates(self, task_type: str, n_holdout: int) -> Dict[str, Any]:
+        """Unfitted estimators by name; K-Means is swept over k_values"""
+        candidates = {}
+        for name, spec in INCREMENTAL_MODELS[task_type].items():
+            if 'n_clusters' in spec.params:
+                for k in (k for k in self.k_values if k < n_holdout):
+                    candidates[f"{name} (k={k})"] = spec.build(n_clusters=k)
+            else:
+                candidates[name] = spec.build()
+        return candidates
+
+    def scan(self, source: DatasetSource) -> StreamScan:
+        """First pass: task detection, preprocessing statistics and the holdout sample (blocking)"""
+        start_time = time.time()
+        rng = np.random.default_rng(self.random_state)
+        reservoir = _Reservoir(size=self.holdout_rows, rng=rng)
+        preprocessor = IncrementalPreprocessor()
+        task_type = target_column = columns = None
+        labels = set()
+        chunks = 0
+
+        for chunk in self.data_loader.iter_chunks(source, self.chunk_rows):
+            if task_type is None:
+                task_type, target_column = self.task_detector.detect_task(chunk)
+                columns = list(chunk.columns)
+                preprocessor.begin(chunk.drop(columns=[target_column]) if target_column else chunk)
+            if target_column is not None:
+                # Rows without a target can be neither trained on nor scored
+                chunk = chunk[chunk[target_column].notna()]
+                if task_type == 'classification':
+                    labels.update(chunk[target_column].unique().tolist())
+            preprocessor.partial_fit(chunk.drop(columns=[target_column]) if target_column else chunk)
+            reservoir.add(chunk)
+            chunks += 1
+
+        if task_type is None:
+            raise ValueError("Dataset contains no rows")
+        holdout, holdout_ids = reservoir.sample(self.holdout_fraction)
+        if len(holdout) < 2:
+            raise ValueError("Dataset is too small for a held-out evaluation sample")
+        features = holdout.drop(columns=[target_column]) if target_column else holdout
+        preprocessor.remove(features)
+        preprocessor.finalize(scale=task_type != 'clustering')
+
+        logger.info(
+            f"Scanned {reservoir.seen} rows in {chunks} chunks; "
+            f"{len(holdout)} held out for evaluation ({task_type})"
+        )
+        return StreamScan(
+            task_type=task_type,
+            target_column=target_column,
+            columns=columns,
+            rows=reservoir.seen,
+            classes=np.array(sorted(labels, key=str)) if task_type == 'classification' else None,
+            holdout=holdout,
+            holdout_ids=holdout_ids,
+            preprocessor=preprocessor,
+            chunks=chunks,
+            scan_time=time.time() - start_time
+        )
+
+    async def compare(
+        self,
+        source: DatasetSource,
+        run_blocking,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        timer: Optional[StageTimer] = None
+    ) -> IncrementalRun:
+        """
+        Stream the dataset, train every incremental model and score it on the holdout
+
+        ``run_blocking`` runs a blocking callable off the event loop (e.g.
+        ``BoundedExecutor.run``). Models whose cumulative fit time exceeds
+        the model timeout, or all models once the request deadline passes,
+        are returned with status ``timed_out``; models that raise are
+        logged and dropped.
+        """
+        limits = limits or TrainingLimits()
+        timer = timer or StageTimer()
+        with timer.stage('stream_scan'):
+            scan = await run_blocking(self.scan, source)
+        target = scan.target_column
+        y_holdout = scan.holdout[target].to_numpy() if target else None
+        with timer.stage('preprocess_transform'):
+            X_holdout = await run_blocking(
+                scan.preprocessor.transform, scan.holdout.drop(columns=[target]) if target else scan.holdout
+            )
+
+        models = self.candidates(scan.task_type, len(scan.holdout))
+        fit_times = {name: 0.0 for name in models}
+        stopped: Dict[str, str] = {}  # Model name -> status for models no longer trained
+        train_start = time.time()
+
+        with timer.stage('train'):
+            for epoch in range(self.epochs):
+                if not await self._train_epoch(source, run_blocking, scan, models, epoch, fit_times, stopped, limits):
+                    stopped.update({name: STATUS_TIMED_OUT for name in models if name not in stopped})
+                    break
+        training_time = time.time() - train_start
+
+        results = []
+        for name, model in models.items():
+            if stopped.get(name) == 'failed':
+                continue
+            if name in stopped:
+                result = ModelResult(
+                    name=name, metrics={}, training_time=fit_times[name], type=scan.task_type,
+                    status=stopped[name], fit_time=fit_times[name]
+                )
+            else:
+                try:
+                    result = await run_blocking(self._evaluate, name, model, scan, X_holdout, y_holdout, fit_times[name])
+                except Exception as e:
+                    logger.error(f"Error evaluating {name}: {str(e)}")
+                    continue
+            results.append(result)
+            if on_result is not None:
+                await on_result(result)
+
+        dataset_info = DatasetInfo(
+            rows=scan.rows,
+            columns=len(scan.columns),
+            features=[col for col in scan.columns if col != target],
+            target=target,
+            memory_usage_mb=None,  # Never materialised as a whole
+            file_format=detect_format(source),
+            reader="streamed in chunks"
+        )
+        summary = IncrementalSummary(
+            chunk_rows=self.chunk_rows,
+            chunks=scan.chunks,
+            epochs=self.epochs,
+            training_rows=scan.rows - len(scan.holdout),
+            holdout_rows=len(scan.holdout),
+            scan_time=scan.scan_time,
+            training_time=training_time
+        )
+        return IncrementalRun(
+            task_type=scan.task_type,
+            models=results,
+            dataset_info=dataset_info,
+            preprocessing_info=scan.preprocessor.info(),
+            summary=summary
+        )
+
+    async def _train_epoch(
+        self,
+        source: DatasetSource,
+        run_blocking,
+        scan: StreamScan,
+        models: Dict[str, Any],
+        epoch: int,
+        fit_times: Dict[str, float],
+        stopped: Dict[str, str],
+        limits: TrainingLimits
+    ) -> bool:
+        """One pass over the stream; False if the request deadline cut it short"""
+        chunks = self.data_loader.iter_chunks(source, self.chunk_rows)
+        offset = 0
+        try:
+            while True:
+                chunk = await run_blocking(next, chunks, None)
+                if chunk is None:
+                    return True
+                if limits.deadline is not None and time.monotonic() > limits.deadline:
+                    return False
+                offset = await run_blocking(
+                    self._train_chunk, scan, models, chunk, offset, epoch, fit_times, stopped, limits
+                )
+        finally:
+            chunks.close()
+
+    def _train_chunk(
+        self,
+        scan: StreamScan,
+        models: Dict[str, Any],
+        chunk: pd.DataFrame,
+        offset: int,
+        epoch: int,
+        fit_times: Dict[str, float],
+        stopped: Dict[str, str],
+        limits: TrainingLimits
+    ) -> int:
+        """Feed one chunk to every model still training (blocking); returns the next stream offset"""
+        target = scan.target_column
+        if target is not None:
+            chunk = chunk[chunk[target].notna()]
+        ids = np.arange(offset, offset + len(chunk))
+        keep = ~np.isin(ids, scan.holdout_ids, assume_unique=True)
+        # Shuffle within the chunk; SGD converges poorly on sorted data
+        order = np.random.default_rng([self.random_state, epoch, offset]).permutation(np.flatnonzero(keep))
+        chunk = chunk.iloc[order]
+        if chunk.empty:
+            return offset + len(ids)
+
+        X = scan.preprocessor.transform(chunk.drop(columns=[target]) if target else chunk)
+        y = chunk[target].to_numpy() if target else None
+
+        for name, model in models.items():
+            if name in stopped:
+                continue
+            start_time = time.time()
+            try:
+                if scan.task_type == 'classification':
+                    model.partial_fit(X, y, classes=scan.classes)
+                elif scan.task_type == 'regression':
+                    model.partial_fit(X, y.astype(float))
+                elif len(X) >= model.n_clusters or hasattr(model, 'cluster_centers_'):
+                    model.partial_fit(X)
+            except Exception as e:
+                logger.error(f"Error training {name}: {str(e)}")
+                stopped[name] = 'failed'
+                continue
+            fit_times[name] += time.time() - start_time
+            if limits.model_timeout is not None and fit_times[name] > limits.model_timeout:
+                stopped[name] = STATUS_TIMED_OUT
+        return offset + len(ids)
+
+    def _evaluate(
+        self,
+        name: str,
+        model,
+        scan: StreamScan,
+        X_holdout: np.ndarray,
+        y_holdout: Optional[np.ndarray],
+        fit_time: float
+    ) -> ModelResult:
+        """Score a trained model on the held-out reservoir (blocking)"""
+        start_time = time.time()
+        per_class = None
+        if scan.task_type == 'classification':
+            y_pred, y_proba = self.trainer.predict_with_proba(model, X_holdout)
+            predict_time = time.time() - start_time
+            metrics, per_class = self.trainer.metrics_engine.classification(
+                y_holdout, y_pred, y_proba, getattr(model, 'classes_', None)
+            )
+        elif scan.task_type == 'regression':
+            y_pred = model.predict(X_holdout)
+            predict_time = time.time() - start_time
+            metrics = self.trainer.metrics_engine.regression(y_holdout.astype(float), y_pred)
+        else:
+            labels = model.predict(X_holdout)
+            predict_time = time.time() - start_time
+            metrics = self.trainer.calculate_clustering_metrics(X_holdout, labels)
+        score_time = time.time() - start_time
+        return ModelResult(
+            name=name,
+            metrics=metrics,
+            training_time=fit_time + score_time,
+            type=scan.task_type,
+            fit_time=fit_time,
+            score_time=score_time,
+            predict_time=predict_time,
+            per_class=per_class
+        )
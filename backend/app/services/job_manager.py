@@ -0,0 +1,93 @@
+"""Background execution of comparison jobs"""
+
+import asyncio
+import logging
+import uuid
+from typing import Optional, Set
+
+from app.core.telemetry import StageTimer
+from app.models.requests import ComparisonOptions
+from app.models.responses import JobResponse, ModelResult
+from app.services.job_store import JobStore
+from app.services.ml_service import MLService
+from app.utils.data_loader import DatasetSource, SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+class JobManager:
+    """Run comparisons in the background and record progress in a JobStore"""
+
+    def __init__(self, ml_service: MLService, store: JobStore):
+        self.ml_service = ml_service
+        self.store = store
+        # Strong references so running jobs are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        file_content: DatasetSource,
+        filename: Optional[str] = None,
+        options: Optional[ComparisonOptions] = None,
+        timer: Optional[StageTimer] = None
+    ) -> JobResponse:
+        """
+        Queue a comparison and return immediately
+
+        Args:
+            file_content: CSV content as bytes, or a spooled upload which the
+                manager removes once the job has finished
+            filename: Original upload name, kept for display
+            options: Per-request comparison options
+            timer: Stage timer already holding earlier stages, e.g. the upload read
+
+        Returns:
+            The newly created job
+
+        Raises:
+            PoolSaturatedError: If the worker pool and its queue are full
+        """
+        # Reserve the pipeline slot now so overload is reported to the caller
+        self.ml_service.executor.acquire()
+        try:
+            job = await self.store.create(uuid.uuid4().hex, filename)
+        except Exception:
+            self.ml_service.executor.release()
+            raise
+
+        task = asyncio.create_task(self._run(job.job_id, file_content, options, timer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Queued job {job.job_id} for {filename}")
+        return job
+
+    async def _run(
+        self,
+        job_id: str,
+        file_content: DatasetSource,
+        options: Optional[ComparisonOptions],
+        timer: Optional[StageTimer] = None
+    ):
+        """Execute one job, holding the slot reserved by submit"""
+        async def record(result: ModelResult):
+            await self.store.add_result(job_id, result)
+
+        try:
+            await self.store.set_running(job_id)
+            response = await self.ml_service.run_comparison(
+                file_content, on_result=record, options=options, timer=timer
+            )
+            await self.store.complete(job_id, response)
+            logger.info(f"Job {job_id} completed")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            await self.store.fail(job_id, f"Error processing dataset: {str(e)}")
+        finally:
+            self.ml_service.executor.release()
+            if isinstance(file_content, SpooledUpload):
+                file_content.cleanup()
+
+    async def shutdown(self):
+        """Cancel jobs that are still running"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,158 @@
+"""Job storage backends for asynchronous comparisons"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+from pydantic import BaseModel
+
+from app.models.responses import ComparisonResponse, JobResponse, JobStatus, ModelResult
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+class JobEvent(NamedTuple):
+    """Progress event published for a job"""
+    event: str
+    payload: BaseModel
+
+class JobStore(ABC):
+    """
+    Interface for job state storage and progress fan-out
+
+    Implementations must make every published event visible to subscribers
+    that are already listening, and :meth:`subscribe` must replay results
+    recorded before the subscription so late listeners do not miss models.
+    """
+
+    @abstractmethod
+    async def create(self, job_id: str, filename: Optional[str] = None) -> JobResponse:
+        """Register a new queued job"""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[JobResponse]:
+        """Return a snapshot of the job, or None if it is unknown"""
+
+    @abstractmethod
+    async def set_running(self, job_id: str):
+        """Mark the job as started"""
+
+    @abstractmethod
+    async def add_result(self, job_id: str, result: ModelResult):
+        """Record one finished model and publish it"""
+
+    @abstractmethod
+    async def complete(self, job_id: str, response: ComparisonResponse):
+        """Record the final comparison and publish completion"""
+
+    @abstractmethod
+    async def fail(self, job_id: str, error: str):
+        """Record a failure and publish it"""
+
+    @abstractmethod
+    def subscribe(self, job_id: str) -> AsyncIterator[JobEvent]:
+        """Yield the job's events until it reaches a terminal state"""
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store, suitable for a single API process and tests"""
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, JobResponse]" = OrderedDict()
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    async def create(self, job_id: str, filename: Optional[str] = None) -> JobResponse:
+        now = datetime.now(timezone.utc)
+        job = JobResponse(
+            job_id=job_id,
+            status=JobStatus.QUEUED,
+            filename=filename,
+            created_at=now,
+            updated_at=now
+        )
+        self._jobs[job_id] = job
+        self._evict()
+        return job.model_copy(deep=True)
+
+    async def get(self, job_id: str) -> Optional[JobResponse]:
+        job = self._jobs.get(job_id)
+        return job.model_copy(deep=True) if job is not None else None
+
+    async def set_running(self, job_id: str):
+        job = self._touch(job_id)
+        job.status = JobStatus.RUNNING
+        self._publish(job_id, JobEvent("status", job.model_copy()))
+
+    async def add_result(self, job_id: str, result: ModelResult):
+        job = self._touch(job_id)
+        job.models.append(result)
+        self._publish(job_id, JobEvent("result", result))
+
+    async def complete(self, job_id: str, response: ComparisonResponse):
+        job = self._touch(job_id)
+        job.status = JobStatus.COMPLETED
+        job.models = list(response.models)
+        job.result = response
+        self._publish(job_id, JobEvent("completed", response))
+
+    async def fail(self, job_id: str, error: str):
+        job = self._touch(job_id)
+        job.status = JobStatus.FAILED
+        job.error = error
+        self._publish(job_id, JobEvent("failed", job.model_copy()))
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[JobEvent]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        # Register before replaying so nothing published in between is lost
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            for result in list(job.models):
+                yield JobEvent("result", result)
+            if job.status == JobStatus.COMPLETED:
+                yield JobEvent("completed", job.result)
+                return
+            if job.status == JobStatus.FAILED:
+                yield JobEvent("failed", job.model_copy())
+                return
+
+            while True:
+                event = await queue.get()
+                yield event
+                if event.event in ("completed", "failed"):
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def _touch(self, job_id: str) -> JobResponse:
+        """Return the stored job and bump its update time"""
+        job = self._jobs[job_id]
+        job.updated_at = datetime.now(timezone.utc)
+        return job
+
+    def _publish(self, job_id: str, event: JobEvent):
+        """Push an event to every live subscriber of the job"""
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(event)
+
+    def _evict(self):
+        """Drop the oldest finished jobs once more than max_jobs are stored"""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in TERMINAL_STATUSES
+        ][:excess]:
+            logger.info(f"Evicting finished job {job_id}")
+            del self._jobs[job_id]
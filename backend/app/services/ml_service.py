@@ -1,88 +1,755 @@
 """Machine Learning service for model comparison"""
 
-import io
 import time
 import asyncio
 import logging
-from typing import Dict, List, Tuple, Any
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Any, Optional
 import pandas as pd
 import numpy as np
+from sklearn.compose import ColumnTransformer
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.impute import SimpleImputer
 
-from app.models.responses import ComparisonResponse, ModelResult, DatasetInfo, PreprocessingInfo
-from app.services.model_trainer import ModelTrainer
-from app.utils.data_preprocessor import DataPreprocessor
+from app import __version__
+from app.core.concurrency import BoundedExecutor
+from app.core.config import get_settings
+from app.core.startup import StartupReport
+from app.core.telemetry import ServiceTelemetry, StageTimer
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.models.responses import (
+    ComparisonResponse, DatasetInfo, DatasetProfile, ModelResult, PredictionResponse, PreprocessingInfo,
+    StageTiming, StoredDatasetResponse
+)
+from app.services.clustering import ClusteringEngine
+from app.services.cross_validation import CrossValidator, CVPlan
+from app.services.dataset_store import DatasetNotFoundError, DatasetStore, StoredUpload
+from app.services.distributed import DistributedTrainer
+from app.services.incremental import INCREMENTAL_MODELS, IncrementalTrainer
+from app.services.model_registry import ModelNotFoundError, ModelRegistry
+from app.services.model_runner import STATUS_OOM, STATUS_TIMED_OUT, TrainingLimits, preload, start_fork_server
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.services.scheduler import DatasetShape
+from app.services.task_broker import SQLiteTaskBroker, TaskBroker
+from app.services.racing import SuccessiveHalvingRacer
+from app.services.tuning import HyperparameterTuner
+from app.services.result_cache import ResultCache
+from app.utils.data_loader import (
+    CSVLoader, DatasetLoader, DatasetSource, SpooledUpload, content_digest, detect_format
+)
+from app.utils.data_preprocessor import DataPreprocessor, FeatureMatrix
+from app.utils.memory import PeakRSSMonitor
+from app.utils.profiler import ColumnProfiler
 from app.utils.task_detector import TaskDetector
 
 logger = logging.getLogger(__name__)
 
+# Imported lazily by the pipeline; pre-warming loads them up front
+PREWARM_MODULES = ['pyarrow', 'pyarrow.ipc', 'pyarrow.parquet']
+
+@dataclass
+class PreparedDataset:
+    """Parsed, preprocessed and split dataset ready for training"""
+    task_type: str
+    target_column: Optional[str]
+    X_train: FeatureMatrix
+    X_test: FeatureMatrix
+    y_train: Optional[pd.Series]
+    y_test: Optional[pd.Series]
+    dataset_info: DatasetInfo
+    preprocessing_info: PreprocessingInfo
+    preprocessor: Optional[ColumnTransformer] = None  # Fitted on X_train only
+    target_classes: Optional[np.ndarray] = None  # Original labels of an encoded target
+    cv_plan: Optional[CVPlan] = None  # Set instead of a single split in cross-validation mode
+    tuning_plan: Optional[CVPlan] = None  # Folds of the training rows for the hyperparameter search
+    dataset_id: Optional[str] = None  # Set when the split was loaded from the dataset store as is
+
 class MLService:
     """Main service for ML model comparison"""
     
-    def __init__(self):
-        self.data_preprocessor = DataPreprocessor()
+    def __init__(
+        self,
+        executor: Optional[BoundedExecutor] = None,
+        result_cache: Optional[ResultCache] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        dataset_store: Optional[DatasetStore] = None,
+        task_broker: Optional[TaskBroker] = None
+    ):
+        settings = get_settings()
+        # Bounded pool that keeps CPU-bound pipeline work off the event loop
+        self.executor = executor or BoundedExecutor(
+            max_workers=settings.PIPELINE_WORKERS,
+            max_queue=settings.PIPELINE_QUEUE_DEPTH
+        )
+        self.data_loader = DatasetLoader(CSVLoader(
+            memory_budget=settings.INGEST_MEMORY_BUDGET,
+            sample_rows=settings.INGEST_SAMPLE_ROWS,
+            category_max_ratio=settings.INGEST_CATEGORY_MAX_RATIO,
+            downcast_floats=settings.INGEST_DOWNCAST_FLOATS
+        ))
+        self.data_preprocessor = DataPreprocessor(
+            sparse_threshold=settings.PREPROCESS_SPARSE_THRESHOLD, precision=settings.FEATURE_PRECISION
+        )
         self.task_detector = TaskDetector()
-        self.model_trainer = ModelTrainer()
+        self.profiler = ColumnProfiler(exact_distinct_rows=settings.PROFILE_EXACT_DISTINCT_ROWS)
+        self.model_trainer = ModelTrainer(executor=self.executor)
+        self.racer = SuccessiveHalvingRacer(
+            self.model_trainer, min_rows=settings.RACING_MIN_ROWS, random_state=settings.RANDOM_STATE
+        )
+        self.tuner = HyperparameterTuner(self.model_trainer, self.racer, random_state=settings.RANDOM_STATE)
+        self.clustering_engine = ClusteringEngine(
+            self.model_trainer,
+            k_values=settings.CLUSTERING_K_VALUES,
+            minibatch_rows=settings.CLUSTERING_MINIBATCH_ROWS,
+            sample_rows=settings.CLUSTERING_SAMPLE_ROWS,
+            random_state=settings.RANDOM_STATE
+        )
+        self.cross_validator = CrossValidator(
+            self.model_trainer, self.data_preprocessor, random_state=settings.RANDOM_STATE
+        )
+        self.incremental_trainer = IncrementalTrainer(
+            self.model_trainer,
+            self.data_loader,
+            self.task_detector,
+            chunk_rows=settings.INCREMENTAL_CHUNK_ROWS,
+            holdout_rows=settings.INCREMENTAL_HOLDOUT_ROWS,
+            epochs=settings.INCREMENTAL_EPOCHS,
+            k_values=settings.CLUSTERING_K_VALUES,
+            random_state=settings.RANDOM_STATE
+        )
+        
+        if result_cache is None and settings.RESULT_CACHE_ENABLED:
+            result_cache = ResultCache(
+                max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+                disk_dir=settings.RESULT_CACHE_DIR,
+                max_disk_bytes=settings.RESULT_CACHE_MAX_DISK_BYTES
+            )
+        self.result_cache = result_cache
+        
+        if model_registry is None and settings.MODEL_REGISTRY_DIR:
+            model_registry = ModelRegistry(
+                settings.MODEL_REGISTRY_DIR,
+                self.data_loader,
+                self.data_preprocessor,
+                max_entries=settings.MODEL_REGISTRY_MAX_ENTRIES,
+                max_loaded=settings.MODEL_REGISTRY_MAX_LOADED
+            )
+        self.model_registry = model_registry
+        
+        if dataset_store is None and settings.DATASET_STORE_DIR:
+            dataset_store = DatasetStore(
+                settings.DATASET_STORE_DIR,
+                max_bytes=settings.DATASET_STORE_MAX_BYTES,
+                ttl_seconds=settings.DATASET_STORE_TTL
+            )
+        self.dataset_store = dataset_store
+        
+        if task_broker is None and settings.TASK_QUEUE_PATH:
+            task_broker = SQLiteTaskBroker(
+                settings.TASK_QUEUE_PATH,
+                lease_seconds=settings.TASK_LEASE_SECONDS,
+                max_attempts=settings.TASK_MAX_ATTEMPTS,
+                shared=settings.TASK_QUEUE_SHARED
+            )
+        # Standard comparisons of stored datasets train on `worker.py` processes when set
+        self.distributed_trainer = None
+        if task_broker is not None:
+            self.distributed_trainer = DistributedTrainer(
+                task_broker, self.model_trainer, poll_interval=settings.TASK_POLL_INTERVAL
+            )
+        
+        self.telemetry = ServiceTelemetry(
+            in_flight=lambda: self.executor.in_flight,
+            queue_depth=lambda: self.executor.queue_depth
+        )
+        if self.result_cache is not None:
+            self.telemetry.registry.counter(
+                "mlc_result_cache_hits_total", "Comparisons served from the result cache",
+                function=lambda: self.result_cache.memory_hits + self.result_cache.disk_hits
+            )
+            self.telemetry.registry.counter(
+                "mlc_result_cache_disk_hits_total", "Result cache hits served from the disk tier",
+                function=lambda: self.result_cache.disk_hits
+            )
+            self.telemetry.registry.counter(
+                "mlc_result_cache_misses_total", "Result cache lookups that missed",
+                function=lambda: self.result_cache.misses
+            )
+            self.telemetry.registry.gauge(
+                "mlc_result_cache_memory_entries", "Comparisons held in the result cache's memory tier",
+                function=lambda: self.result_cache.stats().memory_entries
+            )
+            self.telemetry.registry.gauge(
+                "mlc_result_cache_disk_bytes", "Size of the result cache's disk tier",
+                function=lambda: self.result_cache.stats().disk_bytes
+            )
+        self._config_fingerprint = (
+            f"{self.model_trainer.config_fingerprint()}:{self.clustering_engine.fingerprint()}"
+            f":{self.tuner.fingerprint()}:{self.incremental_trainer.fingerprint()}"
+            f":{self.data_preprocessor.fingerprint()}"
+        )
     
-    async def compare_models(self, file_content: bytes) -> ComparisonResponse:
+    async def compare_models(
+        self,
+        file_content: DatasetSource,
+        on_result: Optional[ResultCallback] = None,
+        options: Optional[ComparisonOptions] = None,
+        timer: Optional[StageTimer] = None
+    ) -> ComparisonResponse:
         """
         Compare multiple ML models on the provided dataset
         
         Args:
-            file_content: CSV file content as bytes
+            file_content: CSV, Parquet or Arrow IPC content as bytes, or an upload spooled to disk
+            on_result: Optional callback awaited with each model's result as it finishes
+            options: Per-request comparison options (standard mode by default)
+            timer: Stage timer already holding earlier stages, e.g. the upload read
             
         Returns:
             ComparisonResponse with all model results
+            
+        Raises:
+            PoolSaturatedError: If the worker pool and its queue are full
         """
+        # Cache hits are served without taking a worker slot
+        cache_key, cached = await self.lookup_cached(file_content, options)
+        if cached is not None:
+            self.telemetry.comparisons.inc(status="cached")
+            await self._replay(cached, on_result)
+            return cached
+        
+        async with self.executor.admit():
+            return await self.run_comparison(
+                file_content, on_result, options, cache_key=cache_key, timer=timer
+            )
+    
+    async def run_comparison(
+        self,
+        file_content: DatasetSource,
+        on_result: Optional[ResultCallback] = None,
+        options: Optional[ComparisonOptions] = None,
+        cache_key: Optional[str] = None,
+        timer: Optional[StageTimer] = None
+    ) -> ComparisonResponse:
+        """
+        Run the comparison pipeline without admission control
+        
+        Callers are responsible for holding a slot on ``self.executor``.
+        Pass ``cache_key`` when the result cache was already consulted, and
+        ``timer`` to include stages timed before the call (e.g. the upload).
+        """
+        options = options or ComparisonOptions()
+        if self.result_cache is not None and cache_key is None:
+            cache_key, cached = await self.lookup_cached(file_content, options)
+            if cached is not None:
+                self.telemetry.comparisons.inc(status="cached")
+                await self._replay(cached, on_result)
+                return cached
+        
+        timer = timer or self.telemetry.timer()
+        comparison_id = None
+        self.telemetry.active.inc()
         try:
-            # Load data
-            df = pd.read_csv(io.BytesIO(file_content))
-            logger.info(f"Loaded dataset with shape: {df.shape}")
+            limits = self.resolve_limits(options)
+            with PeakRSSMonitor() as memory_monitor:
+                timer.monitor = memory_monitor
+                if options.mode == ComparisonMode.INCREMENTAL:
+                    # Streamed end to end; its preprocessing is not a ColumnTransformer
+                    # the registry could reload, so these models are not registered
+                    run = await self.incremental_trainer.compare(
+                        file_content, self.executor.run, on_result=on_result, limits=limits, timer=timer
+                    )
+                    task_type = run.task_type
+                    dataset_info, preprocessing_info = run.dataset_info, run.preprocessing_info
+                    model_results, summaries = run.models, {'incremental': run.summary}
+                else:
+                    prepared = await self.executor.run(self.prepare_dataset, file_content, options, timer)
+                    task_type = prepared.task_type
+                    dataset_info, preprocessing_info = prepared.dataset_info, prepared.preprocessing_info
+                    
+                    # Fitted models are saved by the workers; CV fold models are not kept
+                    artifact_dir = None
+                    if self.model_registry is not None and prepared.cv_plan is None:
+                        comparison_id = self.model_registry.create()
+                        artifact_dir = self.model_registry.entry_dir(comparison_id)
+                    
+                    with timer.stage('train'):
+                        model_results, summaries = await self._train(
+                            prepared, options, on_result, limits, artifact_dir
+                        )
+                self.record_model_stages(timer, model_results)
+                
+                if comparison_id is not None:
+                    with timer.stage('register'):
+                        comparison_id = await self.executor.run(
+                            self.model_registry.register,
+                            comparison_id,
+                            prepared.task_type,
+                            prepared.target_column,
+                            prepared.preprocessor,
+                            prepared.target_classes,
+                            model_results
+                        )
             
-            # Detect task type and target column
-            task_type, target_column = self.task_detector.detect_task(df)
-            logger.info(f"Detected task type: {task_type}")
-
-            # Log the detected task type and target column
-            logger.info(f"Detected task_type: {task_type}, target_column: {target_column}")
-            
-            # Preprocess data
-            X, y, preprocessing_info = await self.data_preprocessor.preprocess(
-                df, target_column, task_type
+            response = self.build_response(
+                comparison_id, task_type, model_results, dataset_info, preprocessing_info,
+                memory_monitor, summaries, timer
             )
+            self.cache_response(cache_key, response)
+            
+            self.telemetry.comparisons.inc(status="completed")
+            return response
             
-            # Split data
-            if task_type != 'clustering':
+        except Exception as e:
+            logger.error(f"Error in compare_models: {str(e)}")
+            self.telemetry.comparisons.inc(status="failed")
+            if comparison_id is not None:
+                self.model_registry.discard(comparison_id)
+            raise
+        finally:
+            self.telemetry.active.dec()
+    
+    def build_response(
+        self,
+        comparison_id: Optional[str],
+        task_type: str,
+        model_results: List[ModelResult],
+        dataset_info: DatasetInfo,
+        preprocessing_info: PreprocessingInfo,
+        memory_monitor: PeakRSSMonitor,
+        summaries: Dict[str, Any],
+        timer: StageTimer
+    ) -> ComparisonResponse:
+        """Assemble a comparison response with the stage timings recorded so far"""
+        return ComparisonResponse(
+            comparison_id=comparison_id,
+            task_type=task_type,
+            models=model_results,
+            dataset_info=dataset_info,
+            preprocessing_info=preprocessing_info,
+            peak_rss_mb=round(memory_monitor.peak_mb, 1),
+            **summaries,
+            timings={
+                name: StageTiming(
+                    seconds=round(seconds, 6),
+                    peak_rss_mb=round(peak / (1024 * 1024), 1) if peak is not None else None
+                )
+                for name, (seconds, peak) in timer.stages.items()
+            }
+        )
+    
+    def cache_response(self, cache_key: Optional[str], response: ComparisonResponse):
+        """Keep a response in the result cache, unless a limit cut any of its models short"""
+        # Results cut short by a limit depend on machine load; don't reuse them
+        limited = any(model.status in (STATUS_TIMED_OUT, STATUS_OOM) for model in response.models)
+        if cache_key is not None and not limited:
+            self.result_cache.put(cache_key, response)
+    
+    async def _train(
+        self,
+        prepared: PreparedDataset,
+        options: ComparisonOptions,
+        on_result: Optional[ResultCallback],
+        limits: TrainingLimits,
+        artifact_dir: Optional[str]
+    ) -> Tuple[List[ModelResult], Dict[str, Any]]:
+        """
+        Train with the strategy the dataset and options call for
+        
+        Returns:
+            Tuple of (model results, the strategy's summary keyed by its
+            ComparisonResponse field, e.g. {'racing': RacingSummary})
+        """
+        if prepared.cv_plan is not None:
+            model_results = await self.cross_validator.evaluate(
+                prepared.cv_plan,
+                prepared.task_type,
+                on_result=on_result,
+                limits=limits
+            )
+            return model_results, {'cross_validation': prepared.cv_plan.summary()}
+        if prepared.task_type == 'clustering':
+            model_results, clustering = await self.clustering_engine.compare(
+                prepared.X_train,
+                on_result=on_result,
+                limits=limits,
+                artifact_dir=artifact_dir
+            )
+            return model_results, {'clustering': clustering}
+        if options.mode == ComparisonMode.RACING:
+            model_results, racing = await self.racer.race(
+                prepared.X_train, prepared.X_test,
+                prepared.y_train, prepared.y_test,
+                prepared.task_type,
+                options,
+                on_result=on_result,
+                limits=limits,
+                artifact_dir=artifact_dir
+            )
+            return model_results, {'racing': racing}
+        if prepared.tuning_plan is not None:
+            budget = options.tune_budget if options.tune_budget is not None else get_settings().TUNING_BUDGET
+            model_results, tuning = await self.tuner.tune(
+                prepared.tuning_plan,
+                prepared.X_train, prepared.X_test,
+                prepared.y_train, prepared.y_test,
+                prepared.task_type,
+                options,
+                budget=budget,
+                on_result=on_result,
+                limits=limits,
+                artifact_dir=artifact_dir
+            )
+            return model_results, {'tuning': tuning}
+        schedule = self.model_trainer.schedule(
+            prepared.X_train, prepared.y_train, prepared.task_type, latency_target=options.latency_target
+        )
+        if schedule.skipped:
+            logger.info(f"Skipping {schedule.skipped}: predicted to exceed {options.latency_target}s")
+        if self.distributed_trainer is not None and prepared.dataset_id is not None:
+            # Workers map the stored split by its id
+            model_results = await self.distributed_trainer.train_all_models(
+                prepared.dataset_id,
+                DatasetShape.of(prepared.X_train, prepared.y_train, prepared.task_type),
+                prepared.task_type,
+                schedule,
+                lambda prototypes: self.model_trainer.train_all_models(
+                    prepared.X_train, prepared.X_test,
+                    prepared.y_train, prepared.y_test,
+                    prepared.task_type,
+                    on_result=on_result,
+                    limits=limits,
+                    candidates=prototypes,
+                    artifact_dir=artifact_dir
+                ),
+                on_result=on_result,
+                limits=limits,
+                artifact_dir=artifact_dir
+            )
+            return model_results, {'schedule': schedule.summary(model_results)}
+        model_results = await self.model_trainer.train_all_models(
+            prepared.X_train, prepared.X_test,
+            prepared.y_train, prepared.y_test,
+            prepared.task_type,
+            on_result=on_result,
+            limits=limits,
+            artifact_dir=artifact_dir,
+            schedule=schedule
+        )
+        return model_results, {'schedule': schedule.summary(model_results)}
+    
+    def record_model_stages(self, timer: StageTimer, model_results: List[ModelResult]):
+        """Report per-model fit/predict/scoring times and add their totals to the timer"""
+        totals = {'fit': 0.0, 'predict': 0.0, 'scoring': 0.0}
+        for result in model_results:
+            self.telemetry.model_results.inc(status=result.status)
+            if result.fit_time is None:
+                continue
+            # Label by configured model: k-sweep and tuning suffixes would make the label set unbounded
+            model = result.name.split(' (')[0]
+            configured = self.model_trainer.models_config.get(result.type, {})
+            if model not in configured and model not in INCREMENTAL_MODELS.get(result.type, {}):
+                model = 'other'
+            stages = {'fit': result.fit_time}
+            if result.predict_time is not None and result.score_time is not None:
+                stages['predict'] = result.predict_time
+                stages['scoring'] = max(0.0, result.score_time - result.predict_time)
+            for stage, seconds in stages.items():
+                self.telemetry.model_seconds.observe(seconds, model=model, stage=stage)
+                totals[stage] += seconds
+        for stage, seconds in totals.items():
+            timer.record(stage, seconds)
+    
+    async def predict(
+        self,
+        comparison_id: str,
+        source: DatasetSource,
+        model_name: Optional[str] = None
+    ) -> PredictionResponse:
+        """
+        Score rows with a model saved by an earlier comparison
+        
+        Runs on the event loop's default executor rather than the bounded
+        pipeline pool, so predictions are not queued behind comparisons.
+        
+        Raises:
+            ModelNotFoundError: If the registry is disabled or the model is unknown
+        """
+        if self.model_registry is None:
+            raise ModelNotFoundError("Model registry is disabled (set MODEL_REGISTRY_DIR)")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.model_registry.predict, comparison_id, source, model_name
+        )
+    
+    async def profile(self, source: DatasetSource, sample_rows: Optional[int] = None) -> DatasetProfile:
+        """
+        Profile the columns of a dataset and detect its task
+        
+        Only the leading ``sample_rows`` rows (PROFILE_SAMPLE_ROWS by
+        default; 0 for all) are parsed; the remaining rows are counted but
+        not read. Runs on the default executor, like :meth:`predict`.
+        """
+        if sample_rows is None:
+            sample_rows = get_settings().PROFILE_SAMPLE_ROWS
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._profile, source, sample_rows)
+    
+    def _profile(self, source: DatasetSource, sample_rows: int) -> DatasetProfile:
+        """Blocking body of :meth:`profile`"""
+        start_time = time.time()
+        file_format = detect_format(source)
+        if sample_rows:
+            df = self.data_loader.head(source, sample_rows)
+            rows = self.data_loader.count_rows(source) if len(df) == sample_rows else len(df)
+        else:
+            df = self.data_loader.load(source).df
+            rows = len(df)
+        if df.empty:
+            raise ValueError("Dataset has no rows")
+        
+        profile = self.profiler.profile(df, rows=rows)
+        profile.task_type, profile.target = self.task_detector.detect_task(df, profile)
+        profile.file_format = file_format
+        profile.profile_time = time.time() - start_time
+        return profile
+    
+    async def store_dataset(
+        self,
+        upload: SpooledUpload,
+        filename: Optional[str] = None,
+        timer: Optional[StageTimer] = None
+    ) -> StoredDatasetResponse:
+        """
+        Keep an upload in the dataset store, parsed and preprocessed for the standard split
+        
+        Takes a pipeline slot, like a comparison. The upload's spool file is
+        moved into the store.
+        
+        Raises:
+            DatasetNotFoundError: If the dataset store is disabled
+            PoolSaturatedError: If the worker pool and its queue are full
+        """
+        self._require_dataset_store()
+        async with self.executor.admit():
+            return await self.executor.run(self._store_dataset, upload, filename, timer or self.telemetry.timer())
+    
+    def _store_dataset(self, upload: SpooledUpload, filename: Optional[str], timer: StageTimer) -> StoredDatasetResponse:
+        """Blocking body of :meth:`store_dataset`"""
+        source = self.dataset_store.create(upload)
+        try:
+            # A plain view of the raw file, so nothing is looked up in the store yet
+            raw = SpooledUpload(source.path, source.size, source.sha256)
+            prepared = self.prepare_dataset(raw, ComparisonOptions(), timer)
+            with timer.stage('dataset_store'):
+                return self.dataset_store.save_prepared(
+                    source, prepared, filename, preprocessing=self.data_preprocessor.fingerprint()
+                )
+        except Exception:
+            self.dataset_store.discard(source.dataset_id)
+            raise
+        finally:
+            source.cleanup()
+    
+    async def open_dataset(self, dataset_id: str) -> StoredUpload:
+        """
+        Lease a stored dataset for use as a comparison, profile or prediction source
+        
+        The returned upload's cleanup() releases the lease.
+        
+        Raises:
+            DatasetNotFoundError: If the store is disabled or the dataset is unknown or expired
+        """
+        store = self._require_dataset_store()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, store.open, dataset_id)
+    
+    async def describe_dataset(self, dataset_id: str) -> StoredDatasetResponse:
+        store = self._require_dataset_store()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, store.describe, dataset_id)
+    
+    async def delete_dataset(self, dataset_id: str):
+        store = self._require_dataset_store()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, store.delete, dataset_id)
+    
+    def _require_dataset_store(self) -> DatasetStore:
+        if self.dataset_store is None:
+            raise DatasetNotFoundError("Dataset store is disabled (set DATASET_STORE_DIR)")
+        return self.dataset_store
+    
+    def resolve_limits(self, options: ComparisonOptions) -> TrainingLimits:
+        """Combine per-request overrides with the configured training limits"""
+        settings = get_settings()
+        
+        def pick(override, default):
+            return override if override is not None else default
+        
+        def megabytes(value):
+            return value * 1024 * 1024 if value is not None else None
+        
+        request_timeout = pick(options.request_timeout, settings.REQUEST_TIMEOUT)
+        return TrainingLimits(
+            model_timeout=pick(options.model_timeout, settings.MODEL_TIMEOUT),
+            model_memory_bytes=megabytes(pick(options.model_memory_limit_mb, settings.MODEL_MEMORY_LIMIT_MB)),
+            deadline=time.monotonic() + request_timeout if request_timeout is not None else None,
+            request_memory_bytes=megabytes(pick(options.request_memory_limit_mb, settings.REQUEST_MEMORY_LIMIT_MB))
+        )
+    
+    async def lookup_cached(
+        self,
+        file_content: DatasetSource,
+        options: Optional[ComparisonOptions] = None
+    ) -> Tuple[Optional[str], Optional[ComparisonResponse]]:
+        """
+        Look the upload up in the result cache
+        
+        Returns:
+            Tuple of (cache_key, cached_response); both are None when caching
+            is disabled, and the response is None on a miss
+        """
+        if self.result_cache is None:
+            return None, None
+        
+        # Hashing a large upload takes a while; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, content_digest, file_content)
+        config = f"{self._config_fingerprint}:{(options or ComparisonOptions()).model_dump_json()}"
+        cache_key = ResultCache.make_key(digest, config, __version__)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving comparison from result cache ({cache_key[:12]})")
+            # The registry keeps fewer comparisons than the cache; don't hand out an evicted id
+            if cached.comparison_id is not None and (
+                self.model_registry is None or not self.model_registry.registered(cached.comparison_id)
+            ):
+                cached = cached.model_copy(update={'comparison_id': None})
+        return cache_key, cached
+    
+    async def _replay(self, response: ComparisonResponse, on_result: Optional[ResultCallback]):
+        """Report cached model results to a progress callback"""
+        if on_result is None:
+            return
+        for result in response.models:
+            await on_result(result)
+    
+    def prepare_dataset(
+        self,
+        file_content: DatasetSource,
+        options: ComparisonOptions,
+        timer: Optional[StageTimer] = None
+    ) -> PreparedDataset:
+        """Load, preprocess and split the dataset (blocking, runs on the executor)"""
+        timer = timer or StageTimer()
+        
+        if isinstance(file_content, StoredUpload):
+            task_type, preprocessing = self.dataset_store.prepared_with(file_content.dataset_id)
+            # Cross-validation and tuning folds are cut from the raw rows, as are
+            # matrices stored before a change of the preprocessing settings
+            needs_folds = options.mode in (ComparisonMode.CROSS_VALIDATION, ComparisonMode.TUNING)
+            current = preprocessing == self.data_preprocessor.fingerprint()
+            if current and (not needs_folds or task_type == 'clustering'):
+                with timer.stage('dataset_load'):
+                    prepared = PreparedDataset(
+                        **self.dataset_store.load_prepared(file_content.dataset_id),
+                        dataset_id=file_content.dataset_id
+                    )
+                logger.info(f"Using stored dataset {file_content.dataset_id}")
+                return prepared
+        
+        # Load data
+        with timer.stage('parse'):
+            df, file_format, reader = self.data_loader.load(file_content)
+        logger.info(f"Loaded {file_format} dataset with shape: {df.shape}")
+        
+        # One pass over every column; task detection and preprocessing reuse it
+        with timer.stage('profile'):
+            profile = self.profiler.profile(df)
+        
+        # Detect task type and target column
+        with timer.stage('detect_task'):
+            task_type, target_column = self.task_detector.detect_task(df, profile)
+        logger.info(f"Detected task_type: {task_type}, target_column: {target_column}")
+        
+        dataset_info = DatasetInfo(
+            rows=len(df),
+            columns=len(df.columns),
+            features=[col for col in df.columns if col != target_column],
+            target=target_column,
+            memory_usage_mb=round(df.memory_usage(deep=True).sum() / (1024 * 1024), 2),
+            file_format=file_format,
+            reader=reader
+        )
+        
+        # Split first so the preprocessing pipeline never sees test rows
+        with timer.stage('split_target'):
+            X, y, target_classes = self.data_preprocessor.split_target(df, target_column)
+        cv_plan = tuning_plan = None
+        if task_type != 'clustering' and options.mode == ComparisonMode.CROSS_VALIDATION:
+            with timer.stage('cv_folds'):
+                cv_plan = self.cross_validator.prepare(X, y, task_type, options.cv_folds, options.cv_repeats)
+            # Every fold sees all rows once, so the first fold's counts describe the dataset
+            preprocessing_info = cv_plan.folds[0].preprocessing_info
+            X_train = X_test = y_train = y_test = preprocessor = None
+        elif task_type != 'clustering':
+            with timer.stage('train_test_split'):
                 X_train, X_test, y_train, y_test = train_test_split(
                     X, y, test_size=0.2, random_state=42, 
                     stratify=y if task_type == 'classification' else None
                 )
-            else:
-                X_train, X_test = X, X
-                y_train, y_test = None, None
-            
-            # Train models
-            model_results = await self.model_trainer.train_all_models(
-                X_train, X_test, y_train, y_test, task_type
+            if options.mode == ComparisonMode.TUNING:
+                # Trials are scored on folds of the training rows; the test rows stay unseen
+                with timer.stage('tuning_folds'):
+                    tuning_plan = self.cross_validator.prepare(X_train, y_train, task_type, options.tune_folds, 1)
+            X_train, X_test, preprocessing_info, preprocessor = self.data_preprocessor.fit_transform(
+                X_train, X_test, task_type, timer=timer, profile=profile
             )
-            
-            # Prepare response
-            dataset_info = DatasetInfo(
-                rows=len(df),
-                columns=len(df.columns),
-                features=[col for col in df.columns if col != target_column],
-                target=target_column
-            )
-            
-            return ComparisonResponse(
-                task_type=task_type,
-                models=model_results,
-                dataset_info=dataset_info,
-                preprocessing_info=preprocessing_info
+        else:
+            X, _, preprocessing_info, preprocessor = self.data_preprocessor.fit_transform(
+                X, None, task_type, timer=timer, profile=profile
             )
-            
-        except Exception as e:
-            logger.error(f"Error in compare_models: {str(e)}")
-            raise
\ No newline at end of file
+            X_train, X_test = X, X
+            y_train, y_test = None, None
+        
+        return PreparedDataset(
+            task_type=task_type,
+            target_column=target_column,
+            X_train=X_train,
+            X_test=X_test,
+            y_train=y_train,
+            y_test=y_test,
+            dataset_info=dataset_info,
+            preprocessing_info=preprocessing_info,
+            preprocessor=preprocessor,
+            target_classes=target_classes,
+            cv_plan=cv_plan,
+            tuning_plan=tuning_plan
+        )
+    
+    def prewarm(self, report: StartupReport):
+        """
+        Import the estimator modules and build every model prototype (blocking)
+        
+        Recorded as the ``prewarm`` phase of ``report``. With the forkserver
+        start method the fork server that training workers are forked from
+        is then started with the modules preloaded (the ``fork_server``
+        phase); with fork, the workers inherit them from this process.
+        """
+        modules = sorted(
+            set(self.model_trainer.models_config.modules())
+            | {spec.module for specs in INCREMENTAL_MODELS.values() for spec in specs.values()}
+            | set(PREWARM_MODULES)
+        )
+        with report.phase('prewarm'):
+            report.import_modules(modules)
+            for task_type in self.model_trainer.models_config:
+                self.model_trainer.models_config[task_type]
+        if self.model_trainer.start_method == 'forkserver':
+            with report.phase('fork_server'):
+                preload(modules)
+                start_fork_server()
+        report.prewarmed = True
+    
+    def shutdown(self):
+        """Release the pipeline worker pool"""
+        self.executor.shutdown(wait=False)
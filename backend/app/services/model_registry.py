@@ -0,0 +1,255 @@
+"""On-disk registry of fitted models for serving predictions"""
+
+import os
+import json
+import uuid
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from app.models.responses import ModelResult, PredictionResponse
+from app.services.clustering import PRIMARY_METRIC as CLUSTERING_PRIMARY_METRIC
+from app.services.estimators import is_instance
+from app.services.model_trainer import DENSE_ONLY_ESTIMATORS, artifact_filename
+from app.services.racing import PRIMARY_METRICS
+from app.utils.data_loader import DatasetLoader, DatasetSource, detect_format, open_source
+from app.utils.data_preprocessor import DataPreprocessor
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+PREPROCESSOR_FILE = "preprocessor.joblib"
+
+class ModelNotFoundError(LookupError):
+    """Raised when a comparison or model is not in the registry"""
+
+@dataclass
+class LoadedComparison:
+    """A registered comparison with its fitted pipeline, kept hot in memory"""
+    manifest: Dict[str, Any]
+    preprocessor: Any
+    models: Dict[str, Any] = field(default_factory=dict)  # Loaded on first use
+
+class ModelRegistry:
+    """
+    Save fitted models and their preprocessing pipeline per comparison
+
+    Each comparison gets a directory holding one joblib file per model,
+    the fitted ColumnTransformer and a manifest. Files are written
+    uncompressed and loaded with ``mmap_mode='r'``, so large fitted arrays
+    are paged in from disk instead of copied. The ``max_loaded`` most
+    recently used comparisons stay loaded; only the newest ``max_entries``
+    comparisons are kept on disk.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        data_loader: DatasetLoader,
+        preprocessor: DataPreprocessor,
+        max_entries: int = 20,
+        max_loaded: int = 8
+    ):
+        self.root_dir = root_dir
+        self.data_loader = data_loader
+        self.preprocessor = preprocessor
+        self.max_entries = max_entries
+        self.max_loaded = max_loaded
+        self._loaded: "OrderedDict[str, LoadedComparison]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def create(self) -> str:
+        """Reserve a new comparison id and its artifact directory"""
+        comparison_id = uuid.uuid4().hex
+        os.makedirs(self.entry_dir(comparison_id))
+        return comparison_id
+
+    def entry_dir(self, comparison_id: str) -> str:
+        if not comparison_id.isalnum():
+            raise ModelNotFoundError(f"Invalid comparison id: {comparison_id}")
+        return os.path.join(self.root_dir, comparison_id)
+
+    def registered(self, comparison_id: str) -> bool:
+        """Whether a comparison's models are on disk (not evicted or still being written)"""
+        return os.path.exists(os.path.join(self.entry_dir(comparison_id), MANIFEST_FILE))
+
+    def register(
+        self,
+        comparison_id: str,
+        task_type: str,
+        target_column: Optional[str],
+        preprocessor,
+        target_classes: Optional[np.ndarray],
+        model_results: List[ModelResult]
+    ) -> Optional[str]:
+        """
+        Save the fitted preprocessor and a manifest of the saved models (blocking)
+
+        The manifest is written last; directories without one are incomplete.
+
+        Returns:
+            The comparison id, or None if no model was saved
+        """
+        entry_dir = self.entry_dir(comparison_id)
+        saved = [
+            result for result in model_results
+            if result.status == "completed" and os.path.exists(os.path.join(entry_dir, artifact_filename(result.name)))
+        ]
+        if not saved:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        joblib.dump(preprocessor, os.path.join(entry_dir, PREPROCESSOR_FILE))
+        metric = CLUSTERING_PRIMARY_METRIC if task_type == 'clustering' else PRIMARY_METRICS[task_type]
+        best = max(saved, key=lambda result: result.metrics.get(metric, float('-inf')))
+        manifest = {
+            "comparison_id": comparison_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "task_type": task_type,
+            "target": target_column,
+            "target_classes": target_classes.tolist() if target_classes is not None else None,
+            "best_model": best.name,
+            "models": {result.name: artifact_filename(result.name) for result in saved},
+        }
+        with open(os.path.join(entry_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+        self._evict()
+        return comparison_id
+
+    def discard(self, comparison_id: str):
+        """Remove a comparison's artifacts, e.g. after the comparison failed"""
+        shutil.rmtree(self.entry_dir(comparison_id), ignore_errors=True)
+
+    def predict(
+        self,
+        comparison_id: str,
+        source: DatasetSource,
+        model_name: Optional[str] = None
+    ) -> PredictionResponse:
+        """
+        Score a batch of rows with a registered model (blocking)
+
+        Args:
+            comparison_id: Id returned with the comparison results
+            source: CSV, Parquet or Arrow IPC rows with the training feature columns
+            model_name: Registered model to use; defaults to the comparison's best model
+
+        Raises:
+            ModelNotFoundError: If the comparison or model is not registered
+            ValueError: If the rows lack feature columns
+        """
+        comparison = self._load(comparison_id)
+        manifest = comparison.manifest
+        model_name = model_name or manifest["best_model"]
+        model = self._model(comparison_id, comparison, model_name)
+
+        X = self._features(source, comparison.preprocessor)
+        if is_instance(model, DENSE_ONLY_ESTIMATORS) and sparse.issparse(X):
+            X = X.toarray()
+
+        predictions = np.asarray(model.predict(X))
+        if manifest["target_classes"] is not None:
+            predictions = np.asarray(manifest["target_classes"], dtype=object)[predictions.astype(int)]
+        return PredictionResponse(
+            comparison_id=comparison_id,
+            model=model_name,
+            task_type=manifest["task_type"],
+            predictions=predictions.tolist()
+        )
+
+    def _features(self, source: DatasetSource, transformer) -> Any:
+        """Read, retype and transform the training feature columns"""
+        columns = list(transformer.feature_names_in_)
+        categorical = [
+            column
+            for name, _, branch_columns in transformer.transformers_
+            if name in ('ordinal', 'one_hot')
+            for column in branch_columns
+        ]
+
+        if detect_format(source) == 'csv':
+            # Batches are small: one typed read beats the loader's sampling and downcasting
+            wanted = set(columns)
+            df = pd.read_csv(
+                open_source(source),
+                usecols=lambda column: column in wanted,
+                dtype={column: str for column in categorical}
+            )
+        else:
+            df, _, _ = self.data_loader.load(source)
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+        X = df[columns]
+
+        # Categorical values that parse as numbers were strings in training
+        retype = {
+            column: X[column].astype(str).where(X[column].notna(), np.nan)
+            for column in categorical
+            if pd.api.types.is_numeric_dtype(X[column])
+        }
+        if retype:
+            X = X.assign(**retype)
+        return self.preprocessor.transform(transformer, X)
+
+    def _load(self, comparison_id: str) -> LoadedComparison:
+        with self._lock:
+            comparison = self._loaded.get(comparison_id)
+            if comparison is not None:
+                self._loaded.move_to_end(comparison_id)
+                return comparison
+
+        entry_dir = self.entry_dir(comparison_id)
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ModelNotFoundError(f"Comparison {comparison_id} is not registered")
+        comparison = LoadedComparison(
+            manifest=manifest,
+            preprocessor=joblib.load(os.path.join(entry_dir, PREPROCESSOR_FILE), mmap_mode='r')
+        )
+
+        with self._lock:
+            self._loaded[comparison_id] = comparison
+            self._loaded.move_to_end(comparison_id)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return comparison
+
+    def _model(self, comparison_id: str, comparison: LoadedComparison, model_name: str):
+        model = comparison.models.get(model_name)
+        if model is not None:
+            return model
+        filename = comparison.manifest["models"].get(model_name)
+        if filename is None:
+            raise ModelNotFoundError(f"Model {model_name!r} is not registered for comparison {comparison_id}")
+        model = joblib.load(os.path.join(self.entry_dir(comparison_id), filename), mmap_mode='r')
+        comparison.models[model_name] = model
+        return model
+
+    def _evict(self):
+        """Delete the oldest registered comparisons beyond max_entries"""
+        entries = []
+        for name in os.listdir(self.root_dir):
+            manifest = os.path.join(self.root_dir, name, MANIFEST_FILE)
+            try:
+                entries.append((os.path.getmtime(manifest), name))
+            except OSError:
+                continue
+        entries.sort()
+        for _, name in entries[:max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(os.path.join(self.root_dir, name), ignore_errors=True)
+            with self._lock:
+                self._loaded.pop(name, None)
+            logger.info(f"Evicted registered comparison {name}")
@@ -0,0 +1,360 @@
+"""Reusable, killable model worker processes with time and memory limits"""
+
+import time
+import asyncio
+import logging
+import multiprocessing
+from multiprocessing import forkserver
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from app.utils.memory import process_private_bytes
+
+logger = logging.getLogger(__name__)
+
+# Outcome statuses besides a normal "completed" result
+STATUS_TIMED_OUT = "timed_out"
+STATUS_OOM = "oom"
+STATUS_FAILED = "failed"
+
+# Imported by the fork server before it forks any worker; see preload()
+_forkserver_preload: Set[str] = {'app.services.model_trainer'}
+
+def preload(modules: Iterable[str] = ()):
+    """
+    Have the fork server import ``modules`` when it starts
+
+    Workers forked from it start with them loaded instead of importing
+    them per task. Modules add up across calls; once the fork server is
+    running, later calls have no effect.
+    """
+    _forkserver_preload.update(modules)
+    multiprocessing.get_context('forkserver').set_forkserver_preload(sorted(_forkserver_preload))
+
+def start_fork_server():
+    """Start the fork server now (blocking), importing the preloaded modules before the first task"""
+    forkserver.ensure_running()
+
+@dataclass
+class TrainingLimits:
+    """Wall-clock and memory limits for one comparison request"""
+    model_timeout: Optional[float] = None  # Seconds per model
+    model_memory_bytes: Optional[int] = None  # Private memory per model process
+    deadline: Optional[float] = None  # time.monotonic() by which the request must finish
+    request_memory_bytes: Optional[int] = None  # Private memory across all model processes
+
+    @property
+    def enforced(self) -> bool:
+        """True when any limit requires killable worker processes"""
+        return any(
+            limit is not None
+            for limit in (self.model_timeout, self.model_memory_bytes, self.deadline, self.request_memory_bytes)
+        )
+
+    def expired(self) -> bool:
+        """True once the request deadline has passed"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+@dataclass
+class RunOutcome:
+    """What happened to one task run by IsolatedRunner"""
+    name: str
+    status: str
+    result: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+# (name, fn, args) of one task; names must be unique within a run
+Task = Tuple[str, Callable, tuple]
+
+class TaskQueue:
+    """
+    Tasks waiting for an IsolatedRunner worker
+
+    The base queue is a fixed list started in order. Subclasses may pick
+    the next task by another policy or take new tasks while the runner is
+    running; an open queue is polled until it is closed and empty.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self._tasks = deque(tasks)
+        self.closed = True
+
+    def pop(self) -> Optional[Task]:
+        """Next task to start, or None if none is waiting"""
+        return self._tasks.popleft() if self._tasks else None
+
+    def drain(self) -> List[Task]:
+        """Remove and return every waiting task"""
+        tasks, self._tasks = list(self._tasks), deque()
+        return tasks
+
+    def close(self):
+        """Accept no more tasks"""
+        self.closed = True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.closed and not self._tasks
+
+class Shared:
+    """
+    A task argument each worker process receives once
+
+    Later tasks passing the same ``key`` to that worker reuse its copy, so
+    a training split is pickled to each worker once rather than per task.
+    Keys must stay unique for as long as the runner runs.
+    """
+
+    def __init__(self, key: str, value: Any):
+        self.key = key
+        self.value = value
+
+@dataclass(frozen=True)
+class _SharedRef:
+    """Stands in for a Shared argument on its way to a worker"""
+    key: str
+
+def _worker_main(conn):
+    """Entry point of a worker process: run tasks from the pipe until it is closed"""
+    shared: Dict[str, Any] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        except Exception as e:
+            conn.send((STATUS_FAILED, f"Task could not be received: {type(e).__name__}: {e}"))
+            continue
+        fn, args, received = message
+        # Keep only what this task uses; the parent tracks the same keys
+        keys = {arg.key for arg in args if isinstance(arg, _SharedRef)}
+        shared = {key: value for key, value in shared.items() if key in keys}
+        shared.update(received)
+        try:
+            reply = ("completed", fn(*(shared[arg.key] if isinstance(arg, _SharedRef) else arg for arg in args)))
+        except MemoryError:
+            reply = (STATUS_OOM, "MemoryError")
+        except BaseException as e:
+            reply = (STATUS_FAILED, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except Exception as e:
+            conn.send((STATUS_FAILED, f"Result could not be returned: {type(e).__name__}: {e}"))
+    conn.close()
+
+class _Worker:
+    """One worker process and the task it is running, if any"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.shared: Set[str] = set()  # Keys of the Shared arguments the process holds
+        self.name: Optional[str] = None  # Running task, None while idle
+        self.started = 0.0
+        self.baseline = 0  # Private memory before the running task
+        self.memory = 0
+
+    def assign(self, name: str, fn: Callable, args: tuple, baseline: int = 0):
+        received = {
+            arg.key: arg.value for arg in args if isinstance(arg, Shared) and arg.key not in self.shared
+        }
+        packed = tuple(_SharedRef(arg.key) if isinstance(arg, Shared) else arg for arg in args)
+        self.conn.send((fn, packed, received))
+        self.shared = {arg.key for arg in args if isinstance(arg, Shared)}
+        self.name = name
+        self.started = time.monotonic()
+        self.baseline = baseline
+        self.memory = baseline
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class IsolatedRunner:
+    """
+    Run tasks on a bounded set of worker processes, each of which can be stopped
+
+    Up to ``max_workers`` processes are started as tasks need them and are
+    reused for later tasks. The parent polls every busy process and kills
+    it when its task exceeds its wall-clock or memory limit (the private
+    memory it added to its worker), when the request deadline passes, or
+    when the combined memory of the busy processes exceeds the request
+    budget (the largest one is killed). A killed or crashed process is
+    replaced by a fresh one for the next task. Arguments wrapped in Shared
+    reach each process once.
+
+    Workers come from a ``forkserver`` by default: the API process runs
+    executor, sampler and BLAS threads, and a child forked from it directly
+    can deadlock on a lock one of them held. The fork server is a fresh
+    single-threaded process, with the modules given to preload() already
+    imported, so workers do not import them per task. ``fork`` is only
+    safe from single-threaded processes.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        limits: TrainingLimits,
+        start_method: str = "forkserver",
+        poll_interval: float = 0.05
+    ):
+        self.max_workers = max(1, max_workers)
+        self.limits = limits
+        self.poll_interval = poll_interval
+        try:
+            self._context = multiprocessing.get_context(start_method)
+        except ValueError:
+            self._context = multiprocessing.get_context()
+        if self._context.get_start_method() == 'forkserver':
+            preload()
+
+    async def run_all(
+        self,
+        tasks: Union[List[Task], TaskQueue],
+        on_done: Optional[Callable[[RunOutcome], Awaitable[None]]] = None
+    ) -> Dict[str, RunOutcome]:
+        """
+        Run every ``(name, fn, args)`` task and return the outcomes by name
+
+        Tasks start in list order, or in the order a TaskQueue hands them
+        out. ``on_done`` is awaited with each outcome as soon as it is known.
+        Cancelling the coroutine kills all workers.
+        """
+        pending = tasks if isinstance(tasks, TaskQueue) else TaskQueue(tasks)
+        workers: List[_Worker] = []
+        outcomes: Dict[str, RunOutcome] = {}
+
+        async def finish(outcome: RunOutcome, worker: Optional[_Worker] = None):
+            if worker is not None:
+                worker.name = None
+                if not worker.process.is_alive():
+                    workers.remove(worker)
+            outcomes[outcome.name] = outcome
+            if outcome.status != "completed":
+                logger.warning(f"{outcome.name}: {outcome.status} ({outcome.error})")
+            if on_done is not None:
+                await on_done(outcome)
+
+        try:
+            while not pending.exhausted or any(worker.name is not None for worker in workers):
+                if self.limits.expired():
+                    for worker in [worker for worker in workers if worker.name is not None]:
+                        worker.kill()
+                        await finish(RunOutcome(
+                            worker.name, STATUS_TIMED_OUT,
+                            error="Request time limit reached",
+                            elapsed=time.monotonic() - worker.started
+                        ), worker)
+                    pending.close()
+                    for name, _, _ in pending.drain():
+                        await finish(RunOutcome(name, STATUS_TIMED_OUT, error="Request time limit reached before start"))
+                    break
+
+                # Idle workers that died (usually the kernel OOM killer) are replaced when needed
+                for worker in [worker for worker in workers if worker.name is None and not worker.process.is_alive()]:
+                    worker.kill()
+                    workers.remove(worker)
+                while True:
+                    idle = next((worker for worker in workers if worker.name is None), None)
+                    if idle is None and len(workers) >= self.max_workers:
+                        break
+                    task = pending.pop()
+                    if task is None:
+                        break
+                    if idle is None:
+                        idle = self._spawn()
+                        workers.append(idle)
+                    idle.assign(*task, baseline=self._memory(idle))
+
+                await asyncio.sleep(self.poll_interval)
+
+                for worker in [worker for worker in workers if worker.name is not None]:
+                    outcome = self._check(worker)
+                    if outcome is not None:
+                        await finish(outcome, worker)
+
+                over_budget = self._enforce_request_memory([worker for worker in workers if worker.name is not None])
+                if over_budget is not None:
+                    await finish(RunOutcome(
+                        over_budget.name, STATUS_OOM,
+                        error="Request memory limit reached",
+                        elapsed=time.monotonic() - over_budget.started
+                    ), over_budget)
+        finally:
+            # Idle workers hold nothing worth a graceful exit; busy ones are cancelled
+            for worker in workers:
+                worker.kill()
+
+        return outcomes
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), name="model-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _memory(self, worker: _Worker) -> int:
+        """A worker's private memory, when a memory limit needs it"""
+        if self.limits.model_memory_bytes is None and self.limits.request_memory_bytes is None:
+            return 0
+        return process_private_bytes(worker.process.pid) or 0
+
+    def _check(self, worker: _Worker) -> Optional[RunOutcome]:
+        """Collect a finished task or enforce its limits; None while it keeps running"""
+        elapsed = time.monotonic() - worker.started
+
+        alive = worker.process.is_alive()
+        # Poll after the liveness check so a result sent just before exit is not missed
+        if worker.conn.poll():
+            try:
+                status, payload = worker.conn.recv()
+            except EOFError:
+                worker.kill()
+                return RunOutcome(worker.name, STATUS_FAILED, error="Worker exited without a result", elapsed=elapsed)
+            if status == "completed":
+                return RunOutcome(worker.name, status, result=payload, elapsed=elapsed)
+            return RunOutcome(worker.name, status, error=payload, elapsed=elapsed)
+
+        if not alive:
+            worker.kill()
+            # SIGKILL from outside (usually the kernel OOM killer)
+            status = STATUS_OOM if worker.process.exitcode == -9 else STATUS_FAILED
+            return RunOutcome(
+                worker.name, status,
+                error=f"Worker exited with code {worker.process.exitcode}", elapsed=elapsed
+            )
+
+        limits = self.limits
+        if limits.model_timeout is not None and elapsed > limits.model_timeout:
+            worker.kill()
+            return RunOutcome(
+                worker.name, STATUS_TIMED_OUT,
+                error=f"Exceeded model time limit of {limits.model_timeout}s", elapsed=elapsed
+            )
+
+        worker.memory = self._memory(worker)
+        if limits.model_memory_bytes is not None and worker.memory - worker.baseline > limits.model_memory_bytes:
+            worker.kill()
+            return RunOutcome(
+                worker.name, STATUS_OOM,
+                error=f"Exceeded model memory limit of {limits.model_memory_bytes} bytes",
+                elapsed=elapsed
+            )
+
+        return None
+
+    def _enforce_request_memory(self, busy: List[_Worker]) -> Optional[_Worker]:
+        """Kill the largest busy worker if the busy workers together exceed the request budget"""
+        budget = self.limits.request_memory_bytes
+        if budget is None or not busy:
+            return None
+        if sum(worker.memory for worker in busy) <= budget:
+            return None
+        largest = max(busy, key=lambda worker: worker.memory)
+        largest.kill()
+        return largest
@@ -1,84 +1,444 @@
 """Model training service"""
 
+import os
+import re
+import json
 import time
 import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import joblib
 import numpy as np
 import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
 
-# Scikit-learn imports
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor, GradientBoostingClassifier, GradientBoostingRegressor
-from sklearn.svm import SVC, SVR
-from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
-from sklearn.naive_bayes import GaussianNB
-from sklearn.neural_network import MLPClassifier, MLPRegressor
-from sklearn.cluster import KMeans
-from sklearn.metrics import *
-
+from app.core.concurrency import BoundedExecutor, resolve_n_jobs
+from app.core.config import get_settings
 from app.models.responses import ModelResult
+from app.services.estimators import EstimatorCatalog, is_instance
+from app.services.model_runner import (
+    IsolatedRunner, RunOutcome, STATUS_FAILED, STATUS_TIMED_OUT, Shared, Task, TrainingLimits
+)
+from app.services.scalable import ScalableVariants
+from app.services.scheduler import CostModel, DatasetShape, TrainingSchedule, plan_schedule
+from app.utils.metrics import MetricsEngine
 
 logger = logging.getLogger(__name__)
 
+# Awaited with each ModelResult as soon as that model finishes
+ResultCallback = Callable[[ModelResult], Awaitable[None]]
+
+# Awaited with (split index, result) as soon as a model finishes on one split
+SplitResultCallback = Callable[[int, ModelResult], Awaitable[None]]
+
+# (X_train, X_test, y_train, y_test) of one train/test split
+DataSplit = Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.Series], Optional[pd.Series]]
+
+# Estimators that reject sparse input; they get a dense copy of the features
+DENSE_ONLY_ESTIMATORS = (
+    'sklearn.naive_bayes:GaussianNB',
+    'sklearn.ensemble:HistGradientBoostingClassifier',
+    'sklearn.ensemble:HistGradientBoostingRegressor',
+)
+
+# Estimators whose predict() is not the argmax of predict_proba()
+SEPARATE_PROBA_ESTIMATORS = ('sklearn.svm:SVC',)
+
+def as_float64(X):
+    """A float32 feature matrix as float64, keeping DataFrame column names"""
+    if sparse.issparse(X):
+        return X.astype(np.float64, copy=False)
+    if isinstance(X, pd.DataFrame):
+        values = X.to_numpy()
+        if values.dtype == np.float64:
+            return X
+        return pd.DataFrame(
+            np.ascontiguousarray(values, dtype=np.float64), columns=X.columns, index=X.index, copy=False
+        )
+    return np.ascontiguousarray(X, dtype=np.float64)
+
+def _calinski_harabasz(cluster_sums: np.ndarray, sizes: np.ndarray, inertia: float) -> float:
+    """Calinski-Harabasz score from per-cluster feature sums and sizes and the inertia"""
+    n_rows, n_clusters = sizes.sum(), len(sizes)
+    total = cluster_sums.sum(axis=0)
+    between = float(((cluster_sums ** 2).sum(axis=1) / sizes).sum() - (total ** 2).sum() / n_rows)
+    return 1.0 if inertia == 0.0 else between * (n_rows - n_clusters) / (inertia * (n_clusters - 1.0))
+
+def _davies_bouldin(X, cluster_of: np.ndarray, sizes: np.ndarray, centroids: np.ndarray, row_norms: np.ndarray) -> float:
+    """Davies-Bouldin score of a sparse X, from its rows' squared norms and the cluster centroids"""
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, against each row's own centroid
+    own = np.asarray(X @ centroids.T)[np.arange(len(cluster_of)), cluster_of]
+    squared = row_norms - 2 * own + (centroids ** 2).sum(axis=1)[cluster_of]
+    intra = np.bincount(cluster_of, weights=np.sqrt(np.maximum(squared, 0.0))) / sizes
+    separation = np.sqrt(np.maximum(
+        (centroids ** 2).sum(axis=1)[:, None] + (centroids ** 2).sum(axis=1) - 2 * centroids @ centroids.T, 0.0
+    ))
+    if np.allclose(intra, 0) or np.allclose(separation, 0):
+        return 0.0
+    separation[separation == 0] = np.inf
+    return float(np.mean(np.max((intra[:, None] + intra) / separation, axis=1)))
+
+def artifact_filename(model_name: str) -> str:
+    """File name a fitted model is saved under inside an artifact directory"""
+    return re.sub(r'[^a-z0-9]+', '-', model_name.lower()).strip('-') + '.joblib'
+
+def _train_isolated(
+    trainer: "ModelTrainer",
+    model_name: str,
+    prototype,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: Optional[pd.Series],
+    y_test: Optional[pd.Series],
+    task_type: str,
+    artifact_path: Optional[str] = None
+) -> ModelResult:
+    """Worker process entry point: train a fresh clone of one model prototype"""
+    return trainer.train_single_model(
+        clone(prototype), model_name, X_train, X_test, y_train, y_test, task_type, artifact_path
+    )
+
 class ModelTrainer:
     """Train and evaluate ML models"""
     
-    def __init__(self):
-        self.models_config = {
-            'classification': {
-                'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000),
-                'Decision Tree': DecisionTreeClassifier(random_state=42),
-                'Random Forest': RandomForestClassifier(random_state=42, n_estimators=100),
-                'SVM': SVC(random_state=42, probability=True),
-                'K-Nearest Neighbors': KNeighborsClassifier(),
-                'Naive Bayes': GaussianNB(),
-                'Gradient Boosting': GradientBoostingClassifier(random_state=42),
-                'Neural Network': MLPClassifier(random_state=42, max_iter=500)
-            },
-            'regression': {
-                'Linear Regression': LinearRegression(),
-                'Decision Tree': DecisionTreeRegressor(random_state=42),
-                'Random Forest': RandomForestRegressor(random_state=42, n_estimators=100),
-                'SVM': SVR(),
-                'K-Nearest Neighbors': KNeighborsRegressor(),
-                'Gradient Boosting': GradientBoostingRegressor(random_state=42),
-                'Neural Network': MLPRegressor(random_state=42, max_iter=500)
-            },
-            'clustering': {
-                'K-Means': KMeans(random_state=42, n_clusters=3)
-            }
+    def __init__(
+        self,
+        n_jobs: Optional[int] = None,
+        parallel: Optional[bool] = None,
+        executor: Optional[BoundedExecutor] = None
+    ):
+        settings = get_settings()
+        self.n_jobs = resolve_n_jobs(settings.N_JOBS if n_jobs is None else n_jobs)
+        self.parallel = settings.PARALLEL_TRAINING if parallel is None else parallel
+        self.start_method = settings.WORKER_START_METHOD
+        # Thread pool used to keep sequential fits off the event loop
+        self.executor = executor
+        self.metrics_engine = MetricsEngine()
+        self.silhouette_sample = settings.CLUSTERING_SILHOUETTE_SAMPLE
+        # Unfitted prototypes; every training run works on fresh clones. Each
+        # task's estimators are imported and built the first time it is used
+        self.models_config = EstimatorCatalog()
+        # Learns training times from every run to order and select models
+        self.cost_model = CostModel(
+            path=settings.COST_MODEL_PATH, max_observations=settings.COST_MODEL_MAX_OBSERVATIONS
+        )
+        # Trained in place of estimators that scale badly, on large datasets
+        self.scalable_variants = ScalableVariants(
+            settings.SCALABLE_MIN_ROWS, settings.SCALABLE_MIN_FEATURES, random_state=settings.RANDOM_STATE
+        )
+    
+    def __getstate__(self):
+        # Pool workers receive the trainer by pickle; the thread pool and cost model stay behind
+        state = self.__dict__.copy()
+        state['executor'] = None
+        state['cost_model'] = None
+        return state
+    
+    def config_fingerprint(self) -> str:
+        """Stable hash of every configured estimator and its parameters, and when they are swapped"""
+        config = self.models_config.describe()
+        encoded = json.dumps(config, sort_keys=True, default=repr)
+        return f"{hashlib.sha256(encoded.encode()).hexdigest()}:{self.scalable_variants.fingerprint()}"
+    
+    def build_models(self, task_type: str) -> Dict[str, object]:
+        """Return fresh, unfitted clones of the configured models for a task"""
+        return {
+            model_name: clone(model)
+            for model_name, model in self.models_config.get(task_type, {}).items()
         }
     
+    def schedule(
+        self,
+        X_train: pd.DataFrame,
+        y_train: Optional[pd.Series],
+        task_type: str,
+        model_names: Optional[List[str]] = None,
+        candidates: Optional[Dict[str, object]] = None,
+        latency_target: Optional[float] = None
+    ) -> TrainingSchedule:
+        """
+        Predict each model's training time and order the models longest first
+        
+        With ``latency_target`` (seconds), only the cheapest models whose
+        predicted wall time on the available workers fits are kept. On
+        large datasets, configured estimators that scale badly are swapped
+        for their scalable variants (see ScalableVariants), sharing N_JOBS
+        threads between the concurrent fits; train ``schedule.scheduled()``
+        as the candidates. Given ``candidates`` are kept as they are.
+        """
+        prototypes = self._prototypes(task_type, model_names, candidates)
+        shape = DatasetShape.of(X_train, y_train, task_type)
+        n_workers = self._worker_count(len(prototypes))
+        variants = {}
+        if candidates is None:
+            prototypes, variants = self.scalable_variants.select(
+                prototypes, shape, n_jobs=max(1, self.n_jobs // n_workers), sparse_input=sparse.issparse(X_train)
+            )
+        schedule = plan_schedule(self.cost_model, prototypes, shape, n_workers, latency_target)
+        schedule.variants = variants
+        return schedule
+    
     async def train_all_models(
         self,
         X_train: pd.DataFrame,
         X_test: pd.DataFrame,
         y_train: Optional[pd.Series],
         y_test: Optional[pd.Series],
-        task_type: str
+        task_type: str,
+        on_result: Optional[ResultCallback] = None,
+        model_names: Optional[List[str]] = None,
+        limits: Optional[TrainingLimits] = None,
+        candidates: Optional[Dict[str, object]] = None,
+        artifact_dir: Optional[str] = None,
+        schedule: Optional[TrainingSchedule] = None
     ) -> List[ModelResult]:
-        """Train all models for the given task type"""
+        """
+        Train all models for the given task type
+        
+        Results are returned in models_config order; ``on_result`` is
+        awaited for each model in completion order as soon as it finishes.
+        Pass ``model_names`` to train only a subset of the configured models,
+        or ``candidates`` to train other unfitted estimators by name instead.
+        Pass a ``schedule`` from :meth:`schedule` to train its scheduled
+        models in its order rather than planning again.
+        With ``artifact_dir``, every successfully trained model is saved
+        there by the process that fitted it (see ``artifact_filename``).
+        
+        Time and memory ``limits`` are enforced by training in killable
+        worker processes; models that exceed them are returned with status
+        ``timed_out`` or ``oom`` and empty metrics. Worker processes start
+        the models longest predicted first; every result carries its
+        ``predicted_time`` and teaches the cost model its actual time.
+        """
+        
+        if schedule is not None:
+            prototypes = schedule.scheduled()
+        else:
+            prototypes = self._prototypes(task_type, model_names, candidates)
+        limits = limits or TrainingLimits()
+        n_workers = self._worker_count(len(prototypes))
+        shape = DatasetShape.of(X_train, y_train, task_type)
+        if schedule is None:
+            schedule = plan_schedule(self.cost_model, prototypes, shape, n_workers)
+        
+        if n_workers > 1 or limits.enforced:
+            results = await self._train_models_isolated(
+                prototypes, n_workers, X_train, X_test, y_train, y_test, task_type,
+                on_result, limits, artifact_dir, schedule=schedule, shape=shape
+            )
+            self.cost_model.save()
+            return results
         
-        models = self.models_config.get(task_type, {})
         results = []
         
-        for model_name, model in models.items():
+        for model_name, prototype in prototypes.items():
+            model = clone(prototype)
             try:
                 logger.info(f"Training {model_name}")
-                result = await self._train_single_model(
-                    model, model_name, X_train, X_test, y_train, y_test, task_type
+                result = await self._run_blocking(
+                    self.train_single_model,
+                    model, model_name, X_train, X_test, y_train, y_test, task_type,
+                    self.artifact_path(artifact_dir, model_name)
                 )
+                self.learn(result, prototype, shape, schedule.predicted[model_name])
                 results.append(result)
+                if on_result is not None:
+                    await on_result(result)
             except Exception as e:
                 logger.error(f"Error training {model_name}: {str(e)}")
                 # Continue with other models
                 continue
         
+        self.cost_model.save()
         return results
     
-    async def _train_single_model(
+    async def _train_models_isolated(
+        self,
+        prototypes: Dict[str, object],
+        n_workers: int,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: Optional[pd.Series],
+        y_test: Optional[pd.Series],
+        task_type: str,
+        on_result: Optional[ResultCallback],
+        limits: TrainingLimits,
+        artifact_dir: Optional[str] = None,
+        schedule: Optional[TrainingSchedule] = None,
+        shape: Optional[DatasetShape] = None
+    ) -> List[ModelResult]:
+        """Train each model in its own killable worker process, in schedule order; results keep config order"""
+        
+        logger.info(f"Training {len(prototypes)} models on {n_workers} worker processes")
+        runner = IsolatedRunner(n_workers, limits, start_method=self.start_method)
+        tasks = [
+            self.training_task(
+                model_name, model_name, prototypes[model_name], (X_train, X_test, y_train, y_test), task_type,
+                self.artifact_path(artifact_dir, model_name)
+            )
+            for model_name in (schedule.order if schedule is not None else prototypes)
+        ]
+        results = {}
+        
+        async def collect(outcome: RunOutcome):
+            result = self.outcome_to_result(outcome, task_type)
+            if result is None:
+                return
+            if schedule is not None:
+                self.learn(result, prototypes[outcome.name], shape, schedule.predicted[outcome.name])
+            results[outcome.name] = result
+            if on_result is not None:
+                await on_result(result)
+        
+        await runner.run_all(tasks, on_done=collect)
+        return [results[model_name] for model_name in prototypes if model_name in results]
+    
+    async def train_on_splits(
+        self,
+        splits: List[DataSplit],
+        task_type: str,
+        on_result: Optional[SplitResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        candidates: Optional[Dict[str, object]] = None
+    ) -> Dict[str, List[Optional[ModelResult]]]:
+        """
+        Train every configured model on every split
+        
+        All (model, split) pairs share one pool of worker processes, so
+        splits and models train in parallel, longest predicted first. The
+        split matrices are passed as-is to each run rather than rebuilt per
+        model. Pass ``candidates`` to train other unfitted estimators by
+        name instead.
+        
+        Returns:
+            Per-model lists of results in split order; None where a run failed
+        """
+        
+        configured = candidates if candidates is not None else self.models_config.get(task_type, {})
+        model_names = list(configured)
+        limits = limits or TrainingLimits()
+        runs = [(model_name, index) for model_name in model_names for index in range(len(splits))]
+        n_workers = self._worker_count(len(runs))
+        results = {model_name: [None] * len(splits) for model_name in model_names}
+        shapes = [DatasetShape.of(split[0], split[2], task_type) for split in splits]
+        predicted = {
+            (model_name, index): self.cost_model.predict(configured[model_name], shapes[index])
+            for model_name, index in runs
+        }
+        
+        async def record(model_name: str, index: int, result: Optional[ModelResult]):
+            if result is None:
+                return
+            self.learn(result, configured[model_name], shapes[index], predicted[model_name, index])
+            results[model_name][index] = result
+            if on_result is not None:
+                await on_result(index, result)
+        
+        if n_workers > 1 or limits.enforced:
+            logger.info(f"Training {len(runs)} model/split pairs on {n_workers} worker processes")
+            runner = IsolatedRunner(n_workers, limits, start_method=self.start_method)
+            runs.sort(key=lambda run: predicted[run], reverse=True)
+            run_keys = {f"{model_name} [split {index}]": (model_name, index) for model_name, index in runs}
+            tasks = [
+                self.training_task(key, model_name, configured[model_name], splits[index], task_type)
+                for key, (model_name, index) in run_keys.items()
+            ]
+            
+            async def collect(outcome: RunOutcome):
+                model_name, index = run_keys[outcome.name]
+                outcome.name = model_name
+                await record(model_name, index, self.outcome_to_result(outcome, task_type))
+            
+            await runner.run_all(tasks, on_done=collect)
+            self.cost_model.save()
+            return results
+        
+        for model_name, index in runs:
+            model = clone(configured[model_name])
+            try:
+                result = await self._run_blocking(
+                    self.train_single_model, model, model_name, *splits[index], task_type
+                )
+            except Exception as e:
+                logger.error(f"Error training {model_name} on split {index}: {str(e)}")
+                result = None
+            await record(model_name, index, result)
+        
+        self.cost_model.save()
+        return results
+    
+    def training_task(
+        self,
+        key: str,
+        model_name: str,
+        prototype,
+        split: DataSplit,
+        task_type: str,
+        artifact_path: Optional[str] = None
+    ) -> Task:
+        """
+        IsolatedRunner task training a clone of one prototype on one split, run under ``key``
+        
+        The trainer and the split reach each worker process once, however
+        many of its models the process trains.
+        """
+        shared = tuple(
+            part if part is None else Shared(f"{type(part).__name__}-{id(part)}", part)
+            for part in (self, *split)
+        )
+        return (key, _train_isolated, (*shared[:1], model_name, prototype, *shared[1:], task_type, artifact_path))
+    
+    def outcome_to_result(self, outcome: RunOutcome, task_type: str) -> Optional[ModelResult]:
+        """Map a worker outcome to a ModelResult; failed models are logged and dropped"""
+        if outcome.status == "completed":
+            return outcome.result
+        if outcome.status == STATUS_FAILED:
+            logger.error(f"Error training {outcome.name}: {outcome.error}")
+            return None
+        return ModelResult(
+            name=outcome.name,
+            metrics={},
+            training_time=outcome.elapsed,
+            type=task_type,
+            status=outcome.status
+        )
+    
+    def _prototypes(
+        self,
+        task_type: str,
+        model_names: Optional[List[str]],
+        candidates: Optional[Dict[str, object]]
+    ) -> Dict[str, object]:
+        """The configured (or candidate) prototypes to train, in config order"""
+        configured = candidates if candidates is not None else self.models_config.get(task_type, {})
+        if model_names is None:
+            return dict(configured)
+        return {model_name: configured[model_name] for model_name in configured if model_name in model_names}
+    
+    def _worker_count(self, n_runs: int) -> int:
+        return min(self.n_jobs if self.parallel else 1, n_runs)
+    
+    def learn(self, result: ModelResult, prototype, shape: DatasetShape, predicted: float):
+        """Attach the predicted training time to a result and teach the cost model the actual one"""
+        result.predicted_time = predicted
+        if result.status == "completed":
+            self.cost_model.observe(prototype, shape, result.training_time)
+    
+    def artifact_path(self, artifact_dir: Optional[str], model_name: str) -> Optional[str]:
+        """Where a model fitted for ``artifact_dir`` is saved, or None when models are not saved"""
+        return os.path.join(artifact_dir, artifact_filename(model_name)) if artifact_dir else None
+    
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking call on the trainer's executor, or the loop's default one"""
+        if self.executor is not None:
+            return await self.executor.run(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    def train_single_model(
         self,
         model,
         model_name: str,
@@ -86,82 +446,120 @@ class ModelTrainer:
         X_test: pd.DataFrame,
         y_train: Optional[pd.Series],
         y_test: Optional[pd.Series],
-        task_type: str
+        task_type: str,
+        artifact_path: Optional[str] = None
     ) -> ModelResult:
-        """Train a single model and return results"""
+        """Train a single model and return results, saving it to ``artifact_path`` if given"""
         
         start_time = time.time()
+        per_class = None
+        
+        if is_instance(model, DENSE_ONLY_ESTIMATORS) and sparse.issparse(X_train):
+            X_train, X_test = X_train.toarray(), X_test.toarray()
         
         if task_type == 'clustering':
             # Clustering doesn't need y
             model.fit(X_train)
-            y_pred = model.predict(X_test)
-            metrics = self._calculate_clustering_metrics(X_test, y_pred)
+            fit_time = time.time() - start_time
+            # Reuse the labels from fitting when scoring on the same rows
+            if X_test is X_train and hasattr(model, 'labels_'):
+                y_pred = model.labels_
+            else:
+                y_pred = model.predict(X_test)
+            predict_time = time.time() - start_time - fit_time
+            metrics = self.calculate_clustering_metrics(X_test, y_pred)
         else:
             # Supervised learning
             model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
+            fit_time = time.time() - start_time
             
             if task_type == 'classification':
-                metrics = self._calculate_classification_metrics(y_test, y_pred, model, X_test)
+                y_pred, y_proba = self.predict_with_proba(model, X_test)
+                predict_time = time.time() - start_time - fit_time
+                metrics, per_class = self.metrics_engine.classification(
+                    y_test, y_pred, y_proba, getattr(model, 'classes_', None)
+                )
             else:  # regression
-                metrics = self._calculate_regression_metrics(y_test, y_pred)
+                y_pred = model.predict(X_test)
+                predict_time = time.time() - start_time - fit_time
+                metrics = self.metrics_engine.regression(y_test, y_pred)
         
         training_time = time.time() - start_time
         
+        if artifact_path is not None:
+            # Uncompressed so large arrays can be memory-mapped when loaded
+            joblib.dump(model, artifact_path)
+        
         return ModelResult(
             name=model_name,
             metrics=metrics,
             training_time=training_time,
-            type=task_type
+            type=task_type,
+            fit_time=fit_time,
+            score_time=training_time - fit_time,
+            predict_time=predict_time,
+            per_class=per_class
         )
     
-    def _calculate_classification_metrics(self, y_true, y_pred, model, X_test) -> dict:
-        """Calculate classification metrics"""
-        metrics = {
-            'accuracy': accuracy_score(y_true, y_pred),
-            'precision': precision_score(y_true, y_pred, average='weighted', zero_division=0),
-            'recall': recall_score(y_true, y_pred, average='weighted', zero_division=0),
-            'f1_score': f1_score(y_true, y_pred, average='weighted', zero_division=0)
-        }
-        
-        # Add ROC-AUC for binary classification
-        try:
-            if len(np.unique(y_true)) == 2 and hasattr(model, 'predict_proba'):
-                y_proba = model.predict_proba(X_test)[:, 1]
-                metrics['roc_auc'] = roc_auc_score(y_true, y_proba)
-            elif len(np.unique(y_true)) > 2 and hasattr(model, 'predict_proba'):
-                y_proba = model.predict_proba(X_test)
-                metrics['roc_auc'] = roc_auc_score(y_true, y_proba, multi_class='ovr', average='weighted')
-        except:
-            # If ROC-AUC calculation fails, skip it
-            pass
+    def predict_with_proba(self, model, X_test):
+        """
+        Predicted labels and class probabilities from as few passes as possible
         
-        return metrics
+        Labels are the argmax of one predict_proba call, except for models
+        whose probabilities are calibrated separately from their decisions
+        (SVC's Platt scaling), which need their own predict call.
+        """
+        if not hasattr(model, 'predict_proba'):
+            return model.predict(X_test), None
+        if is_instance(model, SEPARATE_PROBA_ESTIMATORS):
+            # libsvm copies float32 rows to float64 on every call; convert once for both
+            X_test = as_float64(X_test)
+            return model.predict(X_test), model.predict_proba(X_test)
+        y_proba = model.predict_proba(X_test)
+        return model.classes_[np.argmax(y_proba, axis=1)], y_proba
     
-    def _calculate_regression_metrics(self, y_true, y_pred) -> dict:
-        """Calculate regression metrics"""
-        return {
-            'mse': mean_squared_error(y_true, y_pred),
-            'mae': mean_absolute_error(y_true, y_pred),
-            'r2_score': r2_score(y_true, y_pred)
-        }
-    
-    def _calculate_clustering_metrics(self, X, labels) -> dict:
-        """Calculate clustering metrics"""
-        try:
-            silhouette_avg = silhouette_score(X, labels)
-        except:
-            silhouette_avg = 0.0
+    def calculate_clustering_metrics(self, X, labels) -> dict:
+        """
+        Calculate clustering metrics in time linear in the number of rows
         
-        # Calculate inertia (sum of squared distances to centroids)
-        try:
-            # This is a simplified inertia calculation
-            inertia = np.sum([np.min([np.sum((x - c)**2) for c in np.unique(labels)]) for x in X.values])
-        except:
-            inertia = 0.0
+        Inertia is measured against each cluster's centroid; the silhouette
+        score, which is quadratic, is estimated on a sample of rows. X is
+        scored as it is, sparse or float32, without a dense float64 copy.
+        """
+        is_sparse = sparse.issparse(X)
+        if not is_sparse:
+            X = np.asarray(X)
+        labels = np.asarray(labels)
+        _, cluster_of, sizes = np.unique(labels, return_inverse=True, return_counts=True)
         
-        return {
-            'silhouette_score': silhouette_avg,
-            'inertia': inertia
-        }
\ No newline at end of file
+        # Per-cluster sums via a sparse membership matrix: sum ||x - c||^2 = sum ||x||^2 - sum ||S_k||^2 / n_k
+        membership = sparse.csr_matrix(
+            (np.ones(len(labels)), (cluster_of, np.arange(len(labels)))), shape=(len(sizes), len(labels))
+        )
+        cluster_sums = membership @ X
+        cluster_sums = cluster_sums.toarray() if sparse.issparse(cluster_sums) else np.asarray(cluster_sums)
+        row_norms = (
+            np.asarray(X.multiply(X).sum(axis=1), dtype=np.float64).ravel() if is_sparse
+            else np.einsum('ij,ij->i', X, X, dtype=np.float64)
+        )
+        inertia = max(0.0, float(row_norms.sum() - ((cluster_sums ** 2).sum(axis=1) / sizes).sum()))
+        
+        metrics = {
+            'silhouette_score': 0.0,
+            'inertia': inertia,
+            'n_clusters': float(len(sizes) - (1 if -1 in labels else 0))
+        }
+        if 2 <= len(sizes) < len(labels):
+            metrics['silhouette_score'] = float(silhouette_score(
+                X, labels, sample_size=min(self.silhouette_sample, len(labels)), random_state=42
+            ))
+            if is_sparse:
+                # scikit-learn's versions only take dense input; both follow from the cluster sums
+                centroids = cluster_sums / sizes[:, None]
+                metrics['calinski_harabasz_score'] = _calinski_harabasz(cluster_sums, sizes, inertia)
+                metrics['davies_bouldin_score'] = _davies_bouldin(X, cluster_of, sizes, centroids, row_norms)
+            else:
+                metrics['calinski_harabasz_score'] = float(calinski_harabasz_score(X, labels))
+                metrics['davies_bouldin_score'] = float(davies_bouldin_score(X, labels))
+        
+        return metrics
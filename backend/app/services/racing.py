@@ -0,0 +1,187 @@
+"""Successive-halving model racing"""
+
+import math
+import logging
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from app.models.requests import ComparisonOptions
+from app.models.responses import ModelResult, RacingRung, RacingSummary, RungResult
+from app.services.model_runner import STATUS_FAILED, TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+
+logger = logging.getLogger(__name__)
+
+# Metric used to rank models between rungs (higher is better)
+PRIMARY_METRICS = {
+    'classification': 'accuracy',
+    'regression': 'r2_score',
+}
+
+class SuccessiveHalvingRacer:
+    """
+    Rank models by racing them on growing subsamples of the training data
+
+    Every candidate is trained on a small stratified subsample; only the
+    best ``1/eta`` of them are promoted to the next rung, which uses ``eta``
+    times more rows, until the survivors are trained on the full data.
+    All rungs are evaluated on the full test set.
+    """
+
+    def __init__(self, trainer: ModelTrainer, min_rows: int = 100, random_state: int = 42):
+        self.trainer = trainer
+        self.min_rows = min_rows
+        self.random_state = random_state
+
+    def rung_fractions(self, n_rows: int, min_fraction: float, eta: int) -> List[float]:
+        """Data fractions for each rung, ending with the full training set"""
+        smallest = min(1.0, max(min_fraction, self.min_rows / max(1, n_rows)))
+        n_rungs = int(math.ceil(math.log(1.0 / smallest, eta) - 1e-9)) + 1
+        fractions = [min(1.0, smallest * eta ** i) for i in range(n_rungs)]
+        fractions[-1] = 1.0
+        return sorted(set(fractions))
+
+    async def race(
+        self,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        task_type: str,
+        options: ComparisonOptions,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        artifact_dir: Optional[str] = None
+    ) -> Tuple[List[ModelResult], RacingSummary]:
+        """
+        Race every configured model for a supervised task
+
+        Only the models trained on the last rung are saved to ``artifact_dir``.
+
+        Returns:
+            Tuple of (results in models_config order, racing summary). Each
+            result carries its per-rung metrics; eliminated models report
+            their last rung and have status ``eliminated``, and models that
+            fail after a completed rung report status ``failed``.
+        """
+        metric = PRIMARY_METRICS[task_type]
+        eta = options.racing_eta
+        fractions = self.rung_fractions(X_train.shape[0], options.racing_min_fraction, eta)
+        survivors = list(self.trainer.models_config.get(task_type, {}))
+        history: Dict[str, List[RungResult]] = {name: [] for name in survivors}
+        final: Dict[str, ModelResult] = {}
+        rungs: List[RacingRung] = []
+
+        for rung_index, fraction in enumerate(fractions):
+            is_last = rung_index == len(fractions) - 1
+            X_rung, y_rung = self.subsample(X_train, y_train, fraction, task_type)
+            logger.info(f"Racing rung {rung_index}: {len(survivors)} models on {X_rung.shape[0]} rows")
+
+            results = await self.trainer.train_all_models(
+                X_rung, X_test, y_rung, y_test, task_type,
+                on_result=on_result if is_last else None,
+                model_names=survivors,
+                limits=limits,
+                artifact_dir=artifact_dir if is_last else None
+            )
+            for result in results:
+                history[result.name].append(RungResult(
+                    fraction=fraction,
+                    rows=X_rung.shape[0],
+                    metrics=result.metrics,
+                    training_time=result.training_time
+                ))
+                final[result.name] = result
+            # The trainer drops failed models; an earlier rung's result must not stand in for them
+            returned = {result.name for result in results}
+            for name in survivors:
+                if name in final and name not in returned:
+                    final[name] = ModelResult(
+                        name=name, metrics={}, training_time=0.0, type=task_type, status=STATUS_FAILED
+                    )
+
+            # Models that failed or hit a limit on this rung drop out of the race
+            trained = [result.name for result in results if result.status == "completed"]
+            if is_last:
+                keep = trained
+            else:
+                ranked = sorted(
+                    (result for result in results if result.status == "completed"),
+                    key=lambda r: r.metrics.get(metric, float('-inf')),
+                    reverse=True
+                )
+                keep = [result.name for result in ranked[:max(1, math.ceil(len(ranked) / eta))]]
+            eliminated = [name for name in survivors if name not in keep]
+            rungs.append(RacingRung(
+                fraction=fraction, rows=X_rung.shape[0], models=survivors, eliminated=eliminated
+            ))
+
+            for name in eliminated:
+                if name not in final:
+                    continue
+                if final[name].status == "completed":
+                    final[name].status = "eliminated"
+                # Last-rung outcomes were already reported by the trainer, except failures
+                if on_result is not None and (not is_last or name not in returned):
+                    await on_result(final[name])
+            survivors = [name for name in survivors if name in keep]
+            if not survivors:
+                break
+
+        model_results = []
+        for name in self.trainer.models_config.get(task_type, {}):
+            if name in final:
+                final[name].rungs = history[name]
+                model_results.append(final[name])
+
+        return model_results, self._summarize(metric, rungs, model_results)
+
+    def subsample(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        fraction: float,
+        task_type: str
+    ) -> Tuple[pd.DataFrame, pd.Series]:
+        """Draw a (stratified, for classification) subsample of the training rows"""
+        if fraction >= 1.0:
+            return X, y
+        try:
+            X_sub, _, y_sub, _ = train_test_split(
+                X, y, train_size=fraction, random_state=self.random_state,
+                stratify=y if task_type == 'classification' else None
+            )
+        except ValueError:
+            # Too few rows of some class to stratify; fall back to a plain sample
+            X_sub, _, y_sub, _ = train_test_split(
+                X, y, train_size=fraction, random_state=self.random_state
+            )
+        return X_sub, y_sub
+
+    def _summarize(
+        self,
+        metric: str,
+        rungs: List[RacingRung],
+        model_results: List[ModelResult]
+    ) -> RacingSummary:
+        """
+        Estimate the compute saved compared with training everything on all rows
+
+        Eliminated models' full-data cost is extrapolated linearly in the
+        number of rows from their last rung, so the saving is an estimate.
+        """
+        spent = sum(rung.training_time for result in model_results for rung in result.rungs)
+        full_estimate = 0.0
+        for result in model_results:
+            last = result.rungs[-1]
+            full_estimate += last.training_time / last.fraction
+        saved = max(0.0, full_estimate - spent)
+        return RacingSummary(
+            primary_metric=metric,
+            rungs=rungs,
+            training_time=spent,
+            estimated_full_training_time=full_estimate,
+            compute_saved_seconds=saved,
+            compute_saved_ratio=saved / full_estimate if full_estimate else 0.0
+        )
@@ -0,0 +1,158 @@
+"""Content-addressed cache of comparison results"""
+
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from app.models.responses import CacheStats, ComparisonResponse
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    Two-tier cache of ComparisonResponses keyed by dataset and configuration
+
+    The memory tier keeps the ``max_entries`` most recently used results.
+    When ``disk_dir`` is set, results are also written there as JSON and the
+    least recently used files are removed once ``max_disk_bytes`` is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, ComparisonResponse]" = OrderedDict()
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(content_digest: str, config_fingerprint: str, code_version: str) -> str:
+        """Combine the upload's SHA-256 with the model config and code version"""
+        digest = hashlib.sha256()
+        for part in (code_version, config_fingerprint, content_digest):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[ComparisonResponse]:
+        """Return a copy of the cached response, or None on a miss"""
+        response = self._memory.get(key)
+        if response is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return response.model_copy(deep=True)
+
+        response = self._read_disk(key)
+        if response is not None:
+            self.disk_hits += 1
+            self._remember(key, response)
+            return response.model_copy(deep=True)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: ComparisonResponse):
+        """Store a response in memory and, if configured, on disk"""
+        self._remember(key, response.model_copy(deep=True))
+        if self.disk_dir:
+            self._write_disk(key, response)
+
+    def stats(self) -> CacheStats:
+        """Current hit/miss counters and tier sizes"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return CacheStats(
+            hits=hits,
+            misses=self.misses,
+            memory_hits=self.memory_hits,
+            disk_hits=self.disk_hits,
+            hit_ratio=hits / lookups if lookups else 0.0,
+            memory_entries=len(self._memory),
+            disk_bytes=self._disk_bytes
+        )
+
+    def _remember(self, key: str, response: ComparisonResponse):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[ComparisonResponse]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                response = ComparisonResponse.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            self._remove_disk(path)
+            return None
+        # Touch the file so disk eviction follows recency of use
+        os.utime(path)
+        return response
+
+    def _write_disk(self, key: str, response: ComparisonResponse):
+        path = self._path(key)
+        data = response.model_dump_json().encode()
+        if len(data) > self.max_disk_bytes:
+            return
+        try:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+            return
+        self._disk_bytes += len(data) - previous
+        self._evict_disk()
+
+    def _disk_entries(self):
+        """Yield (path, size, mtime) for every cache file"""
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """Remove least recently used files until the tier fits its size cap"""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for path, _, _ in sorted(self._disk_entries(), key=lambda entry: entry[2]):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove_disk(path)
+
+    def _remove_disk(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        self._disk_bytes -= size
@@ -0,0 +1,140 @@
+"""Scalable stand-ins for estimators that slow down sharply on large datasets"""
+
+import json
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple
+from sklearn.base import clone
+
+from app.models.responses import ModelVariant
+from app.services.estimators import is_instance, resolve
+from app.services.scheduler import DatasetShape
+
+logger = logging.getLogger(__name__)
+
+# Kernel approximation size of the SVM variants
+NYSTROEM_COMPONENTS = 300
+# Folds of the Platt calibration giving the SVC variant its probabilities
+CALIBRATION_FOLDS = 3
+
+class ScalableVariants:
+    """
+    Swap estimators that scale badly for scalable equivalents on large datasets
+
+    From ``min_rows`` training rows or ``min_features`` features on, with
+    ``n_jobs`` threads per fit:
+
+    - SVC and SVR become an RBF kernel approximation (Nystroem) feeding a
+      linear SVM; SVC's probabilities come from a 3-fold Platt calibration
+      instead of libsvm's internal 5-fold CV
+    - GradientBoosting* becomes HistGradientBoosting*, on dense features
+      only (histogram boosting needs a dense copy)
+    - KNeighbors* queries, and RandomForest* builds its trees, on
+      ``n_jobs`` threads. Neighbours stay exact: ``algorithm='auto'``
+      already indexes low-dimensional data in a tree, and above a few
+      dozen features BLAS brute force beats trees and approximate search
+
+    Other estimators are kept. Each swap is reported with the reason.
+    """
+
+    def __init__(self, min_rows: int, min_features: int, random_state: int = 42):
+        self.min_rows = min_rows
+        self.min_features = min_features
+        self.random_state = random_state
+
+    def fingerprint(self) -> str:
+        """Stable hash of the thresholds, for result cache keys"""
+        encoded = json.dumps([self.min_rows, self.min_features, self.random_state])
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def select(
+        self,
+        prototypes: Dict[str, object],
+        shape: DatasetShape,
+        n_jobs: int = 1,
+        sparse_input: bool = False
+    ) -> Tuple[Dict[str, object], Dict[str, ModelVariant]]:
+        """The prototypes to train on a dataset of ``shape``, and the swaps made by model name"""
+        if shape.rows >= self.min_rows:
+            trigger = f"{shape.rows} training rows (SCALABLE_MIN_ROWS={self.min_rows})"
+        elif shape.features >= self.min_features:
+            trigger = f"{shape.features} features (SCALABLE_MIN_FEATURES={self.min_features})"
+        else:
+            return dict(prototypes), {}
+
+        selected, variants = {}, {}
+        for model_name, prototype in prototypes.items():
+            swap = self._variant(prototype, shape, n_jobs, sparse_input)
+            if swap is None:
+                selected[model_name] = prototype
+                continue
+            selected[model_name], description, why = swap
+            variants[model_name] = ModelVariant(
+                configured=type(prototype).__name__, estimator=description, reason=f"{trigger}: {why}"
+            )
+        if variants:
+            logger.info(f"Scalable variants for {trigger}: {', '.join(variants)}")
+        return selected, variants
+
+    def _variant(
+        self, prototype, shape: DatasetShape, n_jobs: int, sparse_input: bool
+    ) -> Optional[Tuple[object, str, str]]:
+        """(estimator, description, why) of a prototype's variant, or None to keep it"""
+        params = prototype.get_params()
+        random_state = params.get('random_state', self.random_state)
+
+        if is_instance(prototype, ('sklearn.svm:SVC', 'sklearn.svm:SVR')) and params['kernel'] == 'rbf':
+            kernel = resolve('sklearn.kernel_approximation:Nystroem')(
+                gamma=params['gamma'] if not isinstance(params['gamma'], str) else None,
+                n_components=min(NYSTROEM_COMPONENTS, shape.rows),
+                random_state=random_state
+            )
+            why = "the RBF kernel matrix grows with the square of the rows"
+            if is_instance(prototype, 'sklearn.svm:SVR'):
+                svm = resolve('sklearn.svm:LinearSVR')(
+                    C=params['C'], epsilon=params['epsilon'], dual='auto', random_state=random_state
+                )
+                return self._pipeline(kernel, svm), "Nystroem + LinearSVR", why
+            svm = self._pipeline(kernel, resolve('sklearn.svm:LinearSVC')(
+                C=params['C'], dual='auto', random_state=random_state
+            ))
+            if not params['probability']:
+                return svm, "Nystroem + LinearSVC", why
+            calibrated = resolve('sklearn.calibration:CalibratedClassifierCV')(estimator=svm, cv=CALIBRATION_FOLDS)
+            return (
+                calibrated,
+                f"Nystroem + LinearSVC, {CALIBRATION_FOLDS}-fold calibrated",
+                f"{why}, and probability=True refits it in an internal 5-fold CV"
+            )
+
+        for configured, histogram in (
+            ('sklearn.ensemble:GradientBoostingClassifier', 'sklearn.ensemble:HistGradientBoostingClassifier'),
+            ('sklearn.ensemble:GradientBoostingRegressor', 'sklearn.ensemble:HistGradientBoostingRegressor'),
+        ):
+            if is_instance(prototype, configured) and not sparse_input:
+                estimator = resolve(histogram)(
+                    learning_rate=params['learning_rate'], max_iter=params['n_estimators'], random_state=random_state
+                )
+                return (
+                    estimator, type(estimator).__name__,
+                    "GradientBoosting sorts every feature on a single thread, histogram boosting bins them once "
+                    "and uses every core"
+                )
+
+        threaded = (
+            'sklearn.neighbors:KNeighborsClassifier', 'sklearn.neighbors:KNeighborsRegressor',
+            'sklearn.ensemble:RandomForestClassifier', 'sklearn.ensemble:RandomForestRegressor',
+        )
+        if is_instance(prototype, threaded) and params['n_jobs'] is None and n_jobs > 1:
+            estimator = clone(prototype).set_params(n_jobs=n_jobs)
+            why = (
+                "neighbour queries of the test split run on one thread"
+                if is_instance(prototype, threaded[:2]) else "trees are built one after another"
+            )
+            return estimator, f"{type(prototype).__name__} (n_jobs={n_jobs})", why
+
+        return None
+
+    @staticmethod
+    def _pipeline(*steps):
+        return resolve('sklearn.pipeline:make_pipeline')(*steps)
@@ -0,0 +1,227 @@
+"""Training cost model and longest-first scheduling of training runs"""
+
+import os
+import json
+import math
+import heapq
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.models.responses import ModelResult, ModelVariant, ScheduleSummary
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class DatasetShape:
+    """Size of a training set as seen by the cost model"""
+    rows: int
+    features: int
+    classes: int = 1
+
+    @classmethod
+    def of(cls, X, y: Optional[pd.Series], task_type: str) -> "DatasetShape":
+        classes = int(pd.Series(y).nunique()) if task_type == 'classification' and y is not None else 1
+        return cls(rows=X.shape[0], features=X.shape[1], classes=classes)
+
+    def vector(self) -> np.ndarray:
+        """Regressors of the cost model: [1, log rows, log features, log classes]"""
+        return np.array([1.0] + [math.log(max(1, value)) for value in (self.rows, self.features, self.classes)])
+
+# Prior training time of each estimator class, as (seconds at one row, feature
+# and class, row exponent, feature exponent, class exponent); fitted to single-core
+# runs of the scikit-learn defaults on dense features, including scoring the test split
+PRIOR_COSTS: Dict[str, Tuple[float, float, float, float]] = {
+    'LogisticRegression': (1.5e-5, 0.5, 1.0, 0.5),
+    'LinearRegression': (2e-6, 0.5, 1.5, 0.0),
+    'DecisionTreeClassifier': (5e-7, 1.05, 1.0, 0.0),
+    'DecisionTreeRegressor': (1e-6, 1.05, 1.0, 0.0),
+    'RandomForestClassifier': (5e-5, 1.05, 0.5, 0.0),
+    'RandomForestRegressor': (6e-5, 1.05, 1.0, 0.0),
+    'SVC': (6e-8, 1.6, 1.0, 0.5),  # probability=True adds an internal 5-fold fit
+    'SVR': (1e-7, 1.6, 1.0, 0.0),
+    'KNeighborsClassifier': (1e-9, 1.85, 1.0, 0.0),  # Dominated by scoring the test split
+    'KNeighborsRegressor': (1e-9, 1.85, 1.0, 0.0),
+    'GaussianNB': (7e-7, 0.7, 1.0, 1.0),
+    'GradientBoostingClassifier': (1.5e-5, 1.05, 1.0, 1.0),
+    'GradientBoostingRegressor': (2.5e-5, 1.05, 1.0, 0.0),
+    'HistGradientBoostingClassifier': (6.5e-5, 0.6, 0.95, 1.0),  # Early stopping from 10000 rows
+    'HistGradientBoostingRegressor': (1.3e-4, 0.6, 0.95, 0.0),
+    'Pipeline(Nystroem,LinearSVC)': (1.4e-5, 1.1, 0.1, 0.5),  # Fixed-size kernel approximation
+    'CalibratedClassifierCV(Pipeline(Nystroem,LinearSVC))': (5.4e-5, 1.1, 0.1, 0.5),
+    'Pipeline(Nystroem,LinearSVR)': (2.9e-5, 1.0, 0.15, 0.0),
+    'MLPClassifier': (6e-3, 0.6, 0.5, 0.0),  # Converges in fewer epochs on more rows
+    'MLPRegressor': (6e-3, 0.6, 0.5, 0.0),
+    'KMeans': (1e-6, 1.0, 1.0, 0.0),
+    'MiniBatchKMeans': (2e-7, 1.0, 1.0, 0.0),
+    'AgglomerativeClustering': (2e-8, 2.0, 1.0, 0.0),
+    'DBSCAN': (1e-8, 1.5, 1.0, 0.0),
+}
+DEFAULT_PRIOR = (1e-6, 1.0, 1.0, 0.0)
+
+class CostModel:
+    """
+    Predict an estimator's training time from the dataset shape
+
+    Per estimator class, ``log(seconds)`` is linear in the logs of the
+    rows, features and classes. The coefficients start at the class's
+    prior in PRIOR_COSTS and are refitted by ridge regression toward it
+    on the latest ``max_observations`` measured training times. The
+    intercept is held loosely, so a few runs calibrate the scale to this
+    machine, while the exponents move only when runs of different sizes
+    disagree with the prior. Observations are kept in ``path`` (JSON)
+    when given, so the model keeps learning across restarts.
+    """
+
+    # Ridge strength pulling [intercept, row, feature, class] coefficients to the prior
+    PRIOR_WEIGHTS = np.array([0.5, 20.0, 20.0, 20.0])
+
+    def __init__(self, path: Optional[str] = None, max_observations: int = 200):
+        self.path = path
+        self.max_observations = max_observations
+        # Estimator class -> [[rows, features, classes, seconds], ...], oldest first
+        self.observations: Dict[str, List[List[float]]] = {}
+        self._coefficients: Dict[str, np.ndarray] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.observations = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable cost model history {path}: {str(e)}")
+
+    @staticmethod
+    def key(estimator) -> str:
+        """Estimator class, with the steps of a pipeline and the estimator a calibration wraps"""
+        name = type(estimator).__name__
+        if hasattr(estimator, 'steps'):
+            return f"{name}({','.join(CostModel.key(step) for _, step in estimator.steps)})"
+        if name == 'CalibratedClassifierCV':
+            return f"{name}({CostModel.key(estimator.estimator)})"
+        return name
+
+    def predict(self, estimator, shape: DatasetShape) -> float:
+        """Predicted training time in seconds"""
+        return float(math.exp(self._coefficients_for(self.key(estimator)) @ shape.vector()))
+
+    def observe(self, estimator, shape: DatasetShape, seconds: float):
+        """Learn from one measured training time"""
+        key = self.key(estimator)
+        history = self.observations.setdefault(key, [])
+        history.append([shape.rows, shape.features, shape.classes, max(seconds, 1e-4)])
+        del history[:-self.max_observations]
+        self._coefficients.pop(key, None)
+
+    @property
+    def observation_count(self) -> int:
+        return sum(len(history) for history in self.observations.values())
+
+    def save(self):
+        """Write the observations to ``path``, if set"""
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.observations, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save cost model history: {str(e)}")
+
+    def _coefficients_for(self, key: str) -> np.ndarray:
+        if key not in self._coefficients:
+            scale, *exponents = PRIOR_COSTS.get(key, DEFAULT_PRIOR)
+            prior = np.array([math.log(scale)] + exponents)
+            history = self.observations.get(key)
+            if history:
+                A = np.array([DatasetShape(int(r), int(f), int(c)).vector() for r, f, c, _ in history])
+                b = np.log([seconds for *_, seconds in history])
+                penalty = np.diag(self.PRIOR_WEIGHTS)
+                prior = np.linalg.solve(A.T @ A + penalty, A.T @ b + penalty @ prior)
+            self._coefficients[key] = prior
+        return self._coefficients[key]
+
+def longest_first(predicted: Dict[str, float], workers: int) -> Tuple[List[str], float]:
+    """
+    Longest-predicted-first order and the wall time it is predicted to take
+
+    Each free worker takes the longest remaining run, so the slowest
+    models start first instead of becoming the tail of the request.
+    """
+    order = sorted(predicted, key=lambda name: predicted[name], reverse=True)
+    loads = [0.0] * max(1, workers)
+    for name in order:
+        heapq.heappush(loads, heapq.heappop(loads) + predicted[name])
+    return order, max(loads)
+
+@dataclass
+class TrainingSchedule:
+    """Models to train, longest predicted first"""
+    order: List[str]
+    predicted: Dict[str, float]  # Seconds, for every candidate including skipped ones
+    workers: int
+    makespan: float  # Predicted wall time of the schedule
+    latency_target: Optional[float] = None
+    skipped: List[str] = field(default_factory=list)  # Predicted not to fit the latency target
+    observations: int = 0  # Measurements the cost model had learned from
+    prototypes: Dict[str, object] = field(default_factory=dict)  # Every candidate, in config order
+    variants: Dict[str, ModelVariant] = field(default_factory=dict)  # Scalable variants among the prototypes
+
+    def scheduled(self) -> Dict[str, object]:
+        """Prototypes of the models to train, in config order"""
+        return {name: prototype for name, prototype in self.prototypes.items() if name in self.order}
+
+    def summary(self, results: List[ModelResult]) -> ScheduleSummary:
+        """Summary for the response, with the accuracy of the predictions against ``results``"""
+        errors = [
+            abs(math.log(self.predicted[result.name] / max(result.training_time, 1e-4)))
+            for result in results
+            if result.status == "completed" and result.name in self.predicted
+        ]
+        return ScheduleSummary(
+            order=self.order,
+            workers=self.workers,
+            predicted_makespan=self.makespan,
+            latency_target=self.latency_target,
+            skipped=self.skipped,
+            observations=self.observations,
+            median_error_factor=float(math.exp(np.median(errors))) if errors else None,
+            variants={name: variant for name, variant in self.variants.items() if name in self.order}
+        )
+
+def plan_schedule(
+    cost_model: CostModel,
+    prototypes: Dict[str, object],
+    shape: DatasetShape,
+    workers: int,
+    latency_target: Optional[float] = None
+) -> TrainingSchedule:
+    """
+    Order models longest-first, optionally keeping only those that fit ``latency_target``
+
+    With a latency target, models are admitted cheapest first for as long
+    as the predicted wall time stays within it; the cheapest model is
+    always kept so the comparison has a result.
+    """
+    predicted = {name: cost_model.predict(prototype, shape) for name, prototype in prototypes.items()}
+    selected, skipped = dict(predicted), []
+    if latency_target is not None:
+        selected = {}
+        for name in sorted(predicted, key=lambda name: predicted[name]):
+            trial = {**selected, name: predicted[name]}
+            if selected and longest_first(trial, workers)[1] > latency_target:
+                skipped.append(name)
+            else:
+                selected = trial
+    order, makespan = longest_first(selected, workers)
+    return TrainingSchedule(
+        order=order,
+        predicted=predicted,
+        workers=workers,
+        makespan=makespan,
+        latency_target=latency_target,
+        skipped=[name for name in prototypes if name in skipped],
+        observations=cost_model.observation_count,
+        prototypes=dict(prototypes)
+    )
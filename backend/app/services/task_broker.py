@@ -0,0 +1,292 @@
+"""Task queues that hand model training work to separate worker processes"""
+
+import time
+import pickle
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional
+
+from app.models.responses import ModelResult
+
+logger = logging.getLogger(__name__)
+
+# Task states
+TASK_QUEUED = "queued"
+TASK_RUNNING = "running"
+TASK_COMPLETED = "completed"
+TASK_FAILED = "failed"
+
+@dataclass
+class TrainingTask:
+    """One model to train on one stored dataset"""
+    task_id: str
+    group_id: str  # Comparison the task belongs to
+    dataset_id: str  # Stored dataset holding the preprocessed split
+    model_name: str
+    task_type: str
+    prototype: Any  # Unfitted estimator, with its configured parameters
+    artifact_path: Optional[str] = None  # Where the worker saves the fitted model
+    attempts: int = 0  # Claims so far, including the current one
+
+@dataclass
+class TaskRecord:
+    """State of a queued task as seen by the comparison that submitted it"""
+    task_id: str
+    model_name: str
+    status: str
+    attempts: int
+    worker_id: Optional[str] = None
+    started_at: Optional[float] = None  # time.time() of the latest claim
+    result: Optional[ModelResult] = None
+    error: Optional[str] = None
+
+class TaskBroker(ABC):
+    """
+    Interface between comparisons that submit training tasks and the workers that run them
+
+    A worker claims a task for a lease and keeps it alive with heartbeats;
+    both calls also mark the worker as alive, so comparisons can tell
+    whether anyone is left to take their tasks.
+    A task whose lease runs out is lost (its worker crashed, was killed or
+    lost its node) and is handed to another worker, up to a maximum number
+    of attempts. Results of a task that was discarded or reassigned
+    meanwhile are rejected. Implementations may be backed by anything all
+    workers can reach; :class:`SQLiteTaskBroker` is the local reference.
+    """
+
+    @abstractmethod
+    def submit(self, tasks: List[TrainingTask]):
+        """Queue tasks; they are claimed in submission order"""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[TrainingTask]:
+        """Lease the next waiting (or lost) task to a worker, or None if there is none"""
+
+    @abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Extend a worker's lease; False once the task is no longer the worker's"""
+
+    @abstractmethod
+    def complete(self, task_id: str, worker_id: str, result: ModelResult) -> bool:
+        """Record a task's result; False (and nothing recorded) if the task is no longer the worker's"""
+
+    @abstractmethod
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        """Record that a task raised; such failures are not retried"""
+
+    @abstractmethod
+    def live_workers(self) -> int:
+        """Workers that polled for a task or renewed a lease within the lease period"""
+
+    @abstractmethod
+    def status(self, group_id: str) -> List[TaskRecord]:
+        """Every task of a comparison, after failing those lost too often"""
+
+    @abstractmethod
+    def discard(self, group_id: str, task_ids: Optional[List[str]] = None):
+        """Remove a comparison's tasks (all of them by default), finished or not"""
+
+class SQLiteTaskBroker(TaskBroker):
+    """
+    Task queue in one SQLite database file
+
+    Every call opens its own connection, so the broker can be shared by
+    threads and by every process that can open the file. Claims take the
+    database write lock, so each task goes to exactly one worker.
+    Estimator prototypes are stored pickled: only trusted processes
+    should be able to write to the file.
+
+    By default the database uses write-ahead logging, so reads never wait
+    for the writer. WAL keeps its index in shared memory and only works
+    between processes on one host. With ``shared=True`` the default
+    rollback journal is used instead, for a file that workers on other
+    hosts open over a network filesystem. That is only safe where the
+    filesystem implements POSIX byte-range locks correctly (NFSv4 with
+    locking enabled, for example); many network filesystems do not, and
+    a queue on one of them can hand a task to two workers or be corrupted.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 30.0, max_attempts: int = 3, shared: bool = False):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.shared = shared
+        # The journal mode is kept in the file, so it is set either way; outside a transaction
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute(f"PRAGMA journal_mode={'DELETE' if shared else 'WAL'}")
+        finally:
+            conn.close()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_id TEXT UNIQUE NOT NULL,
+                    group_id TEXT NOT NULL,
+                    dataset_id TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    prototype BLOB NOT NULL,
+                    artifact_path TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    started_at REAL,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_group ON tasks (group_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connection inside a write transaction, committed on success"""
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def submit(self, tasks: List[TrainingTask]):
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO tasks (task_id, group_id, dataset_id, model_name, task_type, prototype, artifact_path, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        task.task_id, task.group_id, task.dataset_id, task.model_name, task.task_type,
+                        pickle.dumps(task.prototype), task.artifact_path, TASK_QUEUED
+                    )
+                    for task in tasks
+                ]
+            )
+
+    def claim(self, worker_id: str) -> Optional[TrainingTask]:
+        now = time.time()
+        with self._transaction() as conn:
+            self._seen(conn, worker_id, now)
+            self._reap(conn, now)
+            row = conn.execute(
+                """
+                SELECT task_id, group_id, dataset_id, model_name, task_type, prototype, artifact_path, attempts
+                FROM tasks WHERE status = ? ORDER BY seq LIMIT 1
+                """,
+                (TASK_QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, group_id, dataset_id, model_name, task_type, prototype, artifact_path, attempts = row
+            conn.execute(
+                """
+                UPDATE tasks SET status = ?, attempts = ?, worker_id = ?, started_at = ?, lease_expires = ?
+                WHERE task_id = ?
+                """,
+                (TASK_RUNNING, attempts + 1, worker_id, now, now + self.lease_seconds, task_id)
+            )
+        return TrainingTask(
+            task_id, group_id, dataset_id, model_name, task_type, pickle.loads(prototype), artifact_path, attempts + 1
+        )
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            self._seen(conn, worker_id, now)
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE task_id = ? AND worker_id = ? AND status = ?",
+                (now + self.lease_seconds, task_id, worker_id, TASK_RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str, result: ModelResult) -> bool:
+        return self._finish(task_id, worker_id, TASK_COMPLETED, result=result.model_dump_json())
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(task_id, worker_id, TASK_FAILED, error=error)
+
+    def _finish(self, task_id: str, worker_id: str, status: str, result: Optional[str] = None,
+                error: Optional[str] = None) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE tasks SET status = ?, result = ?, error = ?, lease_expires = NULL
+                WHERE task_id = ? AND worker_id = ? AND status = ?
+                """,
+                (status, result, error, task_id, worker_id, TASK_RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def live_workers(self) -> int:
+        with self._transaction() as conn:
+            cutoff = time.time() - self.lease_seconds
+            conn.execute("DELETE FROM workers WHERE last_seen < ?", (cutoff,))
+            return conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+
+    def status(self, group_id: str) -> List[TaskRecord]:
+        with self._transaction() as conn:
+            self._reap(conn, time.time())
+            rows = conn.execute(
+                """
+                SELECT task_id, model_name, status, attempts, worker_id, started_at, result, error
+                FROM tasks WHERE group_id = ? ORDER BY seq
+                """,
+                (group_id,)
+            ).fetchall()
+        return [
+            TaskRecord(
+                task_id, model_name, status, attempts, worker_id, started_at,
+                ModelResult.model_validate_json(result) if result is not None else None, error
+            )
+            for task_id, model_name, status, attempts, worker_id, started_at, result, error in rows
+        ]
+
+    def discard(self, group_id: str, task_ids: Optional[List[str]] = None):
+        with self._transaction() as conn:
+            if task_ids is None:
+                conn.execute("DELETE FROM tasks WHERE group_id = ?", (group_id,))
+            else:
+                conn.executemany(
+                    "DELETE FROM tasks WHERE group_id = ? AND task_id = ?",
+                    [(group_id, task_id) for task_id in task_ids]
+                )
+
+    def _seen(self, conn: sqlite3.Connection, worker_id: str, now: float):
+        conn.execute(
+            "INSERT INTO workers (worker_id, last_seen) VALUES (?, ?) "
+            "ON CONFLICT (worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (worker_id, now)
+        )
+
+    def _reap(self, conn: sqlite3.Connection, now: float):
+        """Requeue running tasks whose lease ran out, or fail them once out of attempts"""
+        lost = conn.execute(
+            "SELECT task_id, worker_id, attempts FROM tasks WHERE status = ? AND lease_expires < ?",
+            (TASK_RUNNING, now)
+        ).fetchall()
+        for task_id, worker_id, attempts in lost:
+            if attempts < self.max_attempts:
+                logger.warning(f"Task {task_id} lost by {worker_id}; requeueing (attempt {attempts})")
+                conn.execute(
+                    "UPDATE tasks SET status = ?, worker_id = NULL, lease_expires = NULL WHERE task_id = ?",
+                    (TASK_QUEUED, task_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, lease_expires = NULL WHERE task_id = ?",
+                    (TASK_FAILED, f"Lost by worker {worker_id} after {attempts} attempts", task_id)
+                )
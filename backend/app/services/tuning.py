@@ -0,0 +1,344 @@
+"""Hyperparameter tuning with halving random search over shared folds"""
+
+import os
+import math
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform, randint
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler
+
+from app.models.requests import ComparisonOptions
+from app.models.responses import ModelResult, TuningRung, TuningSummary
+from app.services.cross_validation import CVPlan
+from app.services.model_runner import TrainingLimits
+from app.services.model_trainer import ModelTrainer, ResultCallback
+from app.services.racing import PRIMARY_METRICS, SuccessiveHalvingRacer
+from app.services.scheduler import DatasetShape
+from app.utils.data_preprocessor import FeatureMatrix
+
+logger = logging.getLogger(__name__)
+
+# Search space per model family; families without one keep their defaults
+SEARCH_SPACES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    'classification': {
+        'Logistic Regression': {'C': loguniform(1e-3, 1e2)},
+        'Decision Tree': {
+            'max_depth': [None, 3, 5, 8, 12, 20],
+            'min_samples_leaf': randint(1, 20),
+            'criterion': ['gini', 'entropy'],
+        },
+        'Random Forest': {
+            'n_estimators': [50, 100, 200],
+            'max_depth': [None, 5, 10, 20],
+            'max_features': ['sqrt', 'log2', None],
+            'min_samples_leaf': randint(1, 10),
+        },
+        'SVM': {'C': loguniform(1e-2, 1e2), 'gamma': loguniform(1e-4, 1e0)},
+        'K-Nearest Neighbors': {
+            'n_neighbors': randint(1, 31),
+            'weights': ['uniform', 'distance'],
+            'p': [1, 2],
+        },
+        'Naive Bayes': {'var_smoothing': loguniform(1e-12, 1e-6)},
+        'Gradient Boosting': {
+            'learning_rate': loguniform(1e-2, 3e-1),
+            'n_estimators': [50, 100, 200],
+            'max_depth': [2, 3, 4, 5],
+            'subsample': [0.6, 0.8, 1.0],
+        },
+        'Neural Network': {
+            'hidden_layer_sizes': [(50,), (100,), (100, 50)],
+            'alpha': loguniform(1e-5, 1e-1),
+            'learning_rate_init': loguniform(1e-4, 1e-2),
+        },
+    },
+    'regression': {
+        'Decision Tree': {
+            'max_depth': [None, 3, 5, 8, 12, 20],
+            'min_samples_leaf': randint(1, 20),
+        },
+        'Random Forest': {
+            'n_estimators': [50, 100, 200],
+            'max_depth': [None, 5, 10, 20],
+            'max_features': [1.0, 'sqrt', 0.5],
+            'min_samples_leaf': randint(1, 10),
+        },
+        'SVM': {
+            'C': loguniform(1e-2, 1e2),
+            'gamma': loguniform(1e-4, 1e0),
+            'epsilon': loguniform(1e-3, 1e0),
+        },
+        'K-Nearest Neighbors': {
+            'n_neighbors': randint(1, 31),
+            'weights': ['uniform', 'distance'],
+            'p': [1, 2],
+        },
+        'Gradient Boosting': {
+            'learning_rate': loguniform(1e-2, 3e-1),
+            'n_estimators': [50, 100, 200],
+            'max_depth': [2, 3, 4, 5],
+            'subsample': [0.6, 0.8, 1.0],
+        },
+        'Neural Network': {
+            'hidden_layer_sizes': [(50,), (100,), (100, 50)],
+            'alpha': loguniform(1e-5, 1e-1),
+            'learning_rate_init': loguniform(1e-4, 1e-2),
+        },
+    },
+}
+
+# Suffix of the untuned baseline trained next to a tuned model
+DEFAULT_SUFFIX = ' (default)'
+
+def _describe(value):
+    """JSON-friendly form of a search space entry or sampled parameter"""
+    if hasattr(value, 'dist'):  # Frozen scipy distribution
+        return [value.dist.name, list(value.args)]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    return value
+
+class HyperparameterTuner:
+    """
+    Tune every model family with halving random search
+
+    ``n_candidates`` configurations are sampled per family (the defaults
+    are always candidate 0). All trials train on every fold of a shared
+    :class:`CVPlan`, whose folds were preprocessed once, starting from a
+    subsample of each fold's training rows; after each rung only the best
+    ``1/eta`` of every family's trials are promoted to ``eta`` times more
+    rows. Each family's winner and its defaults are then refit on the full
+    training set and scored on the test set, so the reported gain is
+    measured on rows the search never saw.
+    """
+
+    def __init__(self, trainer: ModelTrainer, racer: SuccessiveHalvingRacer, random_state: int = 42):
+        self.trainer = trainer
+        self.racer = racer
+        self.random_state = random_state
+
+    def fingerprint(self) -> str:
+        """Stable hash of the search spaces, for result cache keys"""
+        spaces = {
+            task_type: {
+                name: {param: _describe(values) for param, values in space.items()}
+                for name, space in families.items()
+            }
+            for task_type, families in SEARCH_SPACES.items()
+        }
+        encoded = json.dumps([spaces, self.random_state], sort_keys=True, default=repr)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def sample_trials(self, task_type: str, n_candidates: int) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Trial name -> (model family, parameters); candidate 0 of each family is its defaults"""
+        trials = {}
+        for name in self.trainer.models_config.get(task_type, {}):
+            trials[f"{name} #0"] = (name, {})
+            space = SEARCH_SPACES.get(task_type, {}).get(name)
+            if not space or n_candidates < 2:
+                continue
+            sampler = ParameterSampler(space, n_iter=n_candidates - 1, random_state=self.random_state)
+            for index, params in enumerate(sampler, start=1):
+                trials[f"{name} #{index}"] = (name, {key: _describe(value) for key, value in params.items()})
+        return trials
+
+    async def tune(
+        self,
+        plan: CVPlan,
+        X_train: FeatureMatrix,
+        X_test: FeatureMatrix,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        task_type: str,
+        options: ComparisonOptions,
+        budget: Optional[float] = None,
+        on_result: Optional[ResultCallback] = None,
+        limits: Optional[TrainingLimits] = None,
+        artifact_dir: Optional[str] = None
+    ) -> Tuple[List[ModelResult], TuningSummary]:
+        """
+        Search every family's hyperparameters, then refit and score the winners
+
+        ``budget`` caps the summed training time in seconds, including the
+        refit of the winners and their defaults, whose cost is predicted by
+        the trainer's cost model and set aside first. The first rung is
+        also sized from predictions: fewer candidates are sampled per
+        family until it fits, and if even the defaults alone do not, the
+        search is skipped and the defaults are refit. Later rungs are
+        estimated from the measured cost of the previous one; a rung that
+        would exceed what is left is not started and the last completed
+        rung decides. Only the tuned models are saved to ``artifact_dir``.
+
+        Returns:
+            Tuple of (tuned results in models_config order, tuning summary)
+        """
+        metric = PRIMARY_METRICS[task_type]
+        eta = options.racing_eta
+        configured = self.trainer.models_config.get(task_type, {})
+        n_candidates = options.tune_candidates
+        trials = self.sample_trials(task_type, n_candidates)
+        fold_rows = min(fold.X_train.shape[0] for fold in plan.folds)
+        fractions = self.racer.rung_fractions(fold_rows, options.racing_min_fraction, eta)
+
+        # Each family's winner and its defaults are refit on the full split
+        full_shape = DatasetShape.of(X_train, y_train, task_type)
+        refit_estimate = 2 * sum(self.trainer.cost_model.predict(model, full_shape) for model in configured.values())
+        search_budget = budget - refit_estimate if budget is not None else None
+
+        survivors = list(trials)
+        scores: Dict[str, float] = {}
+        costs: Dict[str, float] = {}  # Training time of each trial's latest rung
+        rungs: List[TuningRung] = []
+        spent = 0.0
+        budget_exhausted = False
+
+        for rung_index, fraction in enumerate(fractions):
+            splits = []
+            for fold in plan.folds:
+                X_sub, y_sub = self.racer.subsample(fold.X_train, fold.y_train, fraction, task_type)
+                splits.append((X_sub, fold.X_test, y_sub, fold.y_test))
+            if rung_index == 0:
+                # Nothing is measured yet: predict the rung, sampling fewer candidates until it fits
+                shapes = [DatasetShape.of(X_sub, y_sub, task_type) for X_sub, _, y_sub, _ in splits]
+                while True:
+                    candidates = self._candidates(trials, configured, list(trials))
+                    estimate = sum(
+                        self.trainer.cost_model.predict(model, shape)
+                        for model in candidates.values() for shape in shapes
+                    )
+                    if search_budget is None or estimate <= search_budget or n_candidates == 1:
+                        break
+                    n_candidates -= 1
+                    trials = self.sample_trials(task_type, n_candidates)
+                survivors = list(trials)
+                if search_budget is not None and estimate > search_budget:
+                    logger.info(f"Tuning budget of {budget}s does not fit a search; refitting the defaults")
+                    budget_exhausted = True
+                    break
+            else:
+                estimate = sum(costs[name] * fraction / fractions[rung_index - 1] for name in survivors)
+                if search_budget is not None and spent + estimate > search_budget:
+                    logger.info(f"Tuning budget reached after {spent:.1f}s; stopping before rung {rung_index}")
+                    budget_exhausted = True
+                    break
+                candidates = self._candidates(trials, configured, survivors)
+            logger.info(f"Tuning rung {rung_index}: {len(candidates)} trials on {splits[0][0].shape[0]} rows per fold")
+            per_trial = await self.trainer.train_on_splits(
+                splits, task_type, limits=limits, candidates=candidates
+            )
+
+            scores = {}
+            for name, fold_results in per_trial.items():
+                cost = sum(result.training_time for result in fold_results if result is not None)
+                costs[name] = cost
+                spent += cost
+                # A trial that failed or hit a limit on any fold is pruned
+                if all(result is not None and result.status == "completed" for result in fold_results):
+                    scores[name] = float(np.mean([result.metrics.get(metric, float('-inf')) for result in fold_results]))
+
+            keep = []
+            for family in configured:
+                ranked = sorted(
+                    (name for name in survivors if trials[name][0] == family and name in scores),
+                    key=lambda name: scores[name], reverse=True
+                )
+                keep.extend(ranked[:max(1, math.ceil(len(ranked) / eta))])
+            rungs.append(TuningRung(
+                fraction=fraction,
+                rows=splits[0][0].shape[0],
+                trials=len(survivors),
+                pruned=len(survivors) - len(keep)
+            ))
+            survivors = keep
+            if len(survivors) <= len({trials[name][0] for name in survivors}):
+                break  # One trial left per family; larger rungs would not change the ranking
+
+        # Best surviving trial per family, by its latest cross-validated score; the defaults without a search
+        best: Dict[str, str] = {} if rungs else {trials[name][0]: name for name in trials}
+        for name in survivors:
+            family = trials[name][0]
+            if name in scores and (family not in best or scores[name] > scores[best[family]]):
+                best[family] = name
+
+        results = await self._refit(
+            best, trials, configured, X_train, X_test, y_train, y_test, task_type, metric, limits, artifact_dir
+        )
+        if on_result is not None:
+            for result in results:
+                await on_result(result)
+
+        summary = TuningSummary(
+            primary_metric=metric,
+            n_candidates=n_candidates,
+            n_folds=len(plan.folds),
+            eta=eta,
+            rungs=rungs,
+            trials=len(trials),
+            search_time=spent,
+            budget_seconds=budget,
+            budget_exhausted=budget_exhausted
+        )
+        return results, summary
+
+    def _candidates(
+        self,
+        trials: Dict[str, Tuple[str, Dict[str, Any]]],
+        configured: Dict[str, Any],
+        names: List[str]
+    ) -> Dict[str, Any]:
+        """Unfitted estimators of the named trials"""
+        return {name: clone(configured[trials[name][0]]).set_params(**trials[name][1]) for name in names}
+
+    async def _refit(
+        self,
+        best: Dict[str, str],
+        trials: Dict[str, Tuple[str, Dict[str, Any]]],
+        configured: Dict[str, Any],
+        X_train: FeatureMatrix,
+        X_test: FeatureMatrix,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        task_type: str,
+        metric: str,
+        limits: Optional[TrainingLimits],
+        artifact_dir: Optional[str]
+    ) -> List[ModelResult]:
+        """Train each family's winner, and its defaults where they differ, on the full split"""
+        candidates = {}
+        for family, name in best.items():
+            params = trials[name][1]
+            candidates[family] = clone(configured[family]).set_params(**params)
+            if params:
+                candidates[family + DEFAULT_SUFFIX] = clone(configured[family])
+        finished = {
+            result.name: result
+            for result in await self.trainer.train_all_models(
+                X_train, X_test, y_train, y_test, task_type,
+                limits=limits, candidates=candidates, artifact_dir=artifact_dir
+            )
+        }
+        # Baselines are only for comparison; don't leave them for the registry
+        for family in best:
+            path = self.trainer.artifact_path(artifact_dir, family + DEFAULT_SUFFIX)
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+        results = []
+        for family in configured:
+            if family not in finished:
+                continue
+            result = finished[family]
+            default = finished.get(family + DEFAULT_SUFFIX, result if not trials[best[family]][1] else None)
+            result.best_params = trials[best[family]][1]
+            if default is not None and result.status == default.status == "completed":
+                result.default_metrics = default.metrics
+                result.tuning_gain = result.metrics.get(metric, 0.0) - default.metrics.get(metric, 0.0)
+            results.append(result)
+        return results
@@ -0,0 +1,457 @@
+"""Dataset ingestion utilities"""
+
+import io
+import os
+import hashlib
+import logging
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+class MemoryBudgetExceededError(ValueError):
+    """Raised when a dataset does not fit in the ingestion memory budget"""
+
+@dataclass
+class SpooledUpload:
+    """Upload streamed to a local file, with its size and content hash"""
+    path: str
+    size: int
+    sha256: str
+
+    def cleanup(self):
+        """Remove the spool file"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+# Raw bytes (tests, small payloads) or an upload already spooled to disk
+DatasetSource = Union[bytes, SpooledUpload]
+
+# Accepted upload extensions and the format each one maps to
+SUPPORTED_EXTENSIONS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'arrow',
+    '.arrow': 'arrow',
+    '.ipc': 'arrow',
+}
+
+# Leading bytes identifying the binary formats; anything else is parsed as CSV
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_FILE_MAGIC = b"ARROW1"
+_ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+
+class LoadedDataset(NamedTuple):
+    """DataFrame together with how it was read"""
+    df: pd.DataFrame
+    file_format: str
+    reader: str
+
+async def spool_upload(
+    upload,
+    max_bytes: int,
+    chunk_size: int = 1024 * 1024,
+    spool_dir: Optional[str] = None
+) -> SpooledUpload:
+    """
+    Stream an UploadFile to a temporary file without holding it in memory
+
+    Args:
+        upload: FastAPI/Starlette UploadFile
+        max_bytes: Maximum accepted size
+        chunk_size: Bytes read per iteration
+        spool_dir: Directory for the spool file (system temp dir by default)
+
+    Returns:
+        SpooledUpload pointing at the written file
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    suffix = os.path.splitext(upload.filename or "")[1].lower() or ".csv"
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=spool_dir)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"File size exceeds maximum limit of {max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+
+def unpack_zip(
+    archive: SpooledUpload,
+    max_bytes: int,
+    max_members: int,
+    chunk_size: int = 1024 * 1024,
+    spool_dir: Optional[str] = None
+) -> List[Tuple[str, SpooledUpload]]:
+    """
+    Spool every dataset file of a zip archive to its own file (blocking)
+
+    Directories, hidden files, macOS resource forks and files with an
+    unsupported extension are skipped. Each member is held to
+    ``max_bytes`` while it is decompressed, not by its declared size.
+
+    Returns:
+        (member name, spooled file) pairs in archive order
+
+    Raises:
+        UploadTooLargeError: If a member is larger than max_bytes
+        ValueError: If the file is not a zip archive or has more than max_members datasets
+    """
+    spooled: List[Tuple[str, SpooledUpload]] = []
+    try:
+        with zipfile.ZipFile(archive.path) as zf:
+            members = [info for info in zf.infolist() if not info.is_dir() and _is_dataset_member(info.filename)]
+            if len(members) > max_members:
+                raise ValueError(f"Archive holds {len(members)} datasets; the limit is {max_members}")
+            for info in members:
+                digest = hashlib.sha256()
+                size = 0
+                suffix = os.path.splitext(info.filename)[1].lower()
+                fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=spool_dir)
+                upload = SpooledUpload(path=path, size=0, sha256="")
+                spooled.append((info.filename, upload))
+                with zf.open(info) as member, os.fdopen(fd, "wb") as spool:
+                    while True:
+                        chunk = member.read(chunk_size)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise UploadTooLargeError(
+                                f"{info.filename} exceeds the maximum size of {max_bytes} bytes"
+                            )
+                        digest.update(chunk)
+                        spool.write(chunk)
+                upload.size, upload.sha256 = size, digest.hexdigest()
+    except BaseException as e:
+        for _, upload in spooled:
+            upload.cleanup()
+        if isinstance(e, zipfile.BadZipFile):
+            raise ValueError(f"Not a valid zip archive: {e}") from e
+        raise
+
+    return spooled
+
+def _is_dataset_member(name: str) -> bool:
+    """True for zip members holding a dataset, rather than metadata or other files"""
+    parts = name.split("/")
+    if any(part.startswith(".") or part == "__MACOSX" for part in parts):
+        return False
+    return os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+def content_digest(source: DatasetSource) -> str:
+    """SHA-256 of the dataset bytes"""
+    if isinstance(source, SpooledUpload):
+        return source.sha256
+    return hashlib.sha256(source).hexdigest()
+
+def open_source(source: DatasetSource) -> Union[str, BinaryIO]:
+    """Return something pandas readers accept for the given source"""
+    if isinstance(source, SpooledUpload):
+        return source.path
+    return io.BytesIO(source)
+
+def detect_format(source: DatasetSource) -> str:
+    """Identify the dataset format from its leading bytes"""
+    if isinstance(source, SpooledUpload):
+        with open(source.path, "rb") as f:
+            head = f.read(8)
+    else:
+        head = source[:8]
+
+    if head.startswith(_PARQUET_MAGIC):
+        return 'parquet'
+    if head.startswith(_ARROW_FILE_MAGIC) or head.startswith(_ARROW_STREAM_MAGIC):
+        return 'arrow'
+    return 'csv'
+
+class CSVLoader:
+    """
+    Chunked CSV reader producing compact dtypes within a memory budget
+
+    Dtypes are planned from a sample taken from the start of the file:
+    low-cardinality string columns become categoricals and integer columns
+    are downcast to the smallest type that holds each chunk. The remaining
+    rows are parsed in chunks sized from the sample's per-row footprint,
+    so the raw text of the file is never materialised all at once.
+    """
+
+    # Fraction of the memory budget a single parse chunk may use
+    CHUNK_BUDGET_FRACTION = 0.1
+
+    def __init__(
+        self,
+        memory_budget: int = 1024 * 1024 * 1024,
+        sample_rows: int = 10_000,
+        category_max_ratio: float = 0.5,
+        downcast_floats: bool = False
+    ):
+        self.memory_budget = memory_budget
+        self.sample_rows = sample_rows
+        self.category_max_ratio = category_max_ratio
+        self.downcast_floats = downcast_floats
+
+    def load(self, source: DatasetSource) -> pd.DataFrame:
+        """
+        Load a CSV source into a compact DataFrame
+
+        Raises:
+            MemoryBudgetExceededError: If the loaded data outgrows the budget
+        """
+        reader = pd.read_csv(open_source(source), iterator=True)
+        try:
+            sample = reader.get_chunk(self.sample_rows)
+        except StopIteration:
+            reader.close()
+            raise ValueError("Dataset contains no rows")
+
+        raw_row_bytes = max(1, sample.memory_usage(deep=True).sum() // max(1, len(sample)))
+        chunk_rows = max(1000, int(self.memory_budget * self.CHUNK_BUDGET_FRACTION // raw_row_bytes))
+        categorical_cols = self.plan_categoricals(sample)
+
+        vocabularies: Dict[str, List] = {col: [] for col in categorical_cols}
+        chunks = [self.compact(sample, categorical_cols, vocabularies)]
+        loaded_bytes = chunks[0].memory_usage(deep=True).sum()
+
+        with reader:
+            while True:
+                try:
+                    chunk = reader.get_chunk(chunk_rows)
+                except StopIteration:
+                    break
+                chunk = self.compact(chunk, categorical_cols, vocabularies)
+                loaded_bytes += chunk.memory_usage(deep=True).sum()
+                if loaded_bytes > self.memory_budget:
+                    raise MemoryBudgetExceededError(
+                        f"Dataset exceeds the ingestion memory budget of {self.memory_budget} bytes"
+                    )
+                chunks.append(chunk)
+
+        # Give every chunk the full category list so concat keeps the dtype
+        for chunk in chunks:
+            for col in categorical_cols:
+                if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                    chunk[col] = chunk[col].cat.set_categories(vocabularies[col])
+
+        df = pd.concat(chunks, ignore_index=True, copy=False) if len(chunks) > 1 else chunks[0]
+        logger.info(
+            f"Loaded {len(df)} rows in {len(chunks)} chunks "
+            f"({df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB in memory)"
+        )
+        return df
+
+    def plan_categoricals(self, sample: pd.DataFrame) -> List[str]:
+        """Pick the string columns whose sample cardinality is low enough"""
+        planned = []
+        for col in sample.select_dtypes(include=['object']).columns:
+            non_null = sample[col].count()
+            if non_null and sample[col].nunique() / non_null <= self.category_max_ratio:
+                planned.append(col)
+        return planned
+
+    def compact(
+        self,
+        chunk: pd.DataFrame,
+        categorical_cols: List[str],
+        vocabularies: Dict[str, List]
+    ) -> pd.DataFrame:
+        """Convert one parsed chunk to the planned compact dtypes"""
+        for col in categorical_cols:
+            values = chunk[col]
+            if values.dtype != object:
+                # Chunk parsed as numbers/all-NaN; concat will fall back to object
+                continue
+            vocabulary = vocabularies[col]
+            known = set(vocabulary)
+            vocabulary.extend(value for value in values.dropna().unique() if value not in known)
+            chunk[col] = pd.Categorical(values, categories=vocabulary)
+
+        for col in chunk.select_dtypes(include=['integer']).columns:
+            chunk[col] = pd.to_numeric(chunk[col], downcast='integer')
+
+        if self.downcast_floats:
+            for col in chunk.select_dtypes(include=['floating']).columns:
+                chunk[col] = pd.to_numeric(chunk[col], downcast='float')
+
+        return chunk
+
+class ArrowLoader:
+    """
+    Reader for Parquet and Arrow IPC/Feather datasets
+
+    Spooled files are memory-mapped, so uncompressed Arrow IPC columns are
+    used in place without a copy and no text parsing happens for either
+    format. String columns are compacted the same way as in CSVLoader.
+    """
+
+    def __init__(self, csv_loader: CSVLoader):
+        # Shares the budget and dtype policy of the CSV path
+        self.csv_loader = csv_loader
+
+    def load(self, source: DatasetSource, file_format: str) -> LoadedDataset:
+        """
+        Load a Parquet or Arrow IPC source
+
+        Raises:
+            ImportError: If pyarrow is not installed
+            MemoryBudgetExceededError: If the table does not fit the budget
+        """
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        memory_mapped = isinstance(source, SpooledUpload)
+        if memory_mapped:
+            buffer = pa.memory_map(source.path, "r")
+        else:
+            # Wraps the bytes object without copying it
+            buffer = pa.BufferReader(pa.py_buffer(source))
+
+        if file_format == 'parquet':
+            table = pq.read_table(buffer, memory_map=memory_mapped)
+            reader = "pyarrow.parquet"
+        else:
+            table = self._read_ipc(ipc, buffer)
+            reader = "pyarrow.ipc"
+        if memory_mapped:
+            reader += " (memory-mapped)"
+
+        if table.nbytes > self.csv_loader.memory_budget:
+            raise MemoryBudgetExceededError(
+                f"Dataset exceeds the ingestion memory budget of {self.csv_loader.memory_budget} bytes"
+            )
+
+        # split_blocks avoids consolidating columns into one large 2D copy
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+
+        categorical_cols = self.csv_loader.plan_categoricals(df)
+        df = self.csv_loader.compact(df, categorical_cols, {col: [] for col in categorical_cols})
+        logger.info(
+            f"Loaded {len(df)} rows with {reader} "
+            f"({df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB in memory)"
+        )
+        return LoadedDataset(df, file_format, reader)
+
+    @staticmethod
+    def _read_ipc(ipc, buffer):
+        """Read either the Arrow IPC file (Feather v2) or stream layout"""
+        try:
+            return ipc.open_file(buffer).read_all()
+        except Exception:
+            buffer.seek(0)
+            return ipc.open_stream(buffer).read_all()
+
+class DatasetLoader:
+    """Dispatch uploads to the reader matching their format"""
+
+    def __init__(self, csv_loader: CSVLoader):
+        self.csv_loader = csv_loader
+        self.arrow_loader = ArrowLoader(csv_loader)
+
+    def load(self, source: DatasetSource) -> LoadedDataset:
+        """Load any supported source, identifying its format by content"""
+        file_format = detect_format(source)
+        if file_format == 'csv':
+            return LoadedDataset(self.csv_loader.load(source), 'csv', "pandas.read_csv (chunked)")
+        return self.arrow_loader.load(source, file_format)
+
+    def iter_chunks(self, source: DatasetSource, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Stream any supported source as DataFrames of at most ``chunk_rows`` rows
+
+        Nothing beyond the current chunk is held in memory and no dtype
+        compaction is applied; chunks of a CSV may parse a column differently.
+        """
+        file_format = detect_format(source)
+        if file_format == 'csv':
+            with pd.read_csv(open_source(source), chunksize=chunk_rows) as reader:
+                yield from reader
+            return
+
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        if isinstance(source, SpooledUpload):
+            buffer = pa.memory_map(source.path, "r")
+        else:
+            buffer = pa.BufferReader(pa.py_buffer(source))
+        if file_format == 'parquet':
+            batches = pq.ParquetFile(buffer).iter_batches(batch_size=chunk_rows)
+        else:
+            try:
+                reader = ipc.open_file(buffer)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            except Exception:
+                buffer.seek(0)
+                batches = iter(ipc.open_stream(buffer))
+        for batch in batches:
+            # IPC batches are sized by the writer; re-slice large ones
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows).to_pandas()
+
+    def head(self, source: DatasetSource, rows: int) -> pd.DataFrame:
+        """The first ``rows`` rows, reading nothing past them (no dtype compaction)"""
+        return next(self.iter_chunks(source, rows), pd.DataFrame())
+
+    def count_rows(self, source: DatasetSource, block_size: int = 8 * 1024 * 1024) -> int:
+        """
+        Number of data rows, without parsing any values
+
+        Parquet and Arrow files are counted from their metadata. CSV rows
+        are counted as lines after the header, so quoted values spanning
+        several lines make the count an overestimate.
+        """
+        file_format = detect_format(source)
+        if file_format == 'csv':
+            lines = 0
+            last = b""
+            with open(source.path, "rb") if isinstance(source, SpooledUpload) else io.BytesIO(source) as f:
+                for block in iter(lambda: f.read(block_size), b""):
+                    lines += block.count(b"\n")
+                    last = block
+            if last and not last.endswith(b"\n"):
+                lines += 1  # Final line without a trailing newline
+            return max(0, lines - 1)
+
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        if isinstance(source, SpooledUpload):
+            buffer = pa.memory_map(source.path, "r")
+        else:
+            buffer = pa.BufferReader(pa.py_buffer(source))
+        if file_format == 'parquet':
+            return pq.ParquetFile(buffer).metadata.num_rows
+        try:
+            reader = ipc.open_file(buffer)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        except Exception:
+            buffer.seek(0)
+            return sum(batch.num_rows for batch in ipc.open_stream(buffer))
@@ -1,114 +1,280 @@
 """Data preprocessing utilities"""
 
+import logging
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.impute import SimpleImputer
-import asyncio
+from typing import List, Tuple, Optional, Union
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler, LabelEncoder, OneHotEncoder, OrdinalEncoder
 
-from app.models.responses import PreprocessingInfo
+from app.core.telemetry import StageTimer
+from app.models.responses import DatasetProfile, PreprocessingInfo
+from app.services.estimators import resolve
+from app.utils.profiler import CATEGORICAL, DATETIME, NUMERIC, profile_columns
+
+# Feature matrices are DataFrames, or CSR matrices when one-hot output is sparse
+FeatureMatrix = Union[pd.DataFrame, sparse.csr_matrix]
+
+logger = logging.getLogger(__name__)
+
+# dtypes feature matrices can be produced in
+FEATURE_PRECISIONS = ('float32', 'float64')
+
+# Features derived from each datetime column
+DATE_PARTS = ('year', 'month', 'dayofweek')
+
+def _missing_as_nan(X: pd.DataFrame) -> pd.DataFrame:
+    """Use NaN for every missing categorical value (Arrow-backed frames use None)"""
+    X = X.astype(object)
+    return X.where(X.notna(), np.nan)
+
+def _date_parts(X: pd.DataFrame) -> pd.DataFrame:
+    """Year, month and day of week of each datetime column; NaN where missing or unparseable"""
+    parts = {}
+    for col in X.columns:
+        # Rows scored at inference time may come from CSV, where dates are strings
+        values = pd.to_datetime(X[col], errors='coerce')
+        for part in DATE_PARTS:
+            parts[f"{col}_{part}"] = getattr(values.dt, part).astype(float)
+    return pd.DataFrame(parts, index=X.index)
+
+def _date_part_names(transformer, input_features) -> List[str]:
+    return [f"{col}_{part}" for col in input_features for part in DATE_PARTS]
 
 class DataPreprocessor:
     """Handle data preprocessing for ML models"""
-    
-    async def preprocess(
-        self, 
-        df: pd.DataFrame, 
-        target_column: Optional[str], 
-        task_type: str
-    ) -> Tuple[pd.DataFrame, Optional[pd.Series], PreprocessingInfo]:
+
+    # Categorical columns with at most this many categories are one-hot encoded
+    ONE_HOT_MAX_CATEGORIES = 10
+
+    def __init__(self, sparse_threshold: float = 0.3, precision: str = 'float64'):
+        # Output is sparse when the transformed matrix is less dense than this
+        self.sparse_threshold = sparse_threshold
+        if precision not in FEATURE_PRECISIONS:
+            raise ValueError(f"Unsupported feature precision: {precision} (use one of {', '.join(FEATURE_PRECISIONS)})")
+        # Every feature matrix is converted to this dtype once, here, instead of by each estimator
+        self.dtype = np.dtype(precision)
+
+    def fingerprint(self) -> str:
+        """Settings that change the preprocessed matrices, for cache keys and stored datasets"""
+        return f"{self.dtype.name}:{self.sparse_threshold}"
+
+    def split_target(
+        self,
+        df: pd.DataFrame,
+        target_column: Optional[str]
+    ) -> Tuple[pd.DataFrame, Optional[pd.Series], Optional[np.ndarray]]:
         """
-        Preprocess the dataset for ML training
-        
-        Args:
-            df: Input dataframe
-            target_column: Name of target column
-            task_type: Type of ML task
-            
+        Separate the features from the (label-encoded, if categorical) target
+
+        When there is no target column the features frame is ``df`` itself.
+
         Returns:
-            Tuple of (X, y, preprocessing_info)
+            Tuple of (X, y, target_classes) where target_classes holds the
+            original label of each encoded class, or None if y was numeric
         """
-        df_copy = df.copy()
-        
-        # Separate features and target
-        if target_column and target_column in df_copy.columns:
-            X = df_copy.drop(columns=[target_column])
-            y = df_copy[target_column]
+        if target_column and target_column in df.columns:
+            X = df.drop(columns=[target_column])
+            y = df[target_column]
         else:
-            X = df_copy
-            y = None
-        
-        # Initialize preprocessing info
-        missing_values_handled = X.isnull().sum().sum()
-        categorical_features_encoded = 0
-        
-        # Handle missing values
-        if missing_values_handled > 0:
-            X = await self._handle_missing_values(X)
-        
-        # Encode categorical variables
-        categorical_cols = X.select_dtypes(include=['object']).columns
-        if len(categorical_cols) > 0:
-            X, encoded_count = await self._encode_categorical_features(X, categorical_cols)
-            categorical_features_encoded = encoded_count
-        
+            return df, None, None
+
         # Encode target variable if it's categorical
-        if y is not None and not pd.api.types.is_numeric_dtype(y):
+        target_classes = None
+        if not pd.api.types.is_numeric_dtype(y):
             label_encoder = LabelEncoder()
             y = pd.Series(label_encoder.fit_transform(y), index=y.index)
-        
-        # Scale features
+            target_classes = label_encoder.classes_
+
+        return X, y, target_classes
+
+    def fit_transform(
+        self,
+        X_train: pd.DataFrame,
+        X_test: Optional[pd.DataFrame],
+        task_type: str,
+        timer: Optional[StageTimer] = None,
+        profile: Optional[DatasetProfile] = None
+    ) -> Tuple[FeatureMatrix, Optional[FeatureMatrix], PreprocessingInfo, ColumnTransformer]:
+        """
+        Fit the preprocessing pipeline on the training split and apply it
+
+        Imputation, categorical encoding and scaling run as one fitted
+        ColumnTransformer, so the returned transformer can be reused on new
+        data at inference time without refitting. Datetime columns become
+        their year, month and day of week; columns of any other kind are
+        dropped with a warning.
+
+        Args:
+            X_train: Training features; the only data the pipeline is fitted on
+            X_test: Held-out features to transform, or None
+            task_type: Type of ML task
+            timer: Records the ``preprocess_fit`` and ``preprocess_transform`` stages
+            profile: Profile of the dataset X_train and X_test were split from; column
+                kinds, cardinalities and null counts are taken from it instead of rescanning
+
+        Returns:
+            Tuple of (X_train, X_test, preprocessing_info, fitted_transformer)
+        """
+        timer = timer or StageTimer()
         features_scaled = task_type != 'clustering'  # Scale for all except clustering
-        if features_scaled:
-            X = await self._scale_features(X)
-        
+        transformer = self.build_transformer(X_train, features_scaled, profile=profile)
+
+        with timer.stage('preprocess_fit'):
+            Xt_train = self._as_matrix(transformer.fit_transform(X_train), transformer, X_train.index)
+        Xt_test = None
+        if X_test is not None:
+            with timer.stage('preprocess_transform'):
+                Xt_test = self._as_matrix(transformer.transform(X_test), transformer, X_test.index)
+
+        if profile is not None and not profile.sampled:
+            columns = profile_columns(profile)
+            missing_values = sum(columns[str(col)].null_count for col in X_train.columns)
+        else:
+            missing_values = int(X_train.isna().values.sum()) \
+                + (int(X_test.isna().values.sum()) if X_test is not None else 0)
         preprocessing_info = PreprocessingInfo(
-            missing_values_handled=missing_values_handled,
-            categorical_features_encoded=categorical_features_encoded,
+            missing_values_handled=missing_values,
+            categorical_features_encoded=self._encoded_feature_count(transformer),
             features_scaled=features_scaled
         )
-        
+
+        return Xt_train, Xt_test, preprocessing_info, transformer
+
+    def preprocess(
+        self,
+        df: pd.DataFrame,
+        target_column: Optional[str],
+        task_type: str
+    ) -> Tuple[FeatureMatrix, Optional[pd.Series], PreprocessingInfo]:
+        """
+        Preprocess the whole dataset for ML training
+
+        Fits on every row, which is appropriate when there is no held-out
+        split (clustering). Supervised pipelines should split first and use
+        :meth:`fit_transform` so nothing is fitted on test rows.
+
+        Args:
+            df: Input dataframe
+            target_column: Name of target column
+            task_type: Type of ML task
+
+        Returns:
+            Tuple of (X, y, preprocessing_info)
+        """
+        X, y, _ = self.split_target(df, target_column)
+        X, _, preprocessing_info, _ = self.fit_transform(X, None, task_type)
         return X, y, preprocessing_info
-    
-    async def _handle_missing_values(self, X: pd.DataFrame) -> pd.DataFrame:
-        """Handle missing values in the dataset"""
-        # Use appropriate imputation strategy for different column types
-        numeric_cols = X.select_dtypes(include=[np.number]).columns
-        categorical_cols = X.select_dtypes(include=['object']).columns
-        
-        if len(numeric_cols) > 0:
-            numeric_imputer = SimpleImputer(strategy='median')
-            X[numeric_cols] = numeric_imputer.fit_transform(X[numeric_cols])
-        
-        if len(categorical_cols) > 0:
-            categorical_imputer = SimpleImputer(strategy='most_frequent')
-            X[categorical_cols] = categorical_imputer.fit_transform(X[categorical_cols])
-        
-        return X
-    
-    async def _encode_categorical_features(
-        self, 
-        X: pd.DataFrame, 
-        categorical_cols: pd.Index
-    ) -> Tuple[pd.DataFrame, int]:
-        """Encode categorical features"""
-        encoded_count = 0
-        
-        for col in categorical_cols:
-            if X[col].nunique() <= 10:  # One-hot encode if few categories
-                dummies = pd.get_dummies(X[col], prefix=col, drop_first=True)
-                X = pd.concat([X.drop(columns=[col]), dummies], axis=1)
-                encoded_count += len(dummies.columns)
-            else:  # Label encode if many categories
-                label_encoder = LabelEncoder()
-                X[col] = label_encoder.fit_transform(X[col].astype(str))
-                encoded_count += 1
-        
-        return X, encoded_count
-    
-    async def _scale_features(self, X: pd.DataFrame) -> pd.DataFrame:
-        """Scale numerical features"""
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        return pd.DataFrame(X_scaled, columns=X.columns, index=X.index)
\ No newline at end of file
+
+    def transform(self, transformer: ColumnTransformer, X: pd.DataFrame) -> FeatureMatrix:
+        """Apply a transformer fitted by :meth:`fit_transform` to new rows"""
+        return self._as_matrix(transformer.transform(X), transformer, X.index)
+
+    def build_transformer(
+        self,
+        X: pd.DataFrame,
+        scale: bool,
+        profile: Optional[DatasetProfile] = None
+    ) -> ColumnTransformer:
+        """
+        Build the (unfitted) transformer for the columns of X
+
+        With a profile, categorical cardinalities come from it (and so from
+        every row of the profiled dataset) rather than a scan of X.
+        """
+        if profile is not None:
+            columns = profile_columns(profile)
+            numeric_cols = [col for col in X.columns if columns[str(col)].kind == NUMERIC]
+            categorical_cols = [col for col in X.columns if columns[str(col)].kind == CATEGORICAL]
+            datetime_cols = [col for col in X.columns if columns[str(col)].kind == DATETIME]
+            cardinality = pd.Series(
+                [columns[str(col)].distinct for col in categorical_cols], index=categorical_cols, dtype=int
+            )
+        else:
+            numeric_cols = X.select_dtypes(include=[np.number, 'bool']).columns.tolist()
+            categorical_cols = X.select_dtypes(include=['object', 'category']).columns.tolist()
+            datetime_cols = X.select_dtypes(include=['datetime', 'datetimetz']).columns.tolist()
+            # One vectorized cardinality scan over every categorical column
+            cardinality = X[categorical_cols].nunique() if categorical_cols else pd.Series(dtype=int)
+        one_hot_cols = cardinality[cardinality <= self.ONE_HOT_MAX_CATEGORIES].index.tolist()
+        ordinal_cols = cardinality[cardinality > self.ONE_HOT_MAX_CATEGORIES].index.tolist()
+
+        # sklearn.impute imports the neighbors, linear and SVM modules; load it on first use
+        SimpleImputer = resolve('sklearn.impute:SimpleImputer')
+
+        def with_scaler(steps: List) -> Pipeline:
+            return Pipeline(steps + [('scale', StandardScaler())] if scale else steps)
+
+        transformers = []
+        if numeric_cols:
+            transformers.append((
+                'numeric',
+                with_scaler([('impute', SimpleImputer(strategy='median'))]),
+                numeric_cols
+            ))
+        if datetime_cols:
+            transformers.append((
+                'datetime',
+                with_scaler([
+                    ('parts', FunctionTransformer(_date_parts, feature_names_out=_date_part_names)),
+                    ('impute', SimpleImputer(strategy='median'))
+                ]),
+                datetime_cols
+            ))
+        if ordinal_cols:
+            transformers.append((
+                'ordinal',
+                with_scaler([
+                    ('missing', FunctionTransformer(_missing_as_nan, feature_names_out='one-to-one')),
+                    ('impute', SimpleImputer(strategy='most_frequent')),
+                    ('encode', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1))
+                ]),
+                ordinal_cols
+            ))
+        if one_hot_cols:
+            transformers.append((
+                'one_hot',
+                Pipeline([
+                    ('missing', FunctionTransformer(_missing_as_nan, feature_names_out='one-to-one')),
+                    ('impute', SimpleImputer(strategy='most_frequent')),
+                    ('encode', OneHotEncoder(drop='first', handle_unknown='ignore', sparse_output=True))
+                ]),
+                one_hot_cols
+            ))
+
+        used = set(numeric_cols) | set(categorical_cols) | set(datetime_cols)
+        dropped = [str(col) for col in X.columns if col not in used]
+        if dropped:
+            logger.warning(f"Dropping columns of unsupported types: {', '.join(dropped)}")
+
+        return ColumnTransformer(
+            transformers,
+            remainder='drop',
+            sparse_threshold=self.sparse_threshold,
+            verbose_feature_names_out=False
+        )
+
+    def _as_matrix(self, values, transformer: ColumnTransformer, index: pd.Index) -> FeatureMatrix:
+        """
+        Convert transformer output to the feature dtype
+
+        Dense output becomes one C-contiguous array, wrapped without a copy
+        in a DataFrame with the transformer's feature names; estimators that
+        accept the dtype then use it as is instead of copying it per model.
+        """
+        if sparse.issparse(values):
+            return sparse.csr_matrix(values).astype(self.dtype, copy=False)
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        return pd.DataFrame(values, columns=transformer.get_feature_names_out(), index=index, copy=False)
+
+    def _encoded_feature_count(self, transformer: ColumnTransformer) -> int:
+        """Number of output columns produced by categorical encoders"""
+        count = 0
+        for name, _, columns in transformer.transformers_:
+            if name == 'ordinal':
+                count += len(columns)
+            elif name == 'one_hot':
+                count += len(transformer.named_transformers_[name].get_feature_names_out(columns))
+        return count
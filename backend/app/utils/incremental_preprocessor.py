@@ -0,0 +1,178 @@
+"""Preprocessing fitted from a stream of chunks"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+from app.models.responses import PreprocessingInfo
+
+@dataclass
+class _NumericStats:
+    """Shifted running sums, so rows can be added and removed exactly"""
+    shift: float
+    count: int = 0
+    total: float = 0.0
+    total_squares: float = 0.0
+    missing: int = 0
+
+@dataclass
+class _CategoryStats:
+    counts: Dict[str, int] = field(default_factory=dict)
+    missing: int = 0
+    truncated: bool = False  # Vocabulary hit the cap; later values map to unknown
+
+class IncrementalPreprocessor:
+    """
+    Streaming counterpart of DataPreprocessor's ColumnTransformer
+
+    Column kinds are decided from the first chunk. :meth:`partial_fit`
+    accumulates running sums for numeric columns and category counts for
+    categorical ones, and :meth:`remove` subtracts rows again (e.g. a
+    held-out sample), so the fitted state describes exactly the training
+    rows. After :meth:`finalize`, :meth:`transform` encodes any chunk the
+    way the batch pipeline does: numeric columns are mean-imputed (a median
+    needs every value) and scaled, categorical columns with at most
+    ``one_hot_max_categories`` categories are one-hot encoded (first
+    category dropped) and the rest ordinal-encoded and scaled.
+    """
+
+    def __init__(self, one_hot_max_categories: int = 10, max_vocabulary: int = 100_000):
+        self.one_hot_max_categories = one_hot_max_categories
+        self.max_vocabulary = max_vocabulary
+        self.numeric_cols: List[str] = []
+        self.categorical_cols: List[str] = []
+        self._numeric: Dict[str, _NumericStats] = {}
+        self._categorical: Dict[str, _CategoryStats] = {}
+        self.fitted = False
+
+    def begin(self, X: pd.DataFrame):
+        """Decide column kinds from the first chunk of features"""
+        self.numeric_cols = X.select_dtypes(include=[np.number, 'bool']).columns.tolist()
+        self.categorical_cols = [col for col in X.columns if col not in set(self.numeric_cols)]
+        means = X[self.numeric_cols].astype(float).mean() if self.numeric_cols else pd.Series(dtype=float)
+        self._numeric = {
+            col: _NumericStats(shift=0.0 if pd.isna(means[col]) else float(means[col]))
+            for col in self.numeric_cols
+        }
+        self._categorical = {col: _CategoryStats() for col in self.categorical_cols}
+
+    def partial_fit(self, X: pd.DataFrame):
+        """Add a chunk of training rows to the statistics"""
+        self._update(X, sign=1)
+
+    def remove(self, X: pd.DataFrame):
+        """Subtract rows previously added with :meth:`partial_fit`"""
+        self._update(X, sign=-1)
+
+    def _update(self, X: pd.DataFrame, sign: int):
+        for col, stats in self._numeric.items():
+            values = self._numeric_values(X[col])
+            present = values[~np.isnan(values)] - stats.shift
+            stats.count += sign * len(present)
+            stats.total += sign * float(present.sum())
+            stats.total_squares += sign * float(np.dot(present, present))
+            stats.missing += sign * (len(values) - len(present))
+
+        for col, stats in self._categorical.items():
+            values = self._category_values(X[col])
+            stats.missing += sign * int(values.isna().sum())
+            for value, count in values.value_counts().items():
+                if value in stats.counts:
+                    stats.counts[value] += sign * count
+                elif sign > 0 and len(stats.counts) < self.max_vocabulary:
+                    stats.counts[value] = count
+                elif sign > 0:
+                    stats.truncated = True
+
+    def finalize(self, scale: bool):
+        """Freeze the encoders; ``scale`` mirrors the batch pipeline (off for clustering)"""
+        self.scale = scale
+        self.means, self.stds = {}, {}
+        for col, stats in self._numeric.items():
+            mean = stats.total / stats.count if stats.count else 0.0
+            variance = max(0.0, stats.total_squares / stats.count - mean ** 2) if stats.count else 0.0
+            self.means[col] = stats.shift + mean
+            self.stds[col] = float(np.sqrt(variance)) or 1.0  # StandardScaler leaves constant columns unscaled
+
+        self.categories: Dict[str, List[str]] = {}
+        self.fill_values: Dict[str, str] = {}
+        self.one_hot_cols, self.ordinal_cols = [], []
+        for col, stats in self._categorical.items():
+            categories = sorted(value for value, count in stats.counts.items() if count > 0)
+            self.categories[col] = categories
+            if categories:
+                self.fill_values[col] = max(categories, key=lambda value: (stats.counts[value], value))
+            if len(categories) <= self.one_hot_max_categories:
+                self.one_hot_cols.append(col)
+            else:
+                self.ordinal_cols.append(col)
+                # Moments of the codes follow from the category counts
+                counts = np.array([stats.counts[value] for value in categories], dtype=float)
+                counts[categories.index(self.fill_values[col])] += max(0, stats.missing)
+                codes = np.arange(len(categories), dtype=float)
+                mean = float(np.dot(counts, codes) / counts.sum())
+                variance = float(np.dot(counts, (codes - mean) ** 2) / counts.sum())
+                self.means[col] = mean
+                self.stds[col] = float(np.sqrt(variance)) or 1.0
+        self.fitted = True
+
+    @property
+    def n_features(self) -> int:
+        return (
+            len(self.numeric_cols)
+            + len(self.ordinal_cols)
+            + sum(max(0, len(self.categories[col]) - 1) for col in self.one_hot_cols)
+        )
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """Encode a chunk into a dense float matrix"""
+        out = np.empty((len(X), self.n_features), dtype=np.float64)
+        position = 0
+        for col in self.numeric_cols:
+            values = self._numeric_values(X[col])
+            values = np.where(np.isnan(values), self.means[col], values)
+            out[:, position] = (values - self.means[col]) / self.stds[col] if self.scale else values
+            position += 1
+        for col in self.ordinal_cols:
+            values = self._category_values(X[col]).fillna(self.fill_values[col])
+            codes = pd.Categorical(values, categories=self.categories[col]).codes.astype(float)
+            # Unseen categories get -1, as OrdinalEncoder(unknown_value=-1)
+            out[:, position] = (codes - self.means[col]) / self.stds[col] if self.scale else codes
+            position += 1
+        for col in self.one_hot_cols:
+            categories = self.categories[col]
+            if len(categories) < 2:
+                continue
+            values = self._category_values(X[col])
+            if col in self.fill_values:
+                values = values.fillna(self.fill_values[col])
+            codes = pd.Categorical(values, categories=categories).codes
+            block = out[:, position:position + len(categories) - 1]
+            block[:] = 0.0
+            known = codes > 0  # Code 0 is the dropped first category; -1 is unknown
+            block[np.flatnonzero(known), codes[known] - 1] = 1.0
+            position += len(categories) - 1
+        return out
+
+    def info(self) -> PreprocessingInfo:
+        return PreprocessingInfo(
+            missing_values_handled=int(
+                sum(stats.missing for stats in self._numeric.values())
+                + sum(stats.missing for stats in self._categorical.values())
+            ),
+            categorical_features_encoded=len(self.ordinal_cols) + sum(
+                max(0, len(self.categories[col]) - 1) for col in self.one_hot_cols
+            ),
+            features_scaled=self.scale
+        )
+
+    @staticmethod
+    def _numeric_values(values: pd.Series) -> np.ndarray:
+        # A chunk may parse a numeric column as text; unparseable values count as missing
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    @staticmethod
+    def _category_values(values: pd.Series) -> pd.Series:
+        # Chunks of one column may parse as numbers or strings; compare as strings
+        return values.astype(str).where(values.notna())
@@ -0,0 +1,91 @@
+"""Process memory measurement utilities"""
+
+import os
+import resource
+import threading
+from typing import Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, if it can be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def process_private_bytes(pid: int) -> Optional[int]:
+    """
+    Memory private to a process (USS) in bytes, if it can be read
+
+    Pages a forked child still shares copy-on-write with its parent are not
+    counted, so this measures what the child itself allocated.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            private_kb = 0
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private_kb += int(line.split()[1])
+            return private_kb * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _max_rss() -> int:
+    """Lifetime peak RSS of this process in bytes (fallback when /proc is missing)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+class PeakRSSMonitor:
+    """
+    Sample this process's RSS on a background thread while active
+
+    The measurement is process-wide: concurrent requests served by the same
+    process are included, and memory used by training worker processes is not.
+    ``stage_peak_bytes`` tracks the peak since the last :meth:`reset_stage_peak`.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self.stage_peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PeakRSSMonitor":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def reset_stage_peak(self):
+        """Start a new stage: its peak begins at the current RSS"""
+        self.stage_peak_bytes = 0
+        self._sample()
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak_bytes / (1024 * 1024)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is None:
+            rss = _max_rss()
+        self.peak_bytes = max(self.peak_bytes, rss)
+        self.stage_peak_bytes = max(self.stage_peak_bytes, rss)
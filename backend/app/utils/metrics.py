@@ -0,0 +1,212 @@
+"""One-pass evaluation metrics"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+@dataclass
+class ClassificationStats:
+    """Everything label-based metrics need, computed once per evaluation"""
+    classes: np.ndarray  # Sorted labels seen in y_true or y_pred
+    confusion: np.ndarray  # confusion[i, j]: rows of class i predicted as class j
+    true_index: np.ndarray  # Position of each y_true label in classes
+    proba: Optional[np.ndarray] = None  # predict_proba output, if available
+    proba_classes: Optional[np.ndarray] = None  # Labels of the proba columns
+
+    @property
+    def support(self) -> np.ndarray:
+        return self.confusion.sum(axis=1)
+
+    @property
+    def predicted(self) -> np.ndarray:
+        return self.confusion.sum(axis=0)
+
+    @property
+    def true_positives(self) -> np.ndarray:
+        return np.diag(self.confusion)
+
+    def precision(self) -> np.ndarray:
+        return _safe_divide(self.true_positives, self.predicted)
+
+    def recall(self) -> np.ndarray:
+        return _safe_divide(self.true_positives, self.support)
+
+    def f1(self) -> np.ndarray:
+        precision, recall = self.precision(), self.recall()
+        return _safe_divide(2 * precision * recall, precision + recall)
+
+    def weighted(self, per_class: np.ndarray) -> float:
+        """Support-weighted average of a per-class metric"""
+        return float(np.dot(per_class, self.support) / self.support.sum())
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields 0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+def _binary_auc(is_positive: np.ndarray, score: np.ndarray) -> Optional[float]:
+    """ROC-AUC from one sort: each positive counts the negatives scored below it (ties count half)"""
+    n_positive = int(is_positive.sum())
+    n_negative = len(is_positive) - n_positive
+    if n_positive == 0 or n_negative == 0:
+        return None
+    order = np.argsort(score)
+    sorted_score = score[order]
+    # Rows with equal scores form one group
+    group = np.cumsum(np.r_[True, sorted_score[1:] != sorted_score[:-1]]) - 1
+    positives = np.bincount(group, weights=is_positive[order])
+    negatives = np.bincount(group) - positives
+    negatives_below = np.cumsum(negatives) - negatives
+    return float(np.dot(positives, negatives_below + 0.5 * negatives) / (n_positive * n_negative))
+
+def _roc_auc(stats: ClassificationStats) -> Optional[float]:
+    """Binary ROC-AUC, or support-weighted one-vs-rest ROC-AUC for multi-class"""
+    if stats.proba is None:
+        return None
+    present = stats.classes[stats.support > 0]
+    if len(present) < 2 or not np.array_equal(present, stats.proba_classes):
+        return None
+    y_true = stats.classes[stats.true_index]
+    if len(present) == 2:
+        return _binary_auc(y_true == present[1], stats.proba[:, 1])
+    scores = [_binary_auc(y_true == label, stats.proba[:, column]) for column, label in enumerate(present)]
+    return float(np.average(scores, weights=stats.support[stats.support > 0]))
+
+def _log_loss(stats: ClassificationStats) -> Optional[float]:
+    """Cross-entropy of the predicted probabilities"""
+    if stats.proba is None:
+        return None
+    y_true = stats.classes[stats.true_index]
+    column = np.searchsorted(stats.proba_classes, y_true)
+    column = np.minimum(column, len(stats.proba_classes) - 1)
+    if not np.array_equal(stats.proba_classes[column], y_true):
+        return None  # Some test label was never seen in training
+    eps = np.finfo(stats.proba.dtype).eps
+    likelihood = np.clip(stats.proba[np.arange(len(column)), column], eps, 1 - eps)
+    return float(-np.log(likelihood).mean())
+
+def _balanced_accuracy(stats: ClassificationStats) -> float:
+    present = stats.support > 0
+    return float(stats.recall()[present].mean())
+
+# Metric name -> function of the shared statistics; None results are omitted.
+# New metrics are derived from the same confusion matrix and probabilities.
+CLASSIFICATION_METRICS: Dict[str, Callable[[ClassificationStats], Optional[float]]] = {
+    'accuracy': lambda stats: float(stats.true_positives.sum() / stats.confusion.sum()),
+    'precision': lambda stats: stats.weighted(stats.precision()),
+    'recall': lambda stats: stats.weighted(stats.recall()),
+    'f1_score': lambda stats: stats.weighted(stats.f1()),
+    'roc_auc': _roc_auc,
+    'balanced_accuracy': _balanced_accuracy,
+    'log_loss': _log_loss,
+}
+
+@dataclass
+class RegressionStats:
+    """Residual sums shared by regression metrics"""
+    n: int
+    sum_squared_error: float
+    sum_absolute_error: float
+    sum_absolute_percentage_error: float
+    total_sum_of_squares: float
+
+def _r2(stats: RegressionStats) -> float:
+    if stats.total_sum_of_squares == 0:
+        # Constant target: perfect predictions score 1, anything else 0 (as sklearn)
+        return 1.0 if stats.sum_squared_error == 0 else 0.0
+    return 1 - stats.sum_squared_error / stats.total_sum_of_squares
+
+REGRESSION_METRICS: Dict[str, Callable[[RegressionStats], Optional[float]]] = {
+    'mse': lambda stats: stats.sum_squared_error / stats.n,
+    'mae': lambda stats: stats.sum_absolute_error / stats.n,
+    'r2_score': _r2,
+    'rmse': lambda stats: float(np.sqrt(stats.sum_squared_error / stats.n)),
+    'mape': lambda stats: stats.sum_absolute_percentage_error / stats.n,
+}
+
+class MetricsEngine:
+    """
+    Compute every evaluation metric from one pass over the predictions
+
+    Classification metrics are derived from a single confusion matrix and
+    one probability matrix; regression metrics from one residual vector.
+    """
+
+    def classification_stats(
+        self,
+        y_true,
+        y_pred,
+        proba: Optional[np.ndarray] = None,
+        proba_classes: Optional[np.ndarray] = None
+    ) -> ClassificationStats:
+        """Encode the labels once and build the confusion matrix"""
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        classes, encoded = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        true_index, pred_index = encoded[:len(y_true)], encoded[len(y_true):]
+        k = len(classes)
+        confusion = np.bincount(true_index * k + pred_index, minlength=k * k).reshape(k, k)
+        return ClassificationStats(
+            classes=classes,
+            confusion=confusion,
+            true_index=true_index,
+            proba=proba,
+            proba_classes=np.asarray(proba_classes) if proba_classes is not None else None
+        )
+
+    def classification(
+        self,
+        y_true,
+        y_pred,
+        proba: Optional[np.ndarray] = None,
+        proba_classes: Optional[np.ndarray] = None
+    ) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """
+        Classification metrics and a per-class report
+
+        Returns:
+            Tuple of (metrics, per_class) where per_class maps each label to
+            its precision, recall, f1_score and support
+        """
+        stats = self.classification_stats(y_true, y_pred, proba, proba_classes)
+        metrics = {}
+        for name, metric in CLASSIFICATION_METRICS.items():
+            value = metric(stats)
+            if value is not None:
+                metrics[name] = value
+
+        precision, recall, f1 = stats.precision(), stats.recall(), stats.f1()
+        per_class = {
+            str(label): {
+                'precision': float(precision[i]),
+                'recall': float(recall[i]),
+                'f1_score': float(f1[i]),
+                'support': float(stats.support[i])
+            }
+            for i, label in enumerate(stats.classes)
+        }
+        return metrics, per_class
+
+    def regression(self, y_true, y_pred) -> Dict[str, float]:
+        """Regression metrics from one residual vector"""
+        y_true = np.asarray(y_true, dtype=float)
+        residual = np.asarray(y_pred, dtype=float) - y_true
+        absolute = np.abs(residual)
+        centered = y_true - y_true.mean()
+        stats = RegressionStats(
+            n=len(y_true),
+            sum_squared_error=float(np.dot(residual, residual)),
+            sum_absolute_error=float(absolute.sum()),
+            # Same epsilon guard as sklearn's mean_absolute_percentage_error
+            sum_absolute_percentage_error=float(
+                (absolute / np.maximum(np.abs(y_true), np.finfo(np.float64).eps)).sum()
+            ),
+            total_sum_of_squares=float(np.dot(centered, centered))
+        )
+        metrics = {}
+        for name, metric in REGRESSION_METRICS.items():
+            value = metric(stats)
+            if value is not None:
+                metrics[name] = float(value)
+        return metrics
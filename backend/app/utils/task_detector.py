@@ -4,15 +4,19 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Optional
 
+from app.models.responses import DatasetProfile
+from app.utils.profiler import NUMERIC, profile_columns
+
 class TaskDetector:
     """Detect ML task type from dataset"""
     
-    def detect_task(self, df: pd.DataFrame) -> Tuple[str, Optional[str]]:
+    def detect_task(self, df: pd.DataFrame, profile: Optional[DatasetProfile] = None) -> Tuple[str, Optional[str]]:
         """
         Detect if the task is classification, regression, or clustering
         
         Args:
             df: Input dataframe
+            profile: Column profile of df; its distinct counts are used instead of rescanning the target
             
         Returns:
             Tuple of (task_type, target_column)
@@ -23,14 +27,20 @@ class TaskDetector:
         if target_column is None:
             return 'clustering', None
         
-        target_series = df[target_column]
+        if profile is not None:
+            column = profile_columns(profile)[str(target_column)]
+            is_numeric = column.kind == NUMERIC
+            unique_values, total_values = column.distinct, profile.profiled_rows
+        else:
+            target_series = df[target_column]
+            is_numeric = pd.api.types.is_numeric_dtype(target_series)
+            # Only a numeric target's cardinality decides anything
+            unique_values = target_series.nunique() if is_numeric else None
+            total_values = len(target_series)
         
         # Check if target is numeric
-        if pd.api.types.is_numeric_dtype(target_series):
+        if is_numeric:
             # Check if it's discrete (likely classification)
-            unique_values = target_series.nunique()
-            total_values = len(target_series)
-            
             # If less than 10 unique values or less than 5% unique values, likely classification
             if unique_values <= 10 or (unique_values / total_values) < 0.05:
                 return 'classification', target_column
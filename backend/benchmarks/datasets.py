@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic datasets for the benchmark suite
+
+Every dataset is generated from its spec and a fixed seed, so the same
+spec produces byte-identical CSVs on every machine and no data has to
+be downloaded.
+"""
+
+import itertools
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Shape of one synthetic dataset"""
+    rows: int
+    columns: int  # Feature columns, excluding the target
+    cardinality: int  # Categories per categorical column
+    missing_rate: float
+    task: str = 'classification'  # classification, regression or clustering
+    categorical_ratio: float = 0.3  # Share of feature columns that are categorical
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.task}-r{self.rows}-c{self.columns}-k{self.cardinality}"
+            f"-m{self.missing_rate:g}-s{self.seed}"
+        )
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), 'name': self.name}
+
+def make_dataset(spec: DatasetSpec) -> pd.DataFrame:
+    """
+    Generate the dataset for a spec
+
+    Numeric features are standard normal; categorical features draw from
+    ``cardinality`` string categories with a skewed distribution. The
+    target (absent for clustering) depends on a few features of each kind.
+    """
+    rng = np.random.default_rng(spec.seed)
+    n_categorical = int(round(spec.columns * spec.categorical_ratio))
+    n_numeric = spec.columns - n_categorical
+
+    numeric = rng.normal(size=(spec.rows, n_numeric))
+    # Zipf-like category frequencies, as real categorical columns tend to have
+    weights = 1.0 / np.arange(1, spec.cardinality + 1)
+    weights /= weights.sum()
+    codes = rng.choice(spec.cardinality, size=(spec.rows, n_categorical), p=weights)
+
+    columns = {f"num_{i}": numeric[:, i] for i in range(n_numeric)}
+    labels = np.array([f"c{code}" for code in range(spec.cardinality)], dtype=object)
+    columns.update({f"cat_{i}": labels[codes[:, i]] for i in range(n_categorical)})
+    df = pd.DataFrame(columns)
+
+    if spec.task != 'clustering':
+        signal = numeric[:, :3].sum(axis=1) if n_numeric else np.zeros(spec.rows)
+        if n_categorical:
+            signal = signal + (codes[:, 0] % 3 == 0)
+        noise = rng.normal(scale=0.5, size=spec.rows)
+        if spec.task == 'classification':
+            df['target'] = np.where(signal + noise > np.median(signal), 'yes', 'no')
+        else:
+            df['target'] = 3.0 * signal + noise
+    else:
+        # An id-like last column tells the task detector there is no target
+        df = df.rename(columns={df.columns[-1]: f"{df.columns[-1]}_id"})
+
+    if spec.missing_rate > 0:
+        features = df.columns.drop('target', errors='ignore')
+        mask = rng.random((spec.rows, len(features))) < spec.missing_rate
+        df[features] = df[features].mask(mask)
+    return df
+
+def make_csv(spec: DatasetSpec) -> bytes:
+    return make_dataset(spec).to_csv(index=False).encode()
+
+def grid(
+    rows: List[int],
+    columns: List[int],
+    cardinalities: List[int],
+    missing_rates: List[float],
+    tasks: List[str]
+) -> List[DatasetSpec]:
+    """Every combination of the given dimensions"""
+    return [
+        DatasetSpec(rows=r, columns=c, cardinality=k, missing_rate=m, task=t)
+        for t, r, c, k, m in itertools.product(tasks, rows, columns, cardinalities, missing_rates)
+    ]
+
+GRIDS = {
+    # A couple of minutes on a laptop; the default for regression checks
+    'quick': grid([1000, 10000], [10], [5, 50], [0.0, 0.05], ['classification']),
+    'full': grid(
+        [1000, 10000, 50000], [10, 50], [5, 100], [0.0, 0.1],
+        ['classification', 'regression', 'clustering']
+    ),
+}
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark the evaluation metrics on large test sets
+
+Compares the one-pass MetricsEngine with the previous implementation,
+which made one sklearn call per metric and separate predict and
+predict_proba passes (reproduced below as the baseline).
+
+Usage (from backend/):
+    python -m benchmarks.metrics_benchmark --rows 1000000 --classes 3
+"""
+
+import argparse
+import time
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (
+    accuracy_score, f1_score, mean_absolute_error, mean_squared_error,
+    precision_score, r2_score, recall_score, roc_auc_score
+)
+
+from app.services.model_trainer import ModelTrainer
+from app.utils.metrics import MetricsEngine
+
+def legacy_classification_metrics(y_true, y_pred, model, X_test) -> dict:
+    """Previous implementation: one sklearn call per metric, predict_proba on its own"""
+    metrics = {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, average='weighted', zero_division=0),
+        'recall': recall_score(y_true, y_pred, average='weighted', zero_division=0),
+        'f1_score': f1_score(y_true, y_pred, average='weighted', zero_division=0)
+    }
+    try:
+        if len(np.unique(y_true)) == 2 and hasattr(model, 'predict_proba'):
+            metrics['roc_auc'] = roc_auc_score(y_true, model.predict_proba(X_test)[:, 1])
+        elif len(np.unique(y_true)) > 2 and hasattr(model, 'predict_proba'):
+            metrics['roc_auc'] = roc_auc_score(
+                y_true, model.predict_proba(X_test), multi_class='ovr', average='weighted'
+            )
+    except Exception:
+        pass
+    return metrics
+
+def legacy_regression_metrics(y_true, y_pred) -> dict:
+    return {
+        'mse': mean_squared_error(y_true, y_pred),
+        'mae': mean_absolute_error(y_true, y_pred),
+        'r2_score': r2_score(y_true, y_pred)
+    }
+
+def timed(fn, *args, repeats: int = 3):
+    """Best wall-clock time of a few runs"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def report(label: str, legacy: float, engine: float):
+    print(f"{label:<34} legacy {legacy:7.3f}s   engine {engine:7.3f}s   {legacy / engine:5.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--classes", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train = rng.normal(size=(5000, 10))
+    y_train = (X_train[:, 0] * args.classes).astype(int) % args.classes
+    X_test = rng.normal(size=(args.rows, 10))
+    y_test = (X_test[:, 0] * args.classes).astype(int) % args.classes
+    model = LogisticRegression(max_iter=1000).fit(X_train, y_train)
+    engine = MetricsEngine()
+    trainer = ModelTrainer()
+    print(f"{args.rows} test rows, {args.classes} classes")
+
+    # Metric computation alone, given predictions and probabilities
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)
+
+    class ProbaCache:
+        """Stand-in model that returns the precomputed probabilities"""
+        def predict_proba(self, _):
+            return y_proba
+
+    _, legacy = timed(legacy_classification_metrics, y_test, y_pred, ProbaCache(), X_test)
+    _, new = timed(engine.classification, y_test, y_pred, y_proba, model.classes_)
+    report("classification metrics", legacy, new)
+
+    # Predictions plus metrics, as the trainer scores a fitted model
+    def legacy_score():
+        return legacy_classification_metrics(y_test, model.predict(X_test), model, X_test)
+
+    def engine_score():
+        predictions, proba = trainer.predict_with_proba(model, X_test)
+        return engine.classification(y_test, predictions, proba, model.classes_)
+
+    _, legacy = timed(legacy_score)
+    _, new = timed(engine_score)
+    report("predict + classification metrics", legacy, new)
+
+    y_true = rng.normal(size=args.rows)
+    y_reg = y_true + rng.normal(scale=0.3, size=args.rows)
+    _, legacy = timed(legacy_regression_metrics, y_true, y_reg)
+    _, new = timed(engine.regression, y_true, y_reg)
+    report("regression metrics", legacy, new)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark a full classification run on float64 and float32 feature matrices
+
+Preprocesses one synthetic dataset at each FEATURE_PRECISION and trains
+every configured classifier on it, one after another in this process.
+For each model it reports the wall time of fitting and scoring and the
+peak memory allocated while doing so, on top of the shared feature
+matrices: the copies estimators make of their input show up there.
+
+Usage (from backend/):
+    python -m benchmarks.precision_benchmark --rows 20000 --columns 40
+"""
+
+import time
+import argparse
+import tracemalloc
+import warnings
+from typing import Dict, Tuple
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from app.services.model_trainer import ModelTrainer
+from app.utils.data_preprocessor import FEATURE_PRECISIONS, DataPreprocessor
+from benchmarks.datasets import DatasetSpec, make_dataset
+
+def matrix_bytes(X) -> int:
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes if hasattr(X, 'nnz') else X.to_numpy().nbytes
+
+def train_models(trainer: ModelTrainer, split, traced: bool) -> Dict[str, Tuple[float, int]]:
+    """(seconds, peak bytes allocated) of fitting and scoring each classifier"""
+    X_train, X_test, y_train, y_test = split
+    measurements = {}
+    for name, prototype in trainer.models_config['classification'].items():
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        trainer.train_single_model(clone(prototype), name, X_train, X_test, y_train, y_test, 'classification')
+        seconds = time.perf_counter() - start
+        peak = 0
+        if traced:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        measurements[name] = (seconds, peak)
+    return measurements
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=40)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    spec = DatasetSpec(rows=args.rows, columns=args.columns, cardinality=5, missing_rate=0.05)
+    df = make_dataset(spec)
+    trainer = ModelTrainer(parallel=False)
+    X, y, _ = DataPreprocessor().split_target(df, 'target')
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    print(f"{spec.name}: {len(trainer.models_config['classification'])} classifiers, trained sequentially")
+
+    runs = {}
+    for precision in FEATURE_PRECISIONS:
+        Xt_train, Xt_test, _, _ = DataPreprocessor(precision=precision).fit_transform(
+            X_train, X_test, 'classification'
+        )
+        split = (Xt_train, Xt_test, y_train, y_test)
+        # Timed untraced; tracemalloc slows allocation-heavy estimators down
+        times = train_models(trainer, split, traced=False)
+        peaks = train_models(trainer, split, traced=True)
+        runs[precision] = {name: (times[name][0], peaks[name][1]) for name in times}
+        megabytes = (matrix_bytes(Xt_train) + matrix_bytes(Xt_test)) / 2 ** 20
+        print(f"{precision} feature matrices: {megabytes:.1f} MB")
+
+    megabytes = 2 ** 20
+    print(f"\n{'model':<22} {'float64 s':>10} {'float32 s':>10} {'float64 MB':>11} {'float32 MB':>11}")
+    for name in runs['float64']:
+        (time64, peak64), (time32, peak32) = runs['float64'][name], runs['float32'][name]
+        print(f"{name:<22} {time64:10.3f} {time32:10.3f} {peak64 / megabytes:11.1f} {peak32 / megabytes:11.1f}")
+    total = {precision: np.sum(list(run.values()), axis=0) for precision, run in runs.items()}
+    print(
+        f"{'total':<22} {total['float64'][0]:10.3f} {total['float32'][0]:10.3f} "
+        f"{total['float64'][1] / megabytes:11.1f} {total['float32'][1] / megabytes:11.1f}"
+    )
+    print(
+        f"float32 saves {1 - total['float32'][0] / total['float64'][0]:.0%} of the time and "
+        f"{1 - total['float32'][1] / total['float64'][1]:.0%} of the per-model allocations"
+    )
+
+if __name__ == "__main__":
+    main()
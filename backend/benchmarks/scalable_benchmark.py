@@ -0,0 +1,74 @@
+"""
+Benchmark the configured estimators against their scalable variants
+
+Preprocesses one synthetic dataset and trains, one after another in this
+process, every configured model that ScalableVariants swaps on it and the
+variant trained in its place. For each it reports the wall time of fitting
+and scoring, and the primary metric on the test split.
+
+Usage (from backend/):
+    python -m benchmarks.scalable_benchmark --rows 20000 --columns 40 --task classification
+"""
+
+import time
+import argparse
+import warnings
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from app.services.model_trainer import ModelTrainer
+from app.services.scheduler import DatasetShape
+from app.utils.data_preprocessor import DataPreprocessor
+from benchmarks.datasets import DatasetSpec, make_dataset
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--task", choices=['classification', 'regression'], default='classification')
+    parser.add_argument("--n-jobs", type=int, default=None, help="Threads per variant (default: N_JOBS)")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    spec = DatasetSpec(rows=args.rows, columns=args.columns, cardinality=5, missing_rate=0.05, task=args.task)
+    df = make_dataset(spec)
+    trainer = ModelTrainer(parallel=False)
+    X, y, _ = DataPreprocessor().split_target(df, 'target')
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y if args.task == 'classification' else None
+    )
+    X_train, X_test, _, _ = DataPreprocessor().fit_transform(X_train, X_test, args.task)
+
+    configured = trainer.models_config[args.task]
+    selected, variants = trainer.scalable_variants.select(
+        configured, DatasetShape.of(X_train, y_train, args.task),
+        n_jobs=args.n_jobs or trainer.n_jobs, sparse_input=hasattr(X_train, 'nnz')
+    )
+    print(f"{spec.name}: {len(variants)} of {len(configured)} models swapped, trained sequentially")
+    metric = 'accuracy' if args.task == 'classification' else 'r2_score'
+
+    def run(name, prototype):
+        start = time.perf_counter()
+        result = trainer.train_single_model(
+            clone(prototype), name, X_train, X_test, y_train, y_test, args.task
+        )
+        return time.perf_counter() - start, result.metrics[metric]
+
+    print(f"\n{'model':<22} {'variant':<48} {'configured s':>12} {'variant s':>10} {'configured':>10} {'variant':>8}")
+    totals = [0.0, 0.0]
+    for name, variant in variants.items():
+        (configured_time, configured_score), (variant_time, variant_score) = (
+            run(name, configured[name]), run(name, selected[name])
+        )
+        totals[0] += configured_time
+        totals[1] += variant_time
+        print(
+            f"{name:<22} {variant.estimator:<48} {configured_time:12.3f} {variant_time:10.3f} "
+            f"{configured_score:10.3f} {variant_score:8.3f}"
+        )
+    if variants:
+        print(f"{'total':<71} {totals[0]:12.3f} {totals[1]:10.3f}")
+        print(f"The variants save {1 - totals[1] / totals[0]:.0%} of the swapped models' training time")
+
+if __name__ == "__main__":
+    main()
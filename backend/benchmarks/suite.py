@@ -0,0 +1,347 @@
+"""
+Reproducible benchmark suite for the comparison pipeline
+
+``run`` generates synthetic datasets over a grid of rows, columns,
+categorical cardinality and missing rate, times each pipeline stage on its
+own (parse, task detection, preprocessing, training) and the full
+``MLService.compare_models`` path, and writes latency, throughput and peak
+memory to a JSON file. ``compare`` checks a run against a baseline file
+and exits with status 1 when a measurement regressed beyond the tolerance.
+Everything runs offline on CPU.
+
+Usage (from backend/):
+    python -m benchmarks.suite run --grid quick --output baseline.json
+    python -m benchmarks.suite run --grid quick --output current.json
+    python -m benchmarks.suite compare baseline.json current.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.model_selection import train_test_split
+
+from app import __version__
+from app.core.config import get_settings
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.services.ml_service import MLService
+from app.utils.memory import PeakRSSMonitor, current_rss
+from benchmarks.datasets import GRIDS, DatasetSpec, grid, make_csv
+
+FORMAT_VERSION = 1
+STAGES = ('parse', 'detect_task', 'preprocess', 'train', 'compare')
+
+def environment() -> Dict[str, Any]:
+    """What a result depends on besides the code: hardware, libraries and settings"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    settings = get_settings()
+    return {
+        'app_version': __version__,
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit_learn': sklearn.__version__,
+        'n_jobs': settings.N_JOBS,
+        'parallel_training': settings.PARALLEL_TRAINING,
+    }
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeats: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run ``fn`` ``repeats`` times and summarise wall time and memory
+
+    Memory is the API process's RSS: ``peak_rss_mb`` is the highest sample
+    seen and ``rss_delta_mb`` how far it rose above the RSS at the start of
+    the run. Memory of training worker processes is not included.
+    """
+    latencies, peaks, deltas = [], [], []
+    result = None
+    for _ in range(repeats):
+        start_rss = current_rss() or 0
+        with PeakRSSMonitor(interval=0.01) as monitor:
+            start = time.perf_counter()
+            result = await fn()
+            latencies.append(time.perf_counter() - start)
+        peaks.append(monitor.peak_bytes)
+        deltas.append(max(0, monitor.peak_bytes - start_rss))
+    megabytes = 1024 * 1024
+    return result, {
+        'repeats': repeats,
+        'latency_s': {
+            'median': statistics.median(latencies),
+            'min': min(latencies),
+            'max': max(latencies),
+        },
+        'peak_rss_mb': round(max(peaks) / megabytes, 1),
+        'rss_delta_mb': round(statistics.median(deltas) / megabytes, 1),
+    }
+
+async def benchmark_dataset(
+    service: MLService,
+    spec: DatasetSpec,
+    repeats: int,
+    stages: List[str],
+    options: ComparisonOptions
+) -> List[Dict[str, Any]]:
+    """Time each requested stage on one dataset"""
+    csv_content = make_csv(spec)
+    loop = asyncio.get_running_loop()
+
+    def blocking(fn, *args):
+        async def run():
+            return await loop.run_in_executor(None, fn, *args)
+        return run
+
+    def preprocess(df, task_type, target_column):
+        X, y, _ = service.data_preprocessor.split_target(df, target_column)
+        if task_type == 'clustering':
+            X, _, _, _ = service.data_preprocessor.fit_transform(X, None, task_type)
+            return X, X, None, None
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42,
+            stratify=y if task_type == 'classification' else None
+        )
+        X_train, X_test, _, _ = service.data_preprocessor.fit_transform(X_train, X_test, task_type)
+        return X_train, X_test, y_train, y_test
+
+    # Each stage's input is produced once, outside the timed region
+    df, _, _ = service.data_loader.load(csv_content)
+    task_type, target_column = service.task_detector.detect_task(df)
+    X_train, X_test, y_train, y_test = preprocess(df, task_type, target_column)
+
+    async def train():
+        if task_type == 'clustering':
+            return await service.clustering_engine.compare(X_train)
+        return await service.model_trainer.train_all_models(X_train, X_test, y_train, y_test, task_type)
+
+    async def compare():
+        return await service.compare_models(csv_content, options=options)
+
+    runners = {
+        'parse': blocking(service.data_loader.load, csv_content),
+        'detect_task': blocking(service.task_detector.detect_task, df),
+        'preprocess': blocking(preprocess, df, task_type, target_column),
+        'train': train,
+        'compare': compare,
+    }
+
+    records = []
+    for stage in stages:
+        result, stats = await measure(runners[stage], repeats)
+        record = {
+            'dataset': spec.to_dict(),
+            'stage': stage,
+            'task_type': task_type,
+            **stats,
+            'throughput_rows_per_s': round(spec.rows / stats['latency_s']['median'], 1),
+        }
+        if stage == 'compare':
+            # Where the end-to-end time went, as reported by the pipeline itself
+            record['breakdown_s'] = {name: timing.seconds for name, timing in (result.timings or {}).items()}
+            record['models'] = {model.name: model.status for model in result.models}
+        records.append(record)
+        print(
+            f"{spec.name:<48} {stage:<12} {stats['latency_s']['median']:9.4f}s "
+            f"{record['throughput_rows_per_s']:>12.0f} rows/s  peak {stats['peak_rss_mb']:8.1f} MB",
+            flush=True
+        )
+    return records
+
+async def run_suite(specs: List[DatasetSpec], repeats: int, stages: List[str], options: ComparisonOptions) -> Dict:
+    service = MLService()
+    # Every repeat must do the work: no result cache, no saved models
+    service.result_cache = None
+    service.model_registry = None
+    results = []
+    try:
+        for spec in specs:
+            results.extend(await benchmark_dataset(service, spec, repeats, stages, options))
+    finally:
+        service.shutdown()
+    return {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': environment(),
+        'options': options.model_dump(mode='json'),
+        'results': results,
+    }
+
+@dataclass
+class Finding:
+    """One measurement compared against the baseline"""
+    dataset: str
+    stage: str
+    metric: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+def compare_results(
+    baseline: Dict,
+    current: Dict,
+    tolerance: float = 0.25,
+    memory_tolerance: float = 0.25,
+    min_seconds: float = 0.01,
+    min_megabytes: float = 16.0
+) -> Tuple[List[Finding], List[str]]:
+    """
+    Compare median latency and RSS growth of every (dataset, stage) pair
+
+    A measurement regresses when it grew by more than the relative
+    tolerance *and* by more than the absolute floor, so sub-millisecond
+    jitter on tiny stages is not reported.
+
+    Returns:
+        Tuple of (findings, warnings) where warnings list pairs missing
+        from either run and environment differences
+    """
+    def index(run: Dict) -> Dict[Tuple[str, str], Dict]:
+        return {(record['dataset']['name'], record['stage']): record for record in run['results']}
+
+    baseline_records, current_records = index(baseline), index(current)
+    warnings = []
+    for key in ('cpu_count', 'python', 'numpy', 'scikit_learn', 'n_jobs', 'parallel_training'):
+        before, after = baseline['environment'].get(key), current['environment'].get(key)
+        if before != after:
+            warnings.append(f"environment differs: {key} {before} -> {after}")
+    for key in sorted(set(baseline_records) ^ set(current_records)):
+        side = 'baseline' if key in baseline_records else 'current run'
+        warnings.append(f"only in {side}: {key[0]} {key[1]}")
+
+    findings = []
+    for key in sorted(set(baseline_records) & set(current_records)):
+        before, after = baseline_records[key], current_records[key]
+        latency_before, latency_after = before['latency_s']['median'], after['latency_s']['median']
+        findings.append(Finding(
+            dataset=key[0], stage=key[1], metric='latency_s',
+            baseline=latency_before, current=latency_after,
+            regressed=latency_after > latency_before * (1 + tolerance)
+                and latency_after - latency_before > min_seconds
+        ))
+        memory_before, memory_after = before['rss_delta_mb'], after['rss_delta_mb']
+        findings.append(Finding(
+            dataset=key[0], stage=key[1], metric='rss_delta_mb',
+            baseline=memory_before, current=memory_after,
+            regressed=memory_after > memory_before * (1 + memory_tolerance)
+                and memory_after - memory_before > min_megabytes
+        ))
+    return findings, warnings
+
+def parse_list(value: str, cast) -> List:
+    return [cast(item) for item in value.split(',') if item]
+
+def build_specs(args) -> List[DatasetSpec]:
+    """The named grid, with any dimension replaced by command-line values"""
+    specs = GRIDS[args.grid]
+    dimensions = {
+        'rows': sorted({spec.rows for spec in specs}),
+        'columns': sorted({spec.columns for spec in specs}),
+        'cardinalities': sorted({spec.cardinality for spec in specs}),
+        'missing_rates': sorted({spec.missing_rate for spec in specs}),
+        'tasks': sorted({spec.task for spec in specs}),
+    }
+    overrides = {
+        'rows': args.rows and parse_list(args.rows, int),
+        'columns': args.columns and parse_list(args.columns, int),
+        'cardinalities': args.cardinality and parse_list(args.cardinality, int),
+        'missing_rates': args.missing_rate and parse_list(args.missing_rate, float),
+        'tasks': args.tasks and parse_list(args.tasks, str),
+    }
+    if not any(overrides.values()):
+        return specs
+    dimensions.update({name: value for name, value in overrides.items() if value})
+    return grid(**dimensions)
+
+def run_command(args) -> int:
+    stages = parse_list(args.stages, str)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"Unknown stages: {', '.join(sorted(unknown))}; choose from {', '.join(STAGES)}")
+        return 2
+    specs = build_specs(args)
+    print(f"{len(specs)} datasets x {len(stages)} stages, {args.repeats} repeats each")
+    report = asyncio.run(run_suite(specs, args.repeats, stages, ComparisonOptions(mode=args.mode)))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+    return 0
+
+def compare_command(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    findings, warnings = compare_results(
+        baseline, current,
+        tolerance=args.tolerance,
+        memory_tolerance=args.memory_tolerance,
+        min_seconds=args.min_seconds,
+        min_megabytes=args.min_megabytes
+    )
+    for warning in warnings:
+        print(f"warning: {warning}")
+    for finding in findings:
+        if finding.regressed or args.verbose:
+            flag = "REGRESSION" if finding.regressed else "ok"
+            print(
+                f"{flag:<10} {finding.dataset:<48} {finding.stage:<12} {finding.metric:<13} "
+                f"{finding.baseline:10.4f} -> {finding.current:10.4f} ({finding.change:+.0%})"
+            )
+    regressions = sum(finding.regressed for finding in findings)
+    print(f"{regressions} regressions in {len(findings)} measurements")
+    return 1 if regressions else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Benchmark a dataset grid and write the results")
+    run.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    run.add_argument("--rows", help="Comma-separated row counts (overrides the grid)")
+    run.add_argument("--columns", help="Comma-separated feature column counts")
+    run.add_argument("--cardinality", help="Comma-separated categories per categorical column")
+    run.add_argument("--missing-rate", help="Comma-separated missing value rates")
+    run.add_argument("--tasks", help="Comma-separated tasks: classification, regression, clustering")
+    run.add_argument("--stages", default=",".join(STAGES))
+    run.add_argument("--mode", choices=[mode.value for mode in ComparisonMode], default="standard",
+                     help="Comparison mode for the end-to-end stage")
+    run.add_argument("--repeats", type=int, default=3)
+    run.add_argument("--output", default="benchmark-results.json")
+
+    compare = commands.add_parser("compare", help="Flag regressions against a baseline run")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative latency growth")
+    compare.add_argument("--memory-tolerance", type=float, default=0.25, help="Allowed relative RSS growth")
+    compare.add_argument("--min-seconds", type=float, default=0.01, help="Ignore latency changes below this")
+    compare.add_argument("--min-megabytes", type=float, default=16.0, help="Ignore RSS changes below this")
+    compare.add_argument("--verbose", action="store_true", help="Print every measurement")
+
+    args = parser.parse_args(argv)
+    return run_command(args) if args.command == "run" else compare_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
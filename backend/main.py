@@ -6,18 +6,41 @@ A production-ready backend service for comparing machine learning models.
 Supports automatic task detection, data preprocessing, and comprehensive model evaluation.
 """
 
+import time
+_import_start = time.perf_counter()  # Everything imported below counts towards startup
+
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import uvicorn
 
 from app.services.ml_service import MLService
-from app.models.responses import ComparisonResponse, HealthResponse
+from app.services.model_registry import ModelNotFoundError
+from app.services.dataset_store import DatasetInUseError, DatasetNotFoundError
+from app.services.job_manager import JobManager
+from app.services.batch import BatchComparator
+from app.services.job_store import InMemoryJobStore
+from app.core.concurrency import PoolSaturatedError
+from app.utils.data_loader import (
+    SUPPORTED_EXTENSIONS, MemoryBudgetExceededError, UploadTooLargeError, spool_upload, unpack_zip
+)
+from app import __version__
+from app.models.requests import ComparisonOptions
+from app.models.responses import (
+    ComparisonResponse, DatasetProfile, HealthResponse, JobResponse, PredictionResponse, StoredDatasetResponse
+)
 from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.startup import StartupReport
+from app.core.telemetry import MetricsRegistry, StageTimer
+
+startup_report = StartupReport()
+startup_report.record('import', time.perf_counter() - _import_start)
 
 # Setup logging
 setup_logging()
@@ -26,21 +49,45 @@ logger = logging.getLogger(__name__)
 # Initialize settings
 settings = get_settings()
 
-# Initialize ML service
-ml_service = MLService()
+with startup_report.phase('service_init'):
+    # Initialize ML service
+    ml_service = MLService()
+    
+    # Initialize background job manager
+    job_manager = JobManager(ml_service, InMemoryJobStore(max_jobs=settings.MAX_STORED_JOBS))
+    
+    # Runs multi-dataset comparisons on one shared pool of training workers
+    batch_comparator = BatchComparator(ml_service)
+
+startup_seconds = ml_service.telemetry.registry.gauge(
+    "mlc_startup_seconds", "Seconds spent in each startup phase", ["phase"]
+)
+startup_import_seconds = ml_service.telemetry.registry.gauge(
+    "mlc_startup_import_seconds", "Seconds spent importing each module while pre-warming", ["module"]
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("Starting ML Models Comparator API")
+    if settings.PREWARM_WORKERS:
+        await asyncio.get_running_loop().run_in_executor(None, ml_service.prewarm, startup_report)
+    for phase, seconds in startup_report.phases.items():
+        startup_seconds.set(seconds, phase=phase)
+    for module, seconds in startup_report.imports.items():
+        startup_import_seconds.set(seconds, module=module)
+    logger.info(startup_report.summary())
     yield
     logger.info("Shutting down ML Models Comparator API")
+    await job_manager.shutdown()
+    await batch_comparator.shutdown()
+    ml_service.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="ML Models Comparator API",
     description="Compare multiple machine learning models on your dataset",
-    version="1.0.0",
+    version=__version__,
     lifespan=lifespan,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None
@@ -60,52 +107,387 @@ async def health_check():
     """Health check endpoint"""
     return HealthResponse(status="healthy")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage, concurrency, error, result cache and startup metrics (Prometheus text format)"""
+    return PlainTextResponse(ml_service.telemetry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 @app.post("/api/v1/compare", response_model=ComparisonResponse)
-async def compare_models(file: UploadFile = File(...)):
+async def compare_models(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = None,
+    options: ComparisonOptions = Depends()
+):
     """
     Compare multiple ML models on uploaded dataset
     
     Args:
-        file: CSV file containing the dataset
+        file: CSV, Parquet or Arrow IPC/Feather file containing the dataset
+        dataset_id: A stored dataset to use instead of a file
+        options: Comparison options passed as query parameters (e.g. ``?mode=racing``)
         
     Returns:
         ComparisonResponse with model results and metrics
         
     Raises:
-        HTTPException: For invalid files or processing errors
+        HTTPException: For invalid files, a saturated worker pool (503) or processing errors
     """
+    upload = None
     try:
-        # Validate file
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(
-                status_code=400,
-                detail="Only CSV files are supported"
-            )
-        
-        if file.size > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size exceeds maximum limit of {settings.MAX_FILE_SIZE} bytes"
-            )
-        
-        # Read file content
-        content = await file.read()
+        # Stream the upload to disk instead of holding it in memory
+        timer = ml_service.telemetry.timer()
+        upload = await dataset_source(file, dataset_id, timer)
         
         # Process with ML service
-        logger.info(f"Processing file: {file.filename}")
-        results = await ml_service.compare_models(content)
+        logger.info(f"Processing {source_name(file, dataset_id)}")
+        results = await ml_service.compare_models(upload, options=options, timer=timer)
         
         logger.info("Model comparison completed successfully")
         return results
         
     except HTTPException:
         raise
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejecting {source_name(file, dataset_id)}: {str(e)}")
+        raise service_busy()
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing file: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing dataset: {str(e)}"
         )
+    finally:
+        if upload is not None:
+            upload.cleanup()
+
+@app.post("/api/v1/compare/batch")
+async def compare_batch(
+    files: List[UploadFile] = File(...),
+    options: ComparisonOptions = Depends()
+):
+    """
+    Compare models on many datasets in one request, streamed as Server-Sent Events
+    
+    Every (dataset, model) pair trains in one shared pool of worker
+    processes, shared fairly between the datasets. Emits a ``dataset``
+    event per dataset as soon as its comparison finishes, then a single
+    ``summary`` event with a leaderboard across datasets, after which the
+    stream closes.
+    
+    Args:
+        files: Dataset files, or zip archives of them (each member is a dataset)
+        options: Comparison options passed as query parameters (standard mode only)
+        
+    Raises:
+        HTTPException: For invalid files or options, or a saturated worker pool (503)
+    """
+    sources = []
+    try:
+        for file in files:
+            validate_upload(file, extra_extensions=('.zip',))
+            upload = await read_upload(file)
+            name = file.filename or f"dataset-{len(sources) + 1}"
+            if not name.lower().endswith('.zip'):
+                sources.append((name, upload))
+                continue
+            try:
+                members = await asyncio.get_running_loop().run_in_executor(
+                    None, unpack_zip, upload, settings.MAX_FILE_SIZE, settings.BATCH_MAX_DATASETS,
+                    settings.UPLOAD_CHUNK_SIZE, settings.UPLOAD_SPOOL_DIR
+                )
+            except UploadTooLargeError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"{name}: {str(e)}")
+            finally:
+                upload.cleanup()
+            sources.extend((f"{name}/{member}", member_upload) for member, member_upload in members)
+        
+        if not sources:
+            raise HTTPException(status_code=400, detail="No datasets found in the upload")
+        if len(sources) > settings.BATCH_MAX_DATASETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A batch is limited to {settings.BATCH_MAX_DATASETS} datasets"
+            )
+        
+        # The batch owns the spooled uploads from here on
+        events = batch_comparator.submit(sources, options)
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejecting batch of {len(sources)} datasets: {str(e)}")
+        cleanup_sources(sources)
+        raise service_busy()
+    except ValueError as e:
+        cleanup_sources(sources)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        cleanup_sources(sources)
+        raise
+    
+    async def event_source():
+        async for event in events:
+            yield f"event: {event.event}\ndata: {event.payload.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/v1/profile", response_model=DatasetProfile)
+async def profile_dataset(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = None,
+    sample_rows: Optional[int] = Query(None, ge=0)
+):
+    """
+    Profile every column of a dataset without training anything
+    
+    Args:
+        file: CSV, Parquet or Arrow IPC/Feather file containing the dataset
+        dataset_id: A stored dataset to profile instead of a file
+        sample_rows: Leading rows to profile; defaults to PROFILE_SAMPLE_ROWS, 0 profiles every row
+        
+    Returns:
+        DatasetProfile with per-column statistics and the detected task
+        
+    Raises:
+        HTTPException: 400 for unreadable files, 413 if a full read exceeds the memory budget
+    """
+    upload = await dataset_source(file, dataset_id)
+    
+    try:
+        return await ml_service.profile(upload, sample_rows=sample_rows)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error profiling {source_name(file, dataset_id)}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error profiling dataset: {str(e)}")
+    finally:
+        upload.cleanup()
+
+@app.post("/api/v1/models/{comparison_id}/predict", response_model=PredictionResponse)
+async def predict(
+    comparison_id: str,
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = None,
+    model: Optional[str] = None
+):
+    """
+    Score uploaded rows with a model saved by an earlier comparison
+    
+    Args:
+        comparison_id: ``comparison_id`` returned with the comparison results
+        file: CSV, Parquet or Arrow IPC/Feather file with the training feature columns
+        dataset_id: A stored dataset to score instead of a file
+        model: Name of the model to use; defaults to the comparison's best model
+        
+    Returns:
+        PredictionResponse with one prediction per row, in the original label space
+        
+    Raises:
+        HTTPException: 404 for an unknown comparison or model, 400 for unusable rows
+    """
+    upload = await dataset_source(file, dataset_id)
+    
+    try:
+        return await ml_service.predict(comparison_id, upload, model_name=model)
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error predicting with {comparison_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error scoring dataset: {str(e)}")
+    finally:
+        upload.cleanup()
+
+@app.post("/api/v1/datasets", response_model=StoredDatasetResponse, status_code=201)
+async def store_dataset(file: UploadFile = File(...)):
+    """
+    Upload a dataset once and reference it by ``dataset_id`` afterwards
+    
+    The file is parsed, split and preprocessed now; comparisons, profiles
+    and predictions given the ``dataset_id`` reuse the stored result.
+    
+    Args:
+        file: CSV, Parquet or Arrow IPC/Feather file containing the dataset
+        
+    Returns:
+        The stored dataset, with its id and expiry
+        
+    Raises:
+        HTTPException: 404 if the dataset store is disabled, 400/413 for unusable files, 503 when busy
+    """
+    validate_upload(file)
+    timer = ml_service.telemetry.timer()
+    with timer.stage('upload_read'):
+        upload = await read_upload(file)
+    
+    try:
+        return await ml_service.store_dataset(upload, filename=file.filename, timer=timer)
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejecting dataset {file.filename}: {str(e)}")
+        raise service_busy()
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error storing {file.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing dataset: {str(e)}")
+    finally:
+        # Nothing left to remove once the store has taken the file
+        upload.cleanup()
+
+@app.get("/api/v1/datasets/{dataset_id}", response_model=StoredDatasetResponse)
+async def get_dataset(dataset_id: str):
+    """Return a stored dataset's summary and expiry"""
+    try:
+        return await ml_service.describe_dataset(dataset_id)
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.delete("/api/v1/datasets/{dataset_id}", status_code=204)
+async def delete_dataset(dataset_id: str):
+    """Remove a stored dataset"""
+    try:
+        await ml_service.delete_dataset(dataset_id)
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DatasetInUseError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(status_code=204)
+
+@app.post("/api/v1/jobs", response_model=JobResponse, status_code=202)
+async def create_job(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = None,
+    options: ComparisonOptions = Depends()
+):
+    """
+    Start a model comparison in the background
+    
+    Args:
+        file: CSV, Parquet or Arrow IPC/Feather file containing the dataset
+        dataset_id: A stored dataset to use instead of a file
+        options: Comparison options passed as query parameters
+        
+    Returns:
+        The queued job; poll /api/v1/jobs/{job_id} or stream its events
+        
+    Raises:
+        HTTPException: For invalid files or a saturated worker pool (503)
+    """
+    timer = ml_service.telemetry.timer()
+    upload = await dataset_source(file, dataset_id, timer)
+    
+    try:
+        # The job manager owns the spooled upload (or dataset lease) from here on
+        return await job_manager.submit(upload, source_name(file, dataset_id), options, timer=timer)
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejecting job for {source_name(file, dataset_id)}: {str(e)}")
+        upload.cleanup()
+        raise service_busy()
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Return job status together with the model results finished so far"""
+    job = await job_manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events
+    
+    Emits a ``result`` event per finished model (including those finished
+    before the client connected), then a single ``completed`` or ``failed``
+    event, after which the stream closes.
+    """
+    if await job_manager.store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_source():
+        async for event in job_manager.store.subscribe(job_id):
+            yield f"event: {event.event}\ndata: {event.payload.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def validate_upload(file: UploadFile, extra_extensions: tuple = ()):
+    """Reject uploads with an unsupported type or size"""
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    accepted = [*SUPPORTED_EXTENSIONS, *extra_extensions]
+    if extension not in accepted:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type; expected one of: {', '.join(accepted)}"
+        )
+    
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds maximum limit of {settings.MAX_FILE_SIZE} bytes"
+        )
+
+async def read_upload(file: UploadFile):
+    """Spool an upload to disk, enforcing the size limit while streaming"""
+    try:
+        return await spool_upload(
+            file,
+            max_bytes=settings.MAX_FILE_SIZE,
+            chunk_size=settings.UPLOAD_CHUNK_SIZE,
+            spool_dir=settings.UPLOAD_SPOOL_DIR
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def dataset_source(
+    file: Optional[UploadFile],
+    dataset_id: Optional[str],
+    timer: Optional[StageTimer] = None
+):
+    """Spool the uploaded file, or lease the stored dataset it references; cleanup() undoes either"""
+    if (file is None) == (dataset_id is None):
+        raise HTTPException(status_code=400, detail="Send either a file or a dataset_id")
+    if dataset_id is not None:
+        try:
+            return await ml_service.open_dataset(dataset_id)
+        except DatasetNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    validate_upload(file)
+    timer = timer or StageTimer()
+    with timer.stage('upload_read'):
+        return await read_upload(file)
+
+def cleanup_sources(sources):
+    """Remove the spool files of (name, upload) pairs not handed over to a batch"""
+    for _, upload in sources:
+        upload.cleanup()
+
+def source_name(file: Optional[UploadFile], dataset_id: Optional[str]) -> str:
+    """File name or stored dataset id, for logs and job listings"""
+    return file.filename if file is not None else f"dataset {dataset_id}"
+
+def service_busy() -> HTTPException:
+    """503 response telling the client to back off"""
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy processing other datasets, please retry later",
+        headers={"Retry-After": str(settings.BUSY_RETRY_AFTER)}
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
@@ -0,0 +1,130 @@
+"""Tests for batch comparisons across many datasets"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.models.responses import ComparisonResponse, DatasetInfo, ModelResult, PreprocessingInfo
+from app.services.batch import BatchComparator, FairShareQueue, build_leaderboard
+from app.services.ml_service import MLService
+
+def make_csv(seed: int, regression: bool = False) -> bytes:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['target'] = X[:, 0] * 2.5 + rng.normal(size=200) if regression else (X[:, 0] > 0).astype(int)
+    return df.to_csv(index=False).encode()
+
+def test_fair_share_queue_interleaves_datasets():
+    """The dataset with the fewest running tasks goes next, whatever order tasks were added in"""
+    queue = FairShareQueue()
+    queue.add('a', [(f"a{i}", print, ()) for i in range(4)])
+    queue.add('b', [("b0", print, ()), ("b1", print, ())])
+
+    started = [queue.pop()[0] for _ in range(4)]
+    assert started == ['a0', 'b0', 'a1', 'b1']
+
+    # b finishes both of its tasks; a new dataset and the idle one share the next workers
+    queue.task_done('b0')
+    queue.task_done('b1')
+    queue.add('c', [("c0", print, ())])
+    assert queue.pop()[0] == 'c0'
+    assert not queue.exhausted
+
+    queue.close()
+    assert [name for name, _, _ in queue.drain()] == ['a2', 'a3']
+    assert queue.pop() is None and queue.exhausted
+
+def test_leaderboard_ranks_models_per_dataset():
+    """Models are ranked within each dataset, ties sharing the best rank"""
+    def response(scores):
+        return ComparisonResponse(
+            task_type='classification',
+            models=[
+                ModelResult(name=name, metrics={'accuracy': score}, training_time=0.1, type='classification')
+                for name, score in scores.items()
+            ],
+            dataset_info=DatasetInfo(rows=10, columns=2, features=['x']),
+            preprocessing_info=PreprocessingInfo(
+                missing_values_handled=0, categorical_features_encoded=0, features_scaled=True
+            )
+        )
+
+    leaderboard = build_leaderboard([
+        response({'Tree': 0.9, 'Forest': 0.8, 'Linear': 0.7}),
+        response({'Tree': 0.8, 'Forest': 0.8, 'Linear': 0.9}),
+    ])
+
+    assert [entry.model for entry in leaderboard] == ['Tree', 'Forest', 'Linear']
+    tree, forest, linear = leaderboard
+    assert (tree.wins, tree.mean_rank) == (1, 1.5)
+    assert (forest.wins, forest.mean_rank) == (0, 2.0)
+    assert (linear.wins, linear.mean_rank, linear.mean_score) == (1, 2.0, 0.8)
+
+@pytest.mark.asyncio
+async def test_batch_streams_each_dataset_then_summary():
+    """Every dataset gets its own comparison; a broken one fails alone"""
+    service = MLService()
+    service.result_cache = None
+    service.model_trainer.models_config['classification'] = {
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+        'Decision Tree': DecisionTreeClassifier(random_state=42),
+    }
+    service.model_trainer.models_config['regression'] = {'Linear Regression': LinearRegression()}
+    comparator = BatchComparator(service)
+    sources = [
+        ('north.csv', make_csv(1)),
+        ('south.csv', make_csv(2)),
+        ('prices.csv', make_csv(3, regression=True)),
+        ('empty.csv', b""),
+    ]
+
+    events = [event async for event in comparator.submit(sources)]
+
+    assert [event.event for event in events] == ['dataset'] * 4 + ['summary']
+    results = {event.payload.dataset: event.payload for event in events[:-1]}
+    assert results['empty.csv'].status == 'failed' and results['empty.csv'].error
+    for name in ('north.csv', 'south.csv'):
+        assert results[name].status == 'completed'
+        assert [model.name for model in results[name].result.models] == ['Logistic Regression', 'Decision Tree']
+        assert results[name].result.schedule is not None
+    assert results['prices.csv'].result.task_type == 'regression'
+
+    summary = events[-1].payload
+    assert (summary.datasets, summary.completed, summary.failed) == (4, 3, 1)
+    assert {(entry.task_type, entry.datasets) for entry in summary.leaderboard} == {
+        ('classification', 2), ('regression', 1)
+    }
+    assert service.executor.in_flight == 0
+
+    with pytest.raises(ValueError):
+        comparator.submit(sources, ComparisonOptions(mode=ComparisonMode.RACING))
+
+@pytest.mark.asyncio
+async def test_batch_survives_failed_planning(monkeypatch):
+    """A dataset that cannot be planned fails alone and frees its slot for the next ones"""
+    service = MLService()
+    service.result_cache = None
+    service.model_trainer.models_config['classification'] = {'Logistic Regression': LogisticRegression(max_iter=1000)}
+    comparator = BatchComparator(service)
+    plan = comparator._plan
+
+    def failing_plan(name, *args):
+        if name.startswith('broken'):
+            raise RuntimeError("registry unavailable")
+        return plan(name, *args)
+
+    monkeypatch.setattr(comparator, '_plan', failing_plan)
+    sources = [(f'broken{i}.csv', make_csv(i)) for i in range(4)] + [('north.csv', make_csv(9))]
+
+    events = [event async for event in comparator.submit(sources)]
+
+    assert [event.event for event in events] == ['dataset'] * 5 + ['summary']
+    results = {event.payload.dataset: event.payload for event in events[:-1]}
+    assert all(results[f'broken{i}.csv'].status == 'failed' for i in range(4))
+    assert 'registry unavailable' in results['broken0.csv'].error
+    assert results['north.csv'].status == 'completed'
+    assert (events[-1].payload.completed, events[-1].payload.failed) == (1, 4)
+    assert service.executor.in_flight == 0
@@ -0,0 +1,43 @@
+"""Tests for the benchmark suite's dataset generator and regression check"""
+
+from benchmarks.datasets import DatasetSpec, make_csv, make_dataset
+from benchmarks.suite import compare_results
+from app.utils.task_detector import TaskDetector
+
+def test_datasets_are_deterministic_and_detected_as_their_task():
+    for task in ('classification', 'regression', 'clustering'):
+        spec = DatasetSpec(rows=500, columns=10, cardinality=20, missing_rate=0.1, task=task)
+        assert make_csv(spec) == make_csv(spec)
+
+        df = make_dataset(spec)
+        assert TaskDetector().detect_task(df)[0] == task
+        assert df.filter(like='cat_').nunique().max() <= 20
+        assert 0.05 < df.drop(columns='target', errors='ignore').isna().values.mean() < 0.15
+
+def run_with(latency: float, rss_delta: float, environment=None) -> dict:
+    return {
+        'environment': environment or {'cpu_count': 4},
+        'results': [{
+            'dataset': {'name': 'classification-r1000'},
+            'stage': 'train',
+            'latency_s': {'median': latency},
+            'rss_delta_mb': rss_delta,
+        }],
+    }
+
+def test_regressions_need_relative_and_absolute_growth():
+    baseline = run_with(latency=1.0, rss_delta=100.0)
+
+    findings, warnings = compare_results(baseline, run_with(latency=1.2, rss_delta=110.0))
+    assert not any(finding.regressed for finding in findings)
+    assert warnings == []
+
+    findings, _ = compare_results(baseline, run_with(latency=1.5, rss_delta=200.0))
+    assert [finding.metric for finding in findings if finding.regressed] == ['latency_s', 'rss_delta_mb']
+
+    # Doubling a 2 ms stage is below the absolute floor
+    findings, warnings = compare_results(
+        run_with(latency=0.002, rss_delta=1.0), run_with(latency=0.004, rss_delta=2.0, environment={'cpu_count': 8})
+    )
+    assert not any(finding.regressed for finding in findings)
+    assert warnings == ['environment differs: cpu_count 4 -> 8']
@@ -0,0 +1,64 @@
+"""Tests for the clustering comparison engine"""
+
+import pytest
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import DBSCAN, KMeans
+from sklearn.datasets import make_blobs
+from app.services.clustering import ClusteringEngine, SampledClusterer
+from app.services.model_trainer import ModelTrainer
+
+def test_inertia_is_measured_against_centroids():
+    """The vectorized inertia matches the fitted K-Means objective"""
+    X, _ = make_blobs(n_samples=500, centers=3, n_features=4, random_state=0)
+    model = KMeans(n_clusters=3, n_init='auto', random_state=0).fit(X)
+
+    metrics = ModelTrainer().calculate_clustering_metrics(X, model.labels_)
+
+    assert metrics['inertia'] == pytest.approx(model.inertia_)
+    assert metrics['n_clusters'] == 3
+    assert metrics['silhouette_score'] > 0.5
+    assert metrics['calinski_harabasz_score'] > 0
+    assert metrics['davies_bouldin_score'] > 0
+
+    # Sparse and float32 features are scored as they are, to the same values
+    for features in (sparse.csr_matrix(X), X.astype(np.float32)):
+        scored = ModelTrainer().calculate_clustering_metrics(features, model.labels_)
+        assert scored == pytest.approx(metrics, rel=1e-4)
+
+def test_sampled_clusterer_labels_sparse_rows_in_batches():
+    """Sparse rows are labelled batch by batch, to the same labels as the dense matrix"""
+    X, _ = make_blobs(n_samples=1000, centers=3, n_features=4, random_state=0)
+    model = SampledClusterer(DBSCAN(), sample_rows=200, auto_eps=True, batch_rows=128)
+
+    dense = model.fit(X).labels_
+    labels = model.fit(sparse.csr_matrix(X)).labels_
+
+    assert np.array_equal(labels, dense)
+    assert np.array_equal(model.predict(sparse.coo_matrix(X[:300])), dense[:300])
+
+@pytest.mark.asyncio
+async def test_sweep_finds_true_cluster_count_on_large_data():
+    """Large inputs use MiniBatchKMeans and sampled algorithms, and still find k"""
+    X, _ = make_blobs(n_samples=20000, centers=4, n_features=3, cluster_std=0.5, random_state=0)
+    engine = ClusteringEngine(ModelTrainer(), k_values=[2, 3, 4, 5], minibatch_rows=10000, sample_rows=1000)
+    streamed = []
+
+    async def on_result(result):
+        streamed.append(result.name)
+
+    results, summary = await engine.compare(X, on_result=on_result)
+
+    names = [result.name for result in results]
+    assert names == [
+        'K-Means (k=2)', 'K-Means (k=3)', 'K-Means (k=4)', 'K-Means (k=5)',
+        'Agglomerative Clustering (k=2)', 'Agglomerative Clustering (k=3)',
+        'Agglomerative Clustering (k=4)', 'Agglomerative Clustering (k=5)',
+        'DBSCAN'
+    ]
+    assert sorted(streamed) == sorted(names)
+    assert summary.kmeans_variant == 'MiniBatchKMeans'
+    assert summary.sample_rows == 1000
+    assert summary.best_model.endswith('(k=4)')
+    dbscan = results[-1]
+    assert dbscan.metrics['n_clusters'] == 4
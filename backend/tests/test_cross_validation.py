@@ -0,0 +1,68 @@
+"""Tests for cross-validated comparisons"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.services.ml_service import MLService
+
+@pytest.fixture
+def classification_csv():
+    np.random.seed(42)
+    X = np.random.randn(300, 3)
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['color'] = np.random.choice(['red', 'green', 'blue'], 300)
+    df['target'] = (X[:, 0] + X[:, 1] > 0).astype(int)
+    return df.to_csv(index=False).encode()
+
+@pytest.mark.asyncio
+async def test_cv_mode_reports_fold_statistics(classification_csv, monkeypatch):
+    """Every model is scored on every fold; folds are preprocessed once and shared"""
+    service = MLService()
+    fit_transform = service.data_preprocessor.fit_transform
+    calls = []
+
+    def counting_fit_transform(*args, **kwargs):
+        calls.append(args[0].shape)
+        return fit_transform(*args, **kwargs)
+
+    monkeypatch.setattr(service.data_preprocessor, 'fit_transform', counting_fit_transform)
+    options = ComparisonOptions(mode=ComparisonMode.CROSS_VALIDATION, cv_folds=3, cv_repeats=2)
+    streamed = []
+
+    async def on_result(result):
+        streamed.append(result.name)
+
+    result = await service.compare_models(classification_csv, on_result=on_result, options=options)
+
+    assert len(calls) == 6
+    assert result.cross_validation.strategy == 'stratified_kfold'
+    assert result.cross_validation.n_folds == 3 and result.cross_validation.n_repeats == 2
+    assert sorted(streamed) == sorted(model.name for model in result.models)
+    assert len(result.models) == len(service.model_trainer.models_config['classification'])
+    for model in result.models:
+        assert [(fold.repeat, fold.fold) for fold in model.folds] == [(r, f) for r in range(2) for f in range(3)]
+        accuracies = [fold.metrics['accuracy'] for fold in model.folds]
+        assert model.metrics['accuracy'] == pytest.approx(np.mean(accuracies))
+        assert model.metrics_std['accuracy'] == pytest.approx(np.std(accuracies))
+        assert model.fit_time == pytest.approx(sum(fold.fit_time for fold in model.folds))
+        assert all(fold.score_time >= 0 for fold in model.folds)
+
+@pytest.mark.asyncio
+async def test_cv_mode_sequential_matches_parallel(classification_csv):
+    """Training folds in worker processes gives the same scores as in-process"""
+    options = ComparisonOptions(mode=ComparisonMode.CROSS_VALIDATION, cv_folds=3)
+    parallel = MLService()
+    sequential = MLService()
+    parallel.model_trainer.parallel = True
+    parallel.model_trainer.n_jobs = 4
+    sequential.model_trainer.parallel = False
+
+    results = [
+        await service.run_comparison(classification_csv, options=options)
+        for service in (parallel, sequential)
+    ]
+
+    assert [model.name for model in results[0].models] == [model.name for model in results[1].models]
+    for a, b in zip(results[0].models, results[1].models):
+        assert a.metrics == pytest.approx(b.metrics)
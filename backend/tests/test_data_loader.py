@@ -0,0 +1,110 @@
+"""Tests for dataset ingestion"""
+
+import zipfile
+import pytest
+import pandas as pd
+import numpy as np
+from app.utils.data_loader import (
+    CSVLoader, DatasetLoader, MemoryBudgetExceededError, SpooledUpload, UploadTooLargeError, content_digest,
+    detect_format, unpack_zip
+)
+
+@pytest.fixture
+def mixed_csv():
+    """CSV with integer, float, low- and high-cardinality string columns"""
+    rng = np.random.default_rng(42)
+    n_samples = 5000
+    df = pd.DataFrame({
+        'count': rng.integers(0, 100, n_samples),
+        'value': rng.normal(size=n_samples),
+        'region': rng.choice(['north', 'south', 'east', 'west'], n_samples),
+        'id_code': [f"id-{i}" for i in range(n_samples)],
+    })
+    # A category that first appears after the sampled rows
+    df.loc[4000:, 'region'] = 'central'
+    return df, df.to_csv(index=False).encode()
+
+def test_chunked_load_matches_plain_read(mixed_csv):
+    """Chunked loading yields the same values with compact dtypes"""
+    df, content = mixed_csv
+    loader = CSVLoader(sample_rows=500, memory_budget=2 * 1024 * 1024)
+
+    loaded = loader.load(content)
+
+    assert loaded.shape == df.shape
+    assert isinstance(loaded['region'].dtype, pd.CategoricalDtype)
+    assert set(loaded['region'].cat.categories) == {'north', 'south', 'east', 'west', 'central'}
+    assert loaded['id_code'].dtype == object
+    assert loaded['count'].dtype == np.int8
+    assert loaded['value'].dtype == np.float64
+    pd.testing.assert_frame_equal(loaded.astype({'region': object, 'count': np.int64}), df)
+
+def test_memory_budget_is_enforced(mixed_csv):
+    """Datasets that outgrow the budget are rejected"""
+    _, content = mixed_csv
+    loader = CSVLoader(sample_rows=500, memory_budget=64 * 1024)
+
+    with pytest.raises(MemoryBudgetExceededError):
+        loader.load(content)
+
+def test_spooled_upload_is_read_from_disk(mixed_csv, tmp_path):
+    """Spooled uploads load from their file and reuse the precomputed hash"""
+    df, content = mixed_csv
+    path = tmp_path / 'upload.csv'
+    path.write_bytes(content)
+    upload = SpooledUpload(path=str(path), size=len(content), sha256=content_digest(content))
+
+    assert content_digest(upload) == content_digest(content)
+    assert len(CSVLoader().load(upload)) == len(df)
+    upload.cleanup()
+    assert not path.exists()
+
+@pytest.mark.parametrize('suffix, file_format, write', [
+    ('.parquet', 'parquet', lambda df, path: df.to_parquet(path)),
+    ('.feather', 'arrow', lambda df, path: df.to_feather(path, compression='uncompressed')),
+])
+def test_columnar_formats_are_memory_mapped(mixed_csv, tmp_path, suffix, file_format, write):
+    """Parquet and Arrow IPC uploads bypass CSV parsing and are memory-mapped"""
+    df, _ = mixed_csv
+    path = tmp_path / f"upload{suffix}"
+    write(df, path)
+    upload = SpooledUpload(path=str(path), size=path.stat().st_size, sha256='unused')
+
+    assert detect_format(upload) == file_format
+    loaded, loaded_format, reader = DatasetLoader(CSVLoader()).load(upload)
+
+    assert loaded_format == file_format
+    assert reader.endswith('(memory-mapped)')
+    assert isinstance(loaded['region'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(loaded.astype({'region': object, 'count': np.int64}), df)
+
+def test_csv_bytes_are_detected_as_csv(mixed_csv):
+    """Text content falls back to the chunked CSV reader"""
+    _, content = mixed_csv
+    assert detect_format(content) == 'csv'
+    assert DatasetLoader(CSVLoader()).load(content).reader == 'pandas.read_csv (chunked)'
+
+def test_zip_members_are_spooled_separately(mixed_csv, tmp_path):
+    """Dataset members are extracted one by one; metadata is skipped and sizes are enforced"""
+    _, content = mixed_csv
+    path = tmp_path / "batch.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("regions/north.csv", content)
+        archive.writestr("regions/south.csv", content[:1000])
+        archive.writestr("__MACOSX/regions/._north.csv", b"junk")
+        archive.writestr("README.txt", b"notes")
+    upload = SpooledUpload(path=str(path), size=path.stat().st_size, sha256="")
+
+    members = unpack_zip(upload, max_bytes=len(content), max_members=2, spool_dir=str(tmp_path))
+    assert [name for name, _ in members] == ['regions/north.csv', 'regions/south.csv']
+    north = members[0][1]
+    assert north.size == len(content) and north.sha256 == content_digest(content)
+
+    with pytest.raises(UploadTooLargeError):
+        unpack_zip(upload, max_bytes=len(content) - 1, max_members=2, spool_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        unpack_zip(upload, max_bytes=len(content), max_members=1, spool_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        unpack_zip(members[1][1], max_bytes=len(content), max_members=2)
+    # Only the two spooled members of the first call are left
+    assert len(list(tmp_path.glob("upload-*"))) == 2
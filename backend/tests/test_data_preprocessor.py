@@ -0,0 +1,93 @@
+"""Tests for the preprocessing pipeline"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from app.utils.data_preprocessor import DataPreprocessor
+
+@pytest.fixture
+def mixed_frame():
+    """Numeric, low- and high-cardinality categorical columns with missing values"""
+    rng = np.random.default_rng(0)
+    n_samples = 200
+    df = pd.DataFrame({
+        'value': rng.normal(size=n_samples),
+        'color': rng.choice(['red', 'green', 'blue'], n_samples).astype(object),
+        'city': [f"city-{i % 20}" for i in range(n_samples)],
+    })
+    df.loc[::15, 'value'] = np.nan
+    df.loc[::17, 'color'] = None
+    return df
+
+def test_fitted_on_training_split_only(mixed_frame):
+    """Statistics come from the training rows; unseen test values still transform"""
+    X_train, X_test = mixed_frame.iloc[:150], mixed_frame.iloc[150:].copy()
+    X_test.loc[X_test.index[0], 'color'] = 'purple'
+    X_test.loc[X_test.index[1], 'city'] = 'atlantis'
+
+    Xt_train, Xt_test, info, transformer = DataPreprocessor().fit_transform(
+        X_train, X_test, 'classification'
+    )
+
+    assert list(Xt_train.columns) == ['value', 'city', 'color_green', 'color_red']
+    assert Xt_train.shape == (150, 4) and Xt_test.shape == (50, 4)
+    assert not Xt_train.isna().any().any() and not Xt_test.isna().any().any()
+    # Numeric and ordinal columns are standardized with the training statistics
+    assert abs(Xt_train['value'].mean()) < 1e-9
+    assert info.missing_values_handled == int(mixed_frame.isna().values.sum())
+    assert info.categorical_features_encoded == 3
+    assert info.features_scaled
+    # The fitted transformer reproduces the output on new data
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(transformer.transform(X_test), columns=Xt_test.columns, index=X_test.index),
+        Xt_test
+    )
+
+def test_wide_categoricals_stay_sparse():
+    """Many one-hot columns produce a CSR matrix instead of a dense frame"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        f"cat_{i}": rng.choice(list('abcde'), 100).astype(object) for i in range(50)
+    })
+
+    X, y, info = DataPreprocessor().preprocess(df, None, 'clustering')
+
+    assert sparse.isspmatrix_csr(X)
+    assert X.shape == (100, 200)
+    assert y is None
+    assert not info.features_scaled
+
+def test_float32_precision_converts_once(mixed_frame):
+    """float32 output is one contiguous array the DataFrame wraps without copying"""
+    X, _, _ = DataPreprocessor(precision='float32').preprocess(mixed_frame, None, 'classification')
+    values = X.to_numpy()
+    assert (X.dtypes == np.float32).all()
+    assert values.flags.c_contiguous and np.shares_memory(values, X.to_numpy())
+
+    rng = np.random.default_rng(0)
+    wide = pd.DataFrame({f"cat_{i}": rng.choice(list('abcde'), 100).astype(object) for i in range(50)})
+    X_sparse, _, _ = DataPreprocessor(precision='float32').preprocess(wide, None, 'clustering')
+    assert sparse.isspmatrix_csr(X_sparse) and X_sparse.dtype == np.float32
+
+    with pytest.raises(ValueError):
+        DataPreprocessor(precision='float16')
+
+def test_datetime_columns_become_date_parts(mixed_frame, caplog):
+    """Datetimes are split into year, month and day of week; other unsupported columns are dropped loudly"""
+    X = mixed_frame.assign(
+        signup=pd.date_range('2023-01-01', periods=len(mixed_frame), freq='D'),
+        quarter=pd.period_range('2023Q1', periods=len(mixed_frame), freq='Q')
+    )
+    X.loc[::10, 'signup'] = pd.NaT
+
+    Xt, _, _, transformer = DataPreprocessor().fit_transform(X, None, 'clustering')
+
+    assert list(Xt.columns[1:4]) == ['signup_year', 'signup_month', 'signup_dayofweek']
+    assert 'quarter' not in Xt.columns and not Xt.isna().any().any()
+    assert Xt.loc[1, ['signup_year', 'signup_month', 'signup_dayofweek']].tolist() == [2023, 1, 0]
+    assert "Dropping columns of unsupported types: quarter" in caplog.text
+
+    # Dates read back from CSV are strings; they transform the same way
+    rows = X.head(3).assign(signup=X['signup'].head(3).astype(str))
+    assert DataPreprocessor().transform(transformer, rows)['signup_month'].tolist()[1:] == [1, 1]
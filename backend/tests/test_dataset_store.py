@@ -0,0 +1,120 @@
+"""Tests for the upload-once dataset store"""
+
+import os
+import time
+import hashlib
+import pytest
+import pandas as pd
+import numpy as np
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.services.dataset_store import DatasetInUseError, DatasetNotFoundError, DatasetStore
+from app.core.telemetry import StageTimer
+from app.services.ml_service import MLService
+from app.utils.data_loader import SpooledUpload
+from app.utils.data_preprocessor import DataPreprocessor
+
+def spool(tmp_path, df: pd.DataFrame, name: str = "upload.csv") -> SpooledUpload:
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return SpooledUpload(str(path), os.path.getsize(path), hashlib.sha256(path.read_bytes()).hexdigest())
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['color'] = rng.choice(['red', 'green'], 300)
+    df['target'] = (X[:, 0] > 0).astype(int)
+    return df
+
+@pytest.mark.asyncio
+async def test_stored_dataset_is_reused(tmp_path, frame):
+    """Comparisons on a stored dataset map its matrices instead of parsing the file"""
+    store = DatasetStore(str(tmp_path / "store"), max_bytes=1 << 30, ttl_seconds=3600)
+    service = MLService(dataset_store=store)
+    service.result_cache = None
+
+    stored = await service.store_dataset(spool(tmp_path, frame), filename="upload.csv")
+    assert stored.task_type == 'classification' and stored.dataset_info.rows == 300
+    assert (await service.describe_dataset(stored.dataset_id)).stored_bytes == stored.stored_bytes
+
+    source = await service.open_dataset(stored.dataset_id)
+    prepared = service.prepare_dataset(source, ComparisonOptions())
+    source.cleanup()
+    base = prepared.X_train.to_numpy()
+    while base.base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+    source = await service.open_dataset(stored.dataset_id)
+    try:
+        reused = await service.compare_models(source)
+    finally:
+        source.cleanup()
+    direct = await service.compare_models(frame.to_csv(index=False).encode())
+
+    assert 'dataset_load' in reused.timings and 'parse' not in reused.timings
+    assert reused.dataset_info == direct.dataset_info
+    assert {model.name: model.metrics for model in reused.models} == {
+        model.name: model.metrics for model in direct.models
+    }
+
+    # Folds are cut from the stored raw file
+    source = await service.open_dataset(stored.dataset_id)
+    try:
+        folded = await service.compare_models(source, options=ComparisonOptions(mode=ComparisonMode.CROSS_VALIDATION))
+    finally:
+        source.cleanup()
+    assert 'parse' in folded.timings and 'dataset_load' not in folded.timings
+    assert folded.cross_validation is not None
+
+    await service.delete_dataset(stored.dataset_id)
+    with pytest.raises(DatasetNotFoundError):
+        await service.open_dataset(stored.dataset_id)
+
+@pytest.mark.asyncio
+async def test_precision_change_reprepares_stored_dataset(tmp_path, frame):
+    """Matrices stored at another feature precision are prepared again from the raw rows"""
+    store = DatasetStore(str(tmp_path / "store"), max_bytes=1 << 30, ttl_seconds=3600)
+    service = MLService(dataset_store=store)
+    service.result_cache = None
+    stored = await service.store_dataset(spool(tmp_path, frame), filename="upload.csv")
+
+    assert service._config_fingerprint.endswith(f":{service.data_preprocessor.fingerprint()}")
+    service.data_preprocessor = DataPreprocessor(precision='float32')
+    timer = StageTimer()
+    source = await service.open_dataset(stored.dataset_id)
+    try:
+        prepared = service.prepare_dataset(source, ComparisonOptions(), timer)
+    finally:
+        source.cleanup()
+    assert 'parse' in timer.stages and 'dataset_load' not in timer.stages
+    assert set(prepared.X_train.dtypes) == {np.dtype('float32')}
+
+@pytest.mark.asyncio
+async def test_eviction_by_ttl_and_size_spares_leased(tmp_path, frame):
+    """Expired and least recently used datasets go; datasets in use stay and cannot be deleted"""
+    store = DatasetStore(str(tmp_path / "store"), max_bytes=1 << 30, ttl_seconds=3600)
+    service = MLService(dataset_store=store)
+    first = await service.store_dataset(spool(tmp_path, frame, "a.csv"))
+    second = await service.store_dataset(spool(tmp_path, frame, "b.csv"))
+
+    # Age both past the TTL; only the leased one survives
+    lease = store.open(second.dataset_id)
+    for stored in (first, second):
+        past = time.time() - 7200
+        os.utime(os.path.join(store.entry_dir(stored.dataset_id), "manifest.json"), (past, past))
+    store._evict()
+    with pytest.raises(DatasetNotFoundError):
+        store.describe(first.dataset_id)
+    store.describe(second.dataset_id)
+    with pytest.raises(DatasetInUseError):
+        await service.delete_dataset(second.dataset_id)
+    lease.cleanup()
+
+    # Over the size budget the least recently used dataset is evicted first
+    store.max_bytes = int(second.stored_bytes * 1.5)
+    third = await service.store_dataset(spool(tmp_path, frame, "c.csv"))
+    with pytest.raises(DatasetNotFoundError):
+        store.describe(second.dataset_id)
+    assert store.describe(third.dataset_id).dataset_id == third.dataset_id
@@ -0,0 +1,131 @@
+"""Tests for training through the task queue on separate workers"""
+
+import time
+import sqlite3
+import threading
+from contextlib import closing
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from app.models.responses import ModelResult
+from app.services.dataset_store import DatasetStore
+from app.services.distributed import TrainingWorker
+from app.services.ml_service import MLService
+from app.services.task_broker import TASK_COMPLETED, TASK_FAILED, SQLiteTaskBroker, TrainingTask
+from app.utils.data_loader import SpooledUpload
+
+def make_task(task_id: str, group_id: str = 'g') -> TrainingTask:
+    return TrainingTask(task_id, group_id, 'd', 'Decision Tree', 'classification', DecisionTreeClassifier())
+
+def test_lost_tasks_are_retried_then_failed(tmp_path):
+    """A task whose lease runs out goes to another worker, until it runs out of attempts"""
+    broker = SQLiteTaskBroker(str(tmp_path / "tasks.db"), lease_seconds=0.2, max_attempts=2)
+    broker.submit([make_task('a'), make_task('b')])
+
+    first = broker.claim('w1')
+    assert first.task_id == 'a' and first.attempts == 1
+    assert isinstance(first.prototype, DecisionTreeClassifier)
+    assert broker.claim('w2').task_id == 'b'
+    assert broker.claim('w3') is None
+
+    # w2 keeps its lease alive; w1 goes silent
+    time.sleep(0.12)
+    assert broker.heartbeat('b', 'w2')
+    time.sleep(0.12)
+    retried = broker.claim('w3')
+    assert retried.task_id == 'a' and retried.attempts == 2
+    assert not broker.heartbeat('a', 'w1')
+    assert not broker.complete('a', 'w1', ModelResult(name='Decision Tree', metrics={}, training_time=1.0, type='classification'))
+
+    assert broker.complete('b', 'w2', ModelResult(name='Decision Tree', metrics={'accuracy': 1.0}, training_time=1.0, type='classification'))
+    time.sleep(0.25)
+    records = {record.task_id: record for record in broker.status('g')}
+    assert records['b'].status == TASK_COMPLETED and records['b'].result.metrics == {'accuracy': 1.0}
+    assert records['a'].status == TASK_FAILED and 'after 2 attempts' in records['a'].error
+
+    broker.discard('g')
+    assert broker.status('g') == []
+
+    # Workers on other hosts cannot share a write-ahead log
+    with closing(sqlite3.connect(broker.path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ('wal',)
+    SQLiteTaskBroker(broker.path, shared=True)
+    with closing(sqlite3.connect(broker.path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ('delete',)
+
+async def stored_service(tmp_path, broker: SQLiteTaskBroker):
+    """A service training through ``broker``, and the id of a stored two-model classification dataset"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['target'] = (X[:, 0] > 0).astype(int)
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+
+    store = DatasetStore(str(tmp_path / "store"), max_bytes=10 ** 9, ttl_seconds=3600)
+    service = MLService(dataset_store=store, task_broker=broker)
+    service.result_cache = None
+    service.distributed_trainer.poll_interval = 0.05
+    service.model_trainer.models_config['classification'] = {
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+        'Decision Tree': DecisionTreeClassifier(random_state=42),
+    }
+    stored = await service.store_dataset(SpooledUpload(str(path), path.stat().st_size, "digest"))
+    return service, stored.dataset_id
+
+@pytest.mark.asyncio
+async def test_stored_dataset_trains_on_workers(tmp_path):
+    """A comparison of a stored dataset is trained by a worker and assembled into one response"""
+    broker = SQLiteTaskBroker(str(tmp_path / "tasks.db"))
+    service, dataset_id = await stored_service(tmp_path, broker)
+    store = service.dataset_store
+    models = service.model_trainer.models_config['classification']
+
+    # The worker runs elsewhere with its own trainer; here, on a thread
+    worker = TrainingWorker(broker, store, heartbeat_interval=0.05, poll_interval=0.05)
+    stop = threading.Event()
+    processed = []
+    thread = threading.Thread(target=lambda: processed.append(worker.run(stop)))
+    thread.start()
+    while not broker.live_workers():
+        time.sleep(0.01)
+    try:
+        streamed = []
+
+        async def record(result):
+            streamed.append(result.name)
+
+        source = await service.open_dataset(dataset_id)
+        result = await service.compare_models(source, on_result=record)
+        source.cleanup()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert [model.name for model in result.models] == list(models)
+    assert all(model.status == 'completed' and model.metrics['accuracy'] > 0.8 for model in result.models)
+    assert sorted(streamed) == sorted(models)
+    assert result.schedule is not None and processed == [2]
+    # Collected tasks are removed from the queue
+    with sqlite3.connect(broker.path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone() == (0,)
+
+@pytest.mark.asyncio
+async def test_models_train_locally_once_workers_are_gone(tmp_path):
+    """Tasks left queued after the last worker stops polling are trained by the API process"""
+    broker = SQLiteTaskBroker(str(tmp_path / "tasks.db"), lease_seconds=0.3)
+    service, dataset_id = await stored_service(tmp_path, broker)
+    # A worker that polls once and dies
+    assert broker.claim('gone') is None and broker.live_workers() == 1
+
+    source = await service.open_dataset(dataset_id)
+    result = await service.compare_models(source)
+    source.cleanup()
+
+    assert broker.live_workers() == 0
+    assert [model.name for model in result.models] == ['Logistic Regression', 'Decision Tree']
+    assert all(model.status == 'completed' for model in result.models)
+    with closing(sqlite3.connect(broker.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone() == (0,)
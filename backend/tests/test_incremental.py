@@ -0,0 +1,65 @@
+"""Tests for the out-of-core incremental training mode"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.models.requests import ComparisonOptions
+from app.services.ml_service import MLService
+from app.utils.incremental_preprocessor import IncrementalPreprocessor
+
+def test_preprocessor_matches_batch_statistics_after_removal():
+    """Statistics fitted chunk by chunk, minus removed rows, equal those of the kept rows"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'amount': rng.normal(loc=1000.0, scale=5.0, size=600),
+        'colour': rng.choice(['red', 'green', 'blue'], size=600),
+    })
+    df.loc[::7, 'amount'] = np.nan
+    held_out = df.iloc[::5]
+    kept = df.drop(index=held_out.index)
+
+    preprocessor = IncrementalPreprocessor()
+    preprocessor.begin(df.iloc[:200])
+    for start in range(0, 600, 200):
+        preprocessor.partial_fit(df.iloc[start:start + 200])
+    preprocessor.remove(held_out)
+    preprocessor.finalize(scale=True)
+
+    assert preprocessor.means['amount'] == pytest.approx(kept['amount'].mean())
+    assert preprocessor.stds['amount'] == pytest.approx(kept['amount'].std(ddof=0))
+    # colour is one-hot encoded with its first (sorted) category dropped
+    X = preprocessor.transform(kept)
+    assert X.shape == (len(kept), 3)
+    assert not np.isnan(X).any()
+    assert X[:, 0].mean() == pytest.approx(0.0, abs=1e-9)
+    assert X[:, 1:].sum(axis=1).tolist() == (kept['colour'] != 'blue').astype(float).tolist()
+
+@pytest.mark.asyncio
+async def test_incremental_comparison_streams_chunks():
+    """The incremental mode trains partial_fit models chunk by chunk and scores a holdout"""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(1200, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['colour'] = rng.choice(['red', 'green', 'blue'], size=1200)
+    df['target'] = np.where(X[:, 0] + X[:, 1] > 0, 'yes', 'no')
+
+    service = MLService()
+    service.result_cache = None
+    service.incremental_trainer.chunk_rows = 250
+    service.incremental_trainer.holdout_rows = 200
+
+    result = await service.compare_models(
+        df.to_csv(index=False).encode(), options=ComparisonOptions(mode='incremental')
+    )
+
+    assert result.task_type == 'classification'
+    assert result.comparison_id is None
+    assert result.incremental.chunks == 5
+    assert result.incremental.holdout_rows == 200
+    assert result.incremental.training_rows == 1000
+    assert result.dataset_info.rows == 1200
+    assert {model.name for model in result.models} == {
+        'Logistic Regression (SGD)', 'Linear SVM (SGD)', 'Naive Bayes', 'Neural Network'
+    }
+    assert max(model.metrics['accuracy'] for model in result.models) > 0.85
+    assert {'stream_scan', 'train', 'fit'} <= set(result.timings)
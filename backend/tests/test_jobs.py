@@ -0,0 +1,49 @@
+"""Tests for asynchronous comparison jobs"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.models.responses import JobStatus
+from app.services.job_manager import JobManager
+from app.services.job_store import InMemoryJobStore
+from app.services.ml_service import MLService
+
+@pytest.fixture
+def csv_content():
+    """Create sample classification CSV content"""
+    np.random.seed(42)
+    X = np.random.randn(100, 3)
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['target'] = (X[:, 0] > 0).astype(int)
+    return df.to_csv(index=False).encode()
+
+@pytest.mark.asyncio
+async def test_job_streams_results_then_completes(csv_content):
+    """Each model is published as it finishes, followed by the full response"""
+    manager = JobManager(MLService(), InMemoryJobStore())
+
+    job = await manager.submit(csv_content, 'data.csv')
+    assert job.status == JobStatus.QUEUED
+
+    events = [event async for event in manager.store.subscribe(job.job_id)]
+    names = [event.event for event in events]
+    assert names[-1] == 'completed'
+    assert names.count('result') == len(events[-1].payload.models)
+
+    final = await manager.store.get(job.job_id)
+    assert final.status == JobStatus.COMPLETED
+    assert final.result.task_type == 'classification'
+    assert manager.ml_service.executor.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_error():
+    """A dataset that cannot be processed marks the job as failed"""
+    manager = JobManager(MLService(), InMemoryJobStore())
+
+    job = await manager.submit(b"", 'empty.csv')
+    events = [event async for event in manager.store.subscribe(job.job_id)]
+
+    assert events[-1].event == 'failed'
+    final = await manager.store.get(job.job_id)
+    assert final.status == JobStatus.FAILED
+    assert final.error
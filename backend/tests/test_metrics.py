@@ -0,0 +1,58 @@
+"""Tests for the one-pass metrics engine"""
+
+import pytest
+import numpy as np
+from sklearn.metrics import (
+    accuracy_score, balanced_accuracy_score, f1_score, log_loss, mean_absolute_error,
+    mean_absolute_percentage_error, mean_squared_error, precision_score, r2_score,
+    recall_score, roc_auc_score
+)
+from app.utils.metrics import MetricsEngine
+
+@pytest.mark.parametrize('n_classes', [2, 4])
+def test_classification_metrics_match_sklearn(n_classes):
+    """Every metric derived from the confusion matrix agrees with sklearn"""
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, n_classes, 2000)
+    proba = rng.dirichlet(np.ones(n_classes), 2000)
+    proba[np.arange(2000), y_true] += 0.5
+    proba /= proba.sum(axis=1, keepdims=True)
+    y_pred = proba.argmax(axis=1)
+
+    metrics, per_class = MetricsEngine().classification(y_true, y_pred, proba, np.arange(n_classes))
+
+    expected_auc = (
+        roc_auc_score(y_true, proba[:, 1]) if n_classes == 2
+        else roc_auc_score(y_true, proba, multi_class='ovr', average='weighted')
+    )
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics['precision'] == pytest.approx(precision_score(y_true, y_pred, average='weighted'))
+    assert metrics['recall'] == pytest.approx(recall_score(y_true, y_pred, average='weighted'))
+    assert metrics['f1_score'] == pytest.approx(f1_score(y_true, y_pred, average='weighted'))
+    assert metrics['roc_auc'] == pytest.approx(expected_auc)
+    assert metrics['balanced_accuracy'] == pytest.approx(balanced_accuracy_score(y_true, y_pred))
+    assert metrics['log_loss'] == pytest.approx(log_loss(y_true, proba))
+    assert per_class['1']['recall'] == pytest.approx(recall_score(y_true, y_pred, average=None)[1])
+    assert sum(report['support'] for report in per_class.values()) == 2000
+
+def test_unpredicted_classes_score_zero():
+    """Classes that are never predicted count as zero precision, without probabilities"""
+    metrics, _ = MetricsEngine().classification([0, 1, 2, 2], [0, 0, 0, 0])
+
+    assert metrics['precision'] == pytest.approx(
+        precision_score([0, 1, 2, 2], [0, 0, 0, 0], average='weighted', zero_division=0)
+    )
+    assert 'roc_auc' not in metrics and 'log_loss' not in metrics
+
+def test_regression_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(size=1000)
+    y_pred = y_true + rng.normal(scale=0.3, size=1000)
+
+    metrics = MetricsEngine().regression(y_true, y_pred)
+
+    assert metrics['mse'] == pytest.approx(mean_squared_error(y_true, y_pred))
+    assert metrics['mae'] == pytest.approx(mean_absolute_error(y_true, y_pred))
+    assert metrics['r2_score'] == pytest.approx(r2_score(y_true, y_pred))
+    assert metrics['rmse'] == pytest.approx(np.sqrt(mean_squared_error(y_true, y_pred)))
+    assert metrics['mape'] == pytest.approx(mean_absolute_percentage_error(y_true, y_pred))
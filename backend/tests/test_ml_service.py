@@ -4,6 +4,7 @@ import pytest
 import pandas as pd
 import numpy as np
 from app.services.ml_service import MLService
+from app.core.concurrency import BoundedExecutor, PoolSaturatedError
 
 @pytest.fixture
 def ml_service():
@@ -78,4 +79,19 @@ def test_invalid_csv_format(ml_service):
     
     with pytest.raises(Exception):
         # This should be wrapped in asyncio.run in actual test
-        pass
\ No newline at end of file
+        pass
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_requests(sample_classification_data):
+    """Requests beyond the worker and queue capacity are rejected immediately"""
+    service = MLService(executor=BoundedExecutor(max_workers=1, max_queue=0))
+    csv_content = sample_classification_data.to_csv(index=False).encode()
+
+    async with service.executor.admit():
+        with pytest.raises(PoolSaturatedError):
+            await service.compare_models(csv_content)
+
+    result = await service.compare_models(csv_content)
+    assert result.task_type == 'classification'
+    service.shutdown()
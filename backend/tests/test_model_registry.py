@@ -0,0 +1,81 @@
+"""Tests for the persisted model registry"""
+
+import os
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from app.services.ml_service import MLService
+from app.services.model_registry import ModelNotFoundError, ModelRegistry
+
+@pytest.fixture
+def registry_service(tmp_path):
+    service = MLService()
+    service.model_registry = ModelRegistry(
+        str(tmp_path), service.data_loader, service.data_preprocessor, max_entries=2
+    )
+    return service
+
+@pytest.fixture
+def labelled_data():
+    """Classification data with a string target and a categorical feature"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['colour'] = rng.choice(['red', 'green', 'blue'], size=300)
+    df['target'] = np.where(X[:, 0] + X[:, 1] > 0, 'yes', 'no')
+    return df
+
+@pytest.mark.asyncio
+async def test_predictions_use_original_labels(registry_service, labelled_data):
+    """Registered models score new rows with the training preprocessing"""
+    result = await registry_service.compare_models(labelled_data.to_csv(index=False).encode())
+    assert result.comparison_id is not None
+
+    rows = labelled_data.drop(columns=['target']).head(50)
+    batch = rows.to_csv(index=False).encode()
+    prediction = await registry_service.predict(result.comparison_id, batch)
+
+    assert prediction.model in [model.name for model in result.models]
+    assert len(prediction.predictions) == 50
+    assert set(prediction.predictions) <= {'yes', 'no'}
+    accuracy = np.mean(np.array(prediction.predictions) == labelled_data['target'].head(50).values)
+    assert accuracy > 0.8
+
+    named = await registry_service.predict(result.comparison_id, batch, model_name='Logistic Regression')
+    assert named.model == 'Logistic Regression'
+
+    # Once loaded, scoring a small batch is served from memory
+    start = time.perf_counter()
+    registry_service.model_registry.predict(result.comparison_id, batch, 'Logistic Regression')
+    assert time.perf_counter() - start < 0.5
+
+@pytest.mark.asyncio
+async def test_unknown_models_and_eviction(registry_service, labelled_data):
+    """Unknown ids raise ModelNotFoundError and old comparisons are evicted"""
+    csv_content = labelled_data.to_csv(index=False).encode()
+    batch = labelled_data.drop(columns=['target']).head(5).to_csv(index=False).encode()
+    registry = registry_service.model_registry
+
+    with pytest.raises(ModelNotFoundError):
+        await registry_service.predict('0' * 32, batch)
+
+    ids = []
+    for seed in range(3):
+        # Vary the content so the result cache does not short-circuit training
+        shuffled = labelled_data.sample(frac=1, random_state=seed)
+        ids.append((await registry_service.compare_models(shuffled.to_csv(index=False).encode())).comparison_id)
+
+    with pytest.raises(ModelNotFoundError):
+        await registry_service.predict(ids[-1], batch, model_name='No Such Model')
+    assert sorted(os.listdir(registry.root_dir)) == sorted(ids[1:])
+
+    # Cached responses only point at comparisons that are still registered
+    cached = []
+    for seed in (0, 2):
+        shuffled = labelled_data.sample(frac=1, random_state=seed)
+        cached.append((await registry_service.compare_models(shuffled.to_csv(index=False).encode())).comparison_id)
+    assert cached == [None, ids[2]]
+
+    with pytest.raises(ValueError):
+        await registry_service.predict(ids[-1], labelled_data[['feature1']].to_csv(index=False).encode())
@@ -0,0 +1,78 @@
+"""Tests for killable model workers"""
+
+import os
+import time
+import pytest
+import numpy as np
+from app.services.model_runner import IsolatedRunner, Shared, TrainingLimits
+
+def quick(value):
+    return value * 2
+
+def slow():
+    time.sleep(30)
+
+def hungry():
+    blocks = []
+    for _ in range(64):
+        blocks.append(np.ones(8 * 1024 * 1024 // 8))  # 8MB each
+        time.sleep(0.02)
+    return len(blocks)
+
+def broken():
+    raise ValueError("bad input")
+
+def worker_pid(data):
+    return os.getpid(), data.sum()
+
+@pytest.mark.asyncio
+async def test_limits_are_enforced_per_model():
+    """Slow and memory-hungry workers are killed; the others complete"""
+    limits = TrainingLimits(model_timeout=1.0, model_memory_bytes=128 * 1024 * 1024)
+    runner = IsolatedRunner(max_workers=4, limits=limits)
+    started = time.monotonic()
+
+    outcomes = await runner.run_all([
+        ('quick', quick, (21,)),
+        ('slow', slow, ()),
+        ('hungry', hungry, ()),
+        ('broken', broken, ()),
+    ])
+
+    assert time.monotonic() - started < 10
+    assert outcomes['quick'].status == 'completed'
+    assert outcomes['quick'].result == 42
+    assert outcomes['slow'].status == 'timed_out'
+    assert outcomes['hungry'].status == 'oom'
+    assert outcomes['broken'].status == 'failed'
+    assert 'bad input' in outcomes['broken'].error
+
+@pytest.mark.asyncio
+async def test_request_deadline_times_out_remaining_models():
+    """Running and queued tasks are reported as timed out at the deadline"""
+    limits = TrainingLimits(deadline=time.monotonic() + 0.5)
+    runner = IsolatedRunner(max_workers=1, limits=limits)
+
+    outcomes = await runner.run_all([('first', slow, ()), ('second', quick, (1,))])
+
+    assert outcomes['first'].status == 'timed_out'
+    assert outcomes['second'].status == 'timed_out'
+
+@pytest.mark.asyncio
+async def test_workers_are_reused_and_replaced():
+    """Tasks share worker processes and Shared arguments; a killed worker is replaced"""
+    runner = IsolatedRunner(max_workers=1, limits=TrainingLimits(model_timeout=1.0))
+    data = Shared('data', np.arange(10))
+
+    outcomes = await runner.run_all([
+        ('first', worker_pid, (data,)),
+        ('second', worker_pid, (data,)),
+        ('slow', slow, ()),
+        ('third', worker_pid, (data,)),
+    ])
+
+    assert outcomes['first'].result == outcomes['second'].result
+    assert outcomes['first'].result[1] == 45
+    assert outcomes['slow'].status == 'timed_out'
+    assert outcomes['third'].status == 'completed'
+    assert outcomes['third'].result[0] != outcomes['first'].result[0]
@@ -0,0 +1,62 @@
+"""Tests for model trainer"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.services.model_trainer import ModelTrainer, as_float64
+
+@pytest.fixture
+def classification_split():
+    """Create a small train/test split for classification"""
+    np.random.seed(42)
+    X = pd.DataFrame(np.random.randn(120, 4), columns=['f1', 'f2', 'f3', 'f4'])
+    y = pd.Series((X['f1'] + X['f2'] > 0).astype(int))
+    return X.iloc[:90], X.iloc[90:], y.iloc[:90], y.iloc[90:]
+
+@pytest.mark.asyncio
+async def test_parallel_training_matches_sequential(classification_split):
+    """Parallel mode returns the same models, in config order, as sequential mode"""
+    X_train, X_test, y_train, y_test = classification_split
+
+    sequential = await ModelTrainer(parallel=False).train_all_models(
+        X_train, X_test, y_train, y_test, 'classification'
+    )
+    parallel = await ModelTrainer(n_jobs=2, parallel=True).train_all_models(
+        X_train, X_test, y_train, y_test, 'classification'
+    )
+
+    expected_order = list(ModelTrainer().models_config['classification'])
+    assert [r.name for r in parallel] == expected_order
+    assert [r.name for r in sequential] == expected_order
+    for seq, par in zip(sequential, parallel):
+        assert seq.metrics['accuracy'] == pytest.approx(par.metrics['accuracy'])
+
+def test_estimators_are_built_on_first_use():
+    """Model prototypes are only imported and constructed when their task is used"""
+    trainer = ModelTrainer()
+    catalog = trainer.models_config
+    fingerprint = trainer.config_fingerprint()
+    assert catalog._built == {}
+
+    assert list(catalog['regression']) == list(catalog.specs['regression'])
+    assert list(catalog._built) == ['regression']
+    # Building a task does not change the cache fingerprint
+    assert trainer.config_fingerprint() == fingerprint
+    assert catalog.get('unknown', {}) == {}
+
+@pytest.mark.asyncio
+async def test_float32_features_match_float64(classification_split):
+    """Training on float32 features scores like float64; as_float64 converts once and keeps the columns"""
+    X_train, X_test, y_train, y_test = classification_split
+    X32_train, X32_test = X_train.astype(np.float32), X_test.astype(np.float32)
+    trainer = ModelTrainer(parallel=False)
+
+    full = await trainer.train_all_models(X_train, X_test, y_train, y_test, 'classification')
+    half = await trainer.train_all_models(X32_train, X32_test, y_train, y_test, 'classification')
+
+    for a, b in zip(full, half):
+        assert a.name == b.name and a.metrics['accuracy'] == pytest.approx(b.metrics['accuracy'], abs=0.05)
+    converted = as_float64(X32_train)
+    assert (converted.dtypes == np.float64).all() and list(converted.columns) == list(X_train.columns)
+    assert converted.to_numpy().flags.c_contiguous
+    assert as_float64(X_train) is X_train
@@ -0,0 +1,81 @@
+"""Tests for the single-pass column profiler"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.services.ml_service import MLService
+from app.utils.data_preprocessor import DataPreprocessor
+from app.utils.profiler import ColumnProfiler, hyperloglog_distinct, profile_columns
+from app.utils.task_detector import TaskDetector
+
+@pytest.fixture
+def mixed_frame():
+    """Numeric, boolean, categorical and datetime columns with missing values"""
+    rng = np.random.default_rng(0)
+    n_samples = 2000
+    df = pd.DataFrame({
+        'value': rng.lognormal(size=n_samples),
+        'count': rng.integers(0, 50, n_samples),
+        'flag': rng.random(n_samples) > 0.5,
+        'color': rng.choice(['red', 'green', 'blue'], n_samples).astype(object),
+        'city': pd.Categorical([f"city-{i % 40}" for i in range(n_samples)]),
+        'seen': pd.date_range('2024-01-01', periods=n_samples, freq='h'),
+        'target': rng.integers(0, 3, n_samples),
+    })
+    df.loc[::15, 'value'] = np.nan
+    df.loc[::17, 'color'] = None
+    return df
+
+def test_profile_matches_pandas(mixed_frame):
+    """Counts and moments agree with pandas; approximate counts stay within a few percent"""
+    profile = ColumnProfiler().profile(mixed_frame)
+    columns = profile_columns(profile)
+
+    assert profile.rows == profile.profiled_rows == 2000 and not profile.sampled
+    assert [columns[col].kind for col in mixed_frame.columns] == [
+        'numeric', 'numeric', 'numeric', 'categorical', 'categorical', 'datetime', 'numeric'
+    ]
+    for col in mixed_frame.columns:
+        assert columns[col].null_count == mixed_frame[col].isna().sum()
+        assert columns[col].distinct == mixed_frame[col].nunique()
+    value = columns['value']
+    expected = mixed_frame['value']
+    assert value.min == pytest.approx(expected.min()) and value.max == pytest.approx(expected.max())
+    assert value.mean == pytest.approx(expected.mean())
+    assert value.std == pytest.approx(expected.std())
+    assert value.skewness == pytest.approx(expected.skew(), rel=1e-2)
+    assert value.kurtosis == pytest.approx(expected.kurt(), rel=1e-2)
+    assert columns['color'].mean is None
+
+    # Above the exact threshold distinct counts switch to HyperLogLog
+    approximate = profile_columns(ColumnProfiler(exact_distinct_rows=100).profile(mixed_frame))
+    assert approximate['city'].distinct_approximate
+    assert approximate['city'].distinct == 40 and approximate['target'].distinct == 3
+    assert hyperloglog_distinct(pd.Series(np.arange(200_000))) == pytest.approx(200_000, rel=0.03)
+    assert hyperloglog_distinct(pd.Series([None, None])) == 0
+
+def test_profile_feeds_task_detection_and_preprocessing(mixed_frame):
+    """Decisions made from the profile match those made by scanning the frame"""
+    profile = ColumnProfiler().profile(mixed_frame)
+    detector, preprocessor = TaskDetector(), DataPreprocessor()
+
+    assert detector.detect_task(mixed_frame, profile) == detector.detect_task(mixed_frame) == (
+        'classification', 'target'
+    )
+    X, _, _ = preprocessor.split_target(mixed_frame, 'target')
+    scanned = preprocessor.fit_transform(X, None, 'classification')
+    profiled = preprocessor.fit_transform(X, None, 'classification', profile=profile)
+    pd.testing.assert_frame_equal(profiled[0], scanned[0])
+    assert profiled[2] == scanned[2]
+
+@pytest.mark.asyncio
+async def test_service_profiles_leading_rows(mixed_frame):
+    """Only the requested rows are parsed, but the whole file is counted"""
+    content = mixed_frame.to_csv(index=False).encode()
+
+    profile = await MLService().profile(content, sample_rows=500)
+
+    assert profile.rows == 2000 and profile.profiled_rows == 500 and profile.sampled
+    assert profile.task_type == 'classification' and profile.target == 'target'
+    assert profile.file_format == 'csv'
+    assert len(profile.columns) == len(mixed_frame.columns)
@@ -0,0 +1,75 @@
+"""Tests for successive-halving racing"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.services.ml_service import MLService
+from app.services.model_trainer import ModelTrainer
+from app.services.racing import SuccessiveHalvingRacer
+
+class Fragile(LogisticRegression):
+    """Fails once it is given more than 500 rows"""
+    def fit(self, X, y):
+        if len(X) > 500:
+            raise ValueError("too many rows")
+        return super().fit(X, y)
+
+def test_rung_fractions_grow_by_eta_to_full_data():
+    """Rungs start at the minimum fraction and end on all rows"""
+    racer = SuccessiveHalvingRacer(ModelTrainer(), min_rows=100)
+
+    assert racer.rung_fractions(10000, 0.1, 3) == pytest.approx([0.1, 0.3, 0.9, 1.0])
+    # Small datasets are raised to min_rows before racing
+    assert racer.rung_fractions(200, 0.1, 3) == pytest.approx([0.5, 1.0])
+    assert racer.rung_fractions(50, 0.1, 3) == [1.0]
+
+@pytest.mark.asyncio
+async def test_racing_mode_reports_rungs_and_savings():
+    """Racing trains survivors on all rows and reports every rung"""
+    np.random.seed(42)
+    X = np.random.randn(2000, 4)
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3', 'feature4'])
+    df['target'] = (X[:, 0] + X[:, 1] > 0).astype(int)
+    csv_content = df.to_csv(index=False).encode()
+    options = ComparisonOptions(mode=ComparisonMode.RACING, racing_min_fraction=0.1, racing_eta=3)
+
+    result = await MLService().compare_models(csv_content, options=options)
+
+    racing = result.racing
+    assert [rung.fraction for rung in racing.rungs] == pytest.approx([0.1, 0.3, 0.9, 1.0])
+    assert len(racing.rungs[0].models) == len(result.models)
+    assert len(racing.rungs[1].models) == 3
+    finalists = [model for model in result.models if model.status == 'completed']
+    assert len(finalists) == 1
+    assert finalists[0].rungs[-1].rows == 1600
+    for model in result.models:
+        assert [rung.fraction for rung in model.rungs] == [r.fraction for r in racing.rungs[:len(model.rungs)]]
+    assert racing.compute_saved_seconds >= 0
+    assert 0 <= racing.compute_saved_ratio < 1
+
+@pytest.mark.asyncio
+async def test_failure_on_a_later_rung_is_reported():
+    """A model that fails after winning a rung reports the failure, not its earlier result"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1600, 3)), columns=['feature1', 'feature2', 'feature3'])
+    y = pd.Series((X['feature1'] > 0).astype(int))
+    trainer = ModelTrainer(parallel=False)
+    # Equal scores keep the first model, so the fragile one is promoted
+    trainer.models_config['classification'] = {'Fragile': Fragile(), 'Logistic Regression': LogisticRegression()}
+    reported = []
+
+    async def on_result(result):
+        reported.append((result.name, result.status))
+
+    results, racing = await SuccessiveHalvingRacer(trainer).race(
+        X, X, y, y, 'classification', ComparisonOptions(racing_min_fraction=0.25, racing_eta=2), on_result=on_result
+    )
+
+    assert [(result.name, result.status) for result in results] == [
+        ('Fragile', 'failed'), ('Logistic Regression', 'eliminated')
+    ]
+    assert results[0].metrics == {} and len(results[0].rungs) == 1
+    assert sorted(reported) == [('Fragile', 'failed'), ('Logistic Regression', 'eliminated')]
+    assert len(racing.rungs) == 2
@@ -0,0 +1,74 @@
+"""Tests for the comparison result cache"""
+
+import os
+import pytest
+import pandas as pd
+import numpy as np
+from app.models.responses import ComparisonResponse, DatasetInfo, ModelResult, PreprocessingInfo
+from app.services.ml_service import MLService
+from app.services.result_cache import ResultCache
+
+def make_response(name: str) -> ComparisonResponse:
+    """Build a minimal comparison response"""
+    return ComparisonResponse(
+        task_type='classification',
+        models=[ModelResult(name=name, metrics={'accuracy': 1.0}, training_time=0.1, type='classification')],
+        dataset_info=DatasetInfo(rows=1, columns=2, features=['a'], target='target'),
+        preprocessing_info=PreprocessingInfo(
+            missing_values_handled=0, categorical_features_encoded=0, features_scaled=True
+        )
+    )
+
+def test_key_depends_on_content_config_and_version():
+    """Changing any key component produces a different key"""
+    base = ResultCache.make_key("digest-a", "config", "1.0.0")
+    assert base == ResultCache.make_key("digest-a", "config", "1.0.0")
+    assert base != ResultCache.make_key("digest-b", "config", "1.0.0")
+    assert base != ResultCache.make_key("digest-a", "other", "1.0.0")
+    assert base != ResultCache.make_key("digest-a", "config", "1.0.1")
+
+def test_memory_tier_evicts_least_recently_used():
+    """The least recently used entry is dropped first"""
+    cache = ResultCache(max_entries=2)
+    cache.put('a', make_response('a'))
+    cache.put('b', make_response('b'))
+    assert cache.get('a') is not None
+    cache.put('c', make_response('c'))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.stats().misses == 1
+
+def test_disk_tier_survives_restart_and_respects_size_cap(tmp_path):
+    """Entries are reloaded from disk and old files are removed over the cap"""
+    entry_size = len(make_response('x').model_dump_json())
+    cache = ResultCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=entry_size * 2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, make_response(key))
+
+    assert len(os.listdir(tmp_path)) == 2
+    restarted = ResultCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=entry_size * 2)
+    assert restarted.get('a') is None
+    assert restarted.get('b').models[0].name == 'b'
+    assert restarted.stats().disk_hits == 1
+
+@pytest.mark.asyncio
+async def test_repeated_upload_is_served_from_cache():
+    """The second upload of identical bytes returns the stored response"""
+    np.random.seed(42)
+    df = pd.DataFrame(np.random.randn(100, 3), columns=['feature1', 'feature2', 'feature3'])
+    df['target'] = (df['feature1'] > 0).astype(int)
+    csv_content = df.to_csv(index=False).encode()
+    service = MLService(result_cache=ResultCache())
+
+    first = await service.compare_models(csv_content)
+    second = await service.compare_models(csv_content)
+
+    assert second == first
+    stats = service.result_cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    exposition = service.telemetry.render()
+    assert 'mlc_result_cache_hits_total 1' in exposition
+    assert 'mlc_result_cache_memory_entries 1' in exposition
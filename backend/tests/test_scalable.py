@@ -0,0 +1,77 @@
+"""Tests for the scalable estimator variants of large datasets"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC, SVR
+from app.services.ml_service import MLService
+from app.services.scalable import ScalableVariants
+from app.services.scheduler import CostModel, DatasetShape
+
+def test_variants_replace_estimators_from_the_thresholds():
+    """Small datasets keep the configured estimators; large ones get variants that fit, with reasons"""
+    variants = ScalableVariants(min_rows=1000, min_features=50)
+    prototypes = {
+        'SVM': SVC(probability=True, random_state=42),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=20, random_state=42),
+        'KNN': KNeighborsClassifier(),
+        'Random Forest': RandomForestClassifier(n_estimators=10, random_state=42),
+        'Logistic Regression': LogisticRegression(),
+    }
+    kept, swapped = variants.select(prototypes, DatasetShape(rows=999, features=10, classes=2), n_jobs=4)
+    assert kept == prototypes and swapped == {}
+
+    selected, swapped = variants.select(prototypes, DatasetShape(rows=10, features=50, classes=2), n_jobs=4)
+    assert set(swapped) == {'SVM', 'Gradient Boosting', 'KNN', 'Random Forest'}
+    assert swapped['SVM'].configured == 'SVC'
+    assert swapped['SVM'].reason.startswith('50 features (SCALABLE_MIN_FEATURES=50)')
+    assert swapped['Gradient Boosting'].estimator == 'HistGradientBoostingClassifier'
+    assert selected['Random Forest'].n_jobs == 4
+    assert selected['Logistic Regression'] is prototypes['Logistic Regression']
+    assert CostModel.key(selected['SVM']) == 'CalibratedClassifierCV(Pipeline(Nystroem,LinearSVC))'
+
+    # Sparse features keep GradientBoosting; one thread keeps KNN and forests
+    selected, swapped = variants.select(
+        prototypes, DatasetShape(rows=1000, features=10, classes=2), n_jobs=1, sparse_input=True
+    )
+    assert set(swapped) == {'SVM'} and '1000 training rows' in swapped['SVM'].reason
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1200, 5))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    selected, _ = variants.select(prototypes, DatasetShape.of(X, pd.Series(y), 'classification'), n_jobs=2)
+    for model in selected.values():
+        model.fit(X[:1000], y[:1000])
+        assert (model.predict(X[1000:]) == y[1000:]).mean() > 0.8
+    assert selected['SVM'].predict_proba(X[1000:]).shape == (200, 2)
+
+    regressor, swapped = variants.select({'SVR': SVR(C=2.0)}, DatasetShape(rows=1000, features=5))
+    assert swapped['SVR'].estimator == 'Nystroem + LinearSVR'
+    assert regressor['SVR'][-1].C == 2.0
+
+@pytest.mark.asyncio
+async def test_comparison_reports_variants():
+    """A standard comparison above the thresholds trains the variants and says why"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3', 'feature4'])
+    df['target'] = (X[:, 0] > 0).astype(int)
+    service = MLService()
+    service.result_cache = None
+    service.model_trainer.models_config['classification'] = {
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+        'SVM': SVC(probability=True, random_state=42),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=20, random_state=42),
+    }
+    service.model_trainer.scalable_variants = ScalableVariants(min_rows=300, min_features=1000)
+
+    result = await service.compare_models(df.to_csv(index=False).encode())
+
+    assert set(result.schedule.variants) == {'SVM', 'Gradient Boosting'}
+    assert '320 training rows (SCALABLE_MIN_ROWS=300)' in result.schedule.variants['SVM'].reason
+    assert [model.name for model in result.models] == ['Logistic Regression', 'SVM', 'Gradient Boosting']
+    assert all(model.status == 'completed' and model.metrics['accuracy'] > 0.8 for model in result.models)
+    assert 'CalibratedClassifierCV(Pipeline(Nystroem,LinearSVC))' in service.model_trainer.cost_model.observations
@@ -0,0 +1,83 @@
+"""Tests for the training cost model and scheduler"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from app.models.requests import ComparisonOptions
+from app.services import model_trainer
+from app.services.ml_service import MLService
+from app.services.scheduler import CostModel, DatasetShape, longest_first, plan_schedule
+
+def test_cost_model_learns_and_persists(tmp_path):
+    """Measured times pull predictions toward them and survive a restart"""
+    path = str(tmp_path / "costs.json")
+    model = CostModel(path=path)
+    forest = RandomForestClassifier()
+    shape = DatasetShape(rows=1000, features=10, classes=2)
+    prior = model.predict(forest, shape)
+
+    for rows in (1000, 2000, 4000):
+        model.observe(forest, DatasetShape(rows, 10, 2), 50 * prior * rows / 1000)
+    model.save()
+
+    learned = CostModel(path=path).predict(forest, shape)
+    assert learned > 10 * prior
+    assert learned == pytest.approx(model.predict(forest, shape))
+    assert model.observation_count == 3
+
+def test_longest_first_and_latency_target():
+    """Long runs start first; a latency target keeps the cheapest models that fit"""
+    order, makespan = longest_first({'a': 1.0, 'b': 4.0, 'c': 2.0, 'd': 3.0}, workers=2)
+    assert order == ['b', 'd', 'c', 'a']
+    assert makespan == 5.0
+
+    model = CostModel()
+    prototypes = {
+        'Logistic Regression': LogisticRegression(),
+        'Random Forest': RandomForestClassifier(),
+        'Decision Tree': DecisionTreeClassifier(),
+    }
+    shape = DatasetShape(rows=100_000, features=50, classes=2)
+    schedule = plan_schedule(model, prototypes, shape, workers=1)
+    assert schedule.order[0] == 'Random Forest' and schedule.skipped == []
+
+    cheap = plan_schedule(model, prototypes, shape, workers=1, latency_target=schedule.predicted['Decision Tree'] * 2)
+    assert cheap.skipped == ['Random Forest']
+    assert cheap.makespan <= cheap.latency_target
+
+@pytest.mark.asyncio
+async def test_comparison_reports_predicted_times(monkeypatch):
+    """Standard mode plans once, skips models predicted to miss the target and reports prediction accuracy"""
+    plans = []
+
+    def counted_plan(*args, **kwargs):
+        plans.append(args)
+        return plan_schedule(*args, **kwargs)
+
+    monkeypatch.setattr(model_trainer, 'plan_schedule', counted_plan)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3', 'feature4'])
+    df['target'] = (X[:, 0] > 0).astype(int)
+    service = MLService()
+    service.result_cache = None
+    service.model_trainer.models_config['classification'] = {
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+        'Decision Tree': DecisionTreeClassifier(random_state=42),
+        'Random Forest': RandomForestClassifier(n_estimators=10, random_state=42),
+    }
+    # Teach the cost model that forests are slow here
+    service.model_trainer.cost_model.observe(RandomForestClassifier(), DatasetShape(240, 4, 2), 1000.0)
+
+    result = await service.compare_models(df.to_csv(index=False).encode(), options=ComparisonOptions(latency_target=5))
+
+    assert result.schedule.skipped == ['Random Forest']
+    assert [model.name for model in result.models] == ['Logistic Regression', 'Decision Tree']
+    assert all(model.predicted_time is not None for model in result.models)
+    assert result.schedule.median_error_factor >= 1
+    assert result.schedule.observations == 1
+    assert service.model_trainer.cost_model.observation_count == 3
+    assert len(plans) == 1
@@ -0,0 +1,45 @@
+"""Tests for lazy estimator imports and startup pre-warming"""
+
+import os
+import sys
+import subprocess
+from multiprocessing import forkserver
+from app.core.startup import StartupReport
+from app.services.ml_service import MLService
+
+def test_service_import_leaves_estimator_modules_unloaded():
+    """Importing and constructing the service does not import the estimator families"""
+    code = (
+        "import sys\n"
+        "from app.services.ml_service import MLService\n"
+        "MLService()\n"
+        "print(sorted(m for m in ('sklearn.ensemble', 'sklearn.neural_network', 'sklearn.cluster') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+def test_app_import_leaves_estimator_modules_unloaded():
+    """Importing the app does not import the estimator modules the preprocessing helpers depend on"""
+    code = (
+        "import sys\n"
+        "import main\n"
+        "print(sorted(m for m in ('sklearn.svm', 'sklearn.neighbors', 'sklearn.linear_model') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+def test_prewarm_builds_every_task_and_starts_the_fork_server():
+    report = StartupReport()
+    with report.phase('service_init'):
+        service = MLService()
+    service.prewarm(report)
+
+    assert report.prewarmed
+    assert list(report.phases) == ['service_init', 'prewarm', 'fork_server']
+    # The fork server is running, so the first comparison does not start it
+    assert forkserver._forkserver._forkserver_pid is not None
+    os.kill(forkserver._forkserver._forkserver_pid, 0)
+    assert set(service.model_trainer.models_config._built) == {'classification', 'regression', 'clustering'}
+    assert all(module in sys.modules for module in service.model_trainer.models_config.modules())
+    assert all(seconds >= 0 for seconds in report.imports.values())
+    assert report.summary().startswith("Startup took")
@@ -0,0 +1,80 @@
+"""Tests for stage timing and the Prometheus metrics exposition"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from app.core.telemetry import MetricsRegistry, ServiceTelemetry, StageTimer
+from app.models.responses import ModelResult
+from app.services.ml_service import MLService
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and every label set gets _sum and _count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo", ["stage"], buckets=[0.1, 1])
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5, stage="parse")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP demo_seconds Demo", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{stage="parse"} 5.55' in lines
+    assert 'demo_seconds_count{stage="parse"} 3' in lines
+
+def test_failed_stage_is_counted_as_error():
+    telemetry = ServiceTelemetry()
+    timer = telemetry.timer()
+
+    with pytest.raises(ValueError):
+        with timer.stage("parse"):
+            raise ValueError("bad file")
+
+    assert telemetry.errors.value(stage="parse") == 1
+    assert telemetry.stage_seconds.count(stage="parse") == 1
+    assert "parse" in timer.stages
+
+@pytest.mark.asyncio
+async def test_comparison_reports_stage_breakdown():
+    """The response and the histograms cover every pipeline stage"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3'])
+    df['target'] = (X[:, 0] > 0).astype(int)
+    service = MLService()
+
+    result = await service.compare_models(df.to_csv(index=False).encode())
+
+    stages = list(result.timings)
+    assert stages[:7] == [
+        'parse', 'profile', 'detect_task', 'split_target', 'train_test_split', 'preprocess_fit',
+        'preprocess_transform'
+    ]
+    assert {'train', 'fit', 'predict', 'scoring'} <= set(stages)
+    assert result.timings['parse'].peak_rss_mb > 0
+    assert result.timings['fit'].seconds == pytest.approx(sum(model.fit_time for model in result.models), abs=1e-6)
+    for model in result.models:
+        assert 0 <= model.predict_time <= model.score_time
+
+    exposition = service.telemetry.render()
+    assert 'mlc_stage_duration_seconds_count{stage="train"} 1' in exposition
+    assert 'mlc_model_stage_duration_seconds_count{model="Random Forest",stage="fit"} 1' in exposition
+    assert 'mlc_comparisons_total{status="completed"} 1' in exposition
+    assert 'mlc_comparisons_in_progress 0' in exposition
+    assert 'mlc_pipeline_queue_depth 0' in exposition
+
+def test_model_histogram_is_labelled_by_configured_model():
+    """k-sweep candidates count under their model; names outside the configuration share one label"""
+    service = MLService()
+    results = [
+        ModelResult(name=name, metrics={}, training_time=0.1, type='clustering', fit_time=0.1)
+        for name in ('K-Means (k=2)', 'K-Means (k=3)', 'Unknown')
+    ]
+
+    service.record_model_stages(StageTimer(), results)
+
+    exposition = service.telemetry.render()
+    assert 'mlc_model_stage_duration_seconds_count{model="K-Means",stage="fit"} 2' in exposition
+    assert 'mlc_model_stage_duration_seconds_count{model="other",stage="fit"} 1' in exposition
+    assert 'k=' not in exposition
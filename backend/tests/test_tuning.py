@@ -0,0 +1,71 @@
+"""Tests for the halving hyperparameter search"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from app.models.requests import ComparisonMode, ComparisonOptions
+from app.services.ml_service import MLService
+from app.services.scheduler import CostModel
+
+@pytest.fixture
+def tuning_service():
+    """Service with two fast classifiers so the search stays small"""
+    service = MLService()
+    service.result_cache = None
+    service.model_trainer.models_config['classification'] = {
+        'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000),
+        'Decision Tree': DecisionTreeClassifier(random_state=42),
+    }
+    return service
+
+@pytest.fixture
+def csv_content():
+    np.random.seed(42)
+    X = np.random.randn(1500, 4)
+    df = pd.DataFrame(X, columns=['feature1', 'feature2', 'feature3', 'feature4'])
+    df['target'] = (X[:, 0] + X[:, 1] ** 2 > 0.5).astype(int)
+    return df.to_csv(index=False).encode()
+
+@pytest.mark.asyncio
+async def test_tuning_prunes_trials_and_reports_gain(tuning_service, csv_content):
+    """Every family is searched with halving and its winner compared with the defaults"""
+    options = ComparisonOptions(mode=ComparisonMode.TUNING, tune_candidates=9, tune_folds=3, racing_eta=3)
+
+    result = await tuning_service.compare_models(csv_content, options=options)
+
+    tuning = result.tuning
+    assert tuning.trials == 18
+    assert [rung.trials for rung in tuning.rungs] == [18, 6]
+    assert tuning.rungs[0].pruned == 12
+    assert [model.name for model in result.models] == ['Logistic Regression', 'Decision Tree']
+    for model in result.models:
+        assert model.best_params is not None
+        assert model.default_metrics is not None
+        gain = model.metrics['accuracy'] - model.default_metrics['accuracy']
+        assert model.tuning_gain == pytest.approx(gain)
+    # An unpruned tree overfits this target; the search should find a better depth
+    tree = result.models[1]
+    assert tree.best_params and tree.tuning_gain >= 0
+
+@pytest.mark.asyncio
+async def test_tuning_budget_sizes_the_first_rung(tuning_service, csv_content):
+    """The first rung samples fewer candidates to fit the budget; a tiny budget skips the search"""
+    # Predictions from the cost model's priors: ~3ms per rung-0 candidate, ~13ms of refits
+    tuning_service.model_trainer.cost_model = CostModel()
+    options = ComparisonOptions(mode=ComparisonMode.TUNING, tune_candidates=9, tune_budget=0.025)
+
+    result = await tuning_service.compare_models(csv_content, options=options)
+
+    tuning = result.tuning
+    assert 1 < tuning.n_candidates < 9
+    assert tuning.rungs[0].trials == tuning.trials == 2 * tuning.n_candidates
+
+    options = ComparisonOptions(mode=ComparisonMode.TUNING, tune_candidates=9, tune_budget=1e-6)
+
+    result = await tuning_service.compare_models(csv_content, options=options)
+
+    assert result.tuning.budget_exhausted
+    assert result.tuning.rungs == [] and result.tuning.search_time == 0
+    assert [model.best_params for model in result.models] == [{}, {}]
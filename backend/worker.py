@@ -0,0 +1,86 @@
+"""
+ML Models Comparator - Training Worker
+=====================================
+
+Runs the model training tasks that API processes queue in TASK_QUEUE_PATH.
+Start workers where they can reach the task queue and the dataset store
+(DATASET_STORE_DIR, plus MODEL_REGISTRY_DIR when fitted models are saved)
+under the same paths as the API. Workers on other hosts additionally need
+TASK_QUEUE_SHARED=true and a filesystem with working POSIX locks:
+
+    python worker.py --processes 4
+"""
+
+import os
+import signal
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.services.dataset_store import DatasetStore
+from app.services.distributed import TrainingWorker
+from app.services.task_broker import SQLiteTaskBroker
+
+logger = logging.getLogger("worker")
+
+def run_worker(worker_id: str, max_tasks: Optional[int] = None):
+    """Process tasks until SIGTERM or SIGINT; the current task is finished first"""
+    setup_logging()
+    settings = get_settings()
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    worker = TrainingWorker(
+        SQLiteTaskBroker(
+            settings.TASK_QUEUE_PATH,
+            lease_seconds=settings.TASK_LEASE_SECONDS,
+            max_attempts=settings.TASK_MAX_ATTEMPTS,
+            shared=settings.TASK_QUEUE_SHARED
+        ),
+        DatasetStore(
+            settings.DATASET_STORE_DIR,
+            max_bytes=settings.DATASET_STORE_MAX_BYTES,
+            ttl_seconds=settings.DATASET_STORE_TTL
+        ),
+        worker_id=worker_id,
+        heartbeat_interval=settings.TASK_HEARTBEAT_INTERVAL,
+        poll_interval=settings.TASK_POLL_INTERVAL
+    )
+    processed = worker.run(stop, max_tasks)
+    logger.info(f"Worker {worker_id} stopped after {processed} tasks")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run model training tasks from the task queue")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes, each training one model at a time")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--max-tasks", type=int, default=None, help="Exit after this many tasks per process")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if not settings.TASK_QUEUE_PATH or not settings.DATASET_STORE_DIR:
+        parser.error("TASK_QUEUE_PATH and DATASET_STORE_DIR must be set")
+
+    if args.processes == 1:
+        run_worker(args.worker_id, args.max_tasks)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{args.worker_id}-{index}", args.max_tasks))
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    # Pass shutdown on to the workers, which finish their current task
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: [process.terminate() for process in processes if process.is_alive()])
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,8 @@ export const ResultsTable: React.FC<ResultsTableProps> = ({ models}) => {
     const max = Math.max(...allValues);
     const min = Math.min(...allValues);
     
-    // For metrics like 'inertia' or 'mse', lower is better
-    const lowerIsBetter = metric.includes('inertia') || metric.includes('mse') || metric.includes('mae');
+    // For metrics like 'inertia', 'mse' or 'log_loss', lower is better
+    const lowerIsBetter = ['inertia', 'mse', 'mae', 'mape', 'log_loss', 'davies_bouldin'].some(name => metric.includes(name));
     
     if (lowerIsBetter) {
       if (value === min) return <TrendingDown className="w-4 h-4 text-green-500 inline ml-1" />;
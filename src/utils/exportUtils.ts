@@ -69,11 +69,18 @@ export const formatMetricName = (metric: string): string => {
     'recall': 'Recall',
     'f1_score': 'F1 Score',
     'roc_auc': 'ROC-AUC',
+    'balanced_accuracy': 'Balanced Accuracy',
+    'log_loss': 'Log-Loss',
     'mse': 'MSE',
     'mae': 'MAE',
+    'rmse': 'RMSE',
+    'mape': 'MAPE',
     'r2_score': 'R² Score',
     'silhouette_score': 'Silhouette Score',
-    'inertia': 'Inertia'
+    'inertia': 'Inertia',
+    'calinski_harabasz_score': 'Calinski-Harabasz',
+    'davies_bouldin_score': 'Davies-Bouldin',
+    'n_clusters': 'Clusters'
   };
   return formatMap[metric] || metric.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
 };
\ No newline at end of file